@@ -1,4 +1,5 @@
-import requests  # Added missing import
+from http_clients import registry as http_registry
+from metrics import span, STAGE_SECONDS
 from geopy.geocoders import Nominatim
 from geopy.distance import geodesic
 
@@ -15,7 +16,8 @@ def get_coordinates(location_name: str):
     try:
         # Appending 'India' helps restrict search context
         search_query = f"{location_name}, India"
-        location = geolocator.geocode(search_query)
+        with span(STAGE_SECONDS, stage="gis_geocode"):
+            location = geolocator.geocode(search_query)
         if location:
             return location.latitude, location.longitude
         return None, None
@@ -40,7 +42,8 @@ def fetch_nearest_amenity(lat: float, lon: float, amenity_type: str, radius_mete
     """
     
     try:
-        response = requests.get(OVERPASS_URL, params={'data': query}, timeout=20)
+        with span(STAGE_SECONDS, stage="gis_overpass"):
+            response = http_registry.get_sync("overpass").get(OVERPASS_URL, params={'data': query})
         if response.status_code == 200:
             data = response.json()
             return data.get('elements', [])
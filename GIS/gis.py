@@ -1,4 +1,5 @@
-import requests
+from http_clients import registry as http_registry
+from metrics import span, STAGE_SECONDS
 from geopy.geocoders import Nominatim
 from geopy.distance import geodesic
 
@@ -13,7 +14,8 @@ class EmergencyLocator:
         """Internal helper to get lat/lon from string."""
         try:
             search_query = f"{location_name}, India"
-            location = self.geolocator.geocode(search_query)
+            with span(STAGE_SECONDS, stage="gis_geocode"):
+                location = self.geolocator.geocode(search_query)
             if location:
                 return location.latitude, location.longitude
             return None, None
@@ -33,7 +35,8 @@ class EmergencyLocator:
         out center;
         """
         try:
-            response = requests.get(self.overpass_url, params={'data': query}, timeout=20)
+            with span(STAGE_SECONDS, stage="gis_overpass"):
+                response = http_registry.get_sync("overpass").get(self.overpass_url, params={'data': query})
             if response.status_code == 200:
                 return response.json().get('elements', [])
             return []
@@ -3,24 +3,84 @@ import os
 import dotenv
 from google import genai
 from google.genai import types
-from schema import EmergencyInfo, VerificationResult
+from schema import EmergencyInfo, VerificationResult, TurnResult
+from llm_cache import make_key, get_default_cache
+from scheduler import get_scheduler
+from metrics import span, LLM_CALL_SECONDS
+
+_USE_DEFAULT_CACHE = object()
+
+# Metric label per request kind (question_node has no response schema)
+CALL_NAMES = {EmergencyInfo: "extractor", VerificationResult: "verifier", TurnResult: "turn", None: "question"}
 
 class EmergencyAgents:
-    def __init__(self):
+    def __init__(self, client=None, cache=_USE_DEFAULT_CACHE):
         dotenv.load_dotenv()
-        self.client = genai.Client(api_key=os.getenv("GEMINI_API"))
+        # `client` can be injected (e.g. a stub for load tests)
+        self._client = client
         self.model_id = "gemini-2.0-flash"
+        # Pluggable response cache; pass cache=None to disable
+        self.cache = get_default_cache() if cache is _USE_DEFAULT_CACHE else cache
 
-    def extractor_node(self, current_transcript: str, existing_data: dict, conversation_history: list) -> EmergencyInfo:
-        """Updates the incident report based on the conversation."""
+    @property
+    def client(self):
+        # Created on first cache miss, so a pre-warmed cache runs fully offline
+        if self._client is None:
+            # GEMINI_BASE_URL points the SDK at another endpoint (e.g. the local stub in bench/)
+            base_url = os.getenv("GEMINI_BASE_URL")
+            http_options = types.HttpOptions(base_url=base_url) if base_url else None
+            self._client = genai.Client(api_key=os.getenv("GEMINI_API"), http_options=http_options)
+        return self._client
+
+    # --- Response cache ---
+
+    def _cache_key(self, prompt: str, config):
+        if self.cache is None:
+            return None
+        return make_key(self.model_id, config.system_instruction, prompt, config.response_schema)
+
+    def _cache_lookup(self, key, config):
+        if key is None:
+            return None
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        return self._decode(cached, config)
+
+    def _cache_store(self, key, response, config):
+        result = self._decode(response.text, config)
+        if key is not None:
+            self.cache.put(key, response.text)
+        return result
+
+    @staticmethod
+    def _decode(text: str, config):
+        if config.response_schema:
+            return config.response_schema.model_validate_json(text)
+        return text.strip()
+
+    def _generate(self, prompt: str, config):
+        call = CALL_NAMES.get(config.response_schema, "other")
+        key = self._cache_key(prompt, config)
+        cached = self._cache_lookup(key, config)
+        if cached is not None:
+            LLM_CALL_SECONDS.observe(0.0, call=call, cache="hit")
+            return cached
+        with span(LLM_CALL_SECONDS, call=call, cache="miss"):
+            response = self.client.models.generate_content(model=self.model_id, contents=prompt, config=config)
+        return self._cache_store(key, response, config)
+
+    # --- Request builders (shared by the sync and async agents) ---
+
+    def _extractor_request(self, current_transcript: str, existing_data: dict, conversation_history: list):
         system_prompt = """
         You are a highly trained 112 Dispatch AI.
-        
+
         CRITICAL EXTRACTION RULES:
         1. **Medical = Danger:** If the user reports a medical crisis (Heart attack, Stroke, Bleeding), the 'immediate_dangers' field MUST NOT be 'N/A' or 'None'. Set it to the condition (e.g., 'Cardiac Event', 'Life Threatening').
-        
+
         2. **Address Normalization:** Convert all locations to "Street/Landmark, City, State". Reject "India" or "City only".
-        
+
         3. **Age Extraction:** Listen carefully for keywords like "boy" (child), "old man" (senior), "baby" (child).
         """
 
@@ -30,86 +90,190 @@ class EmergencyAgents:
 
         # Current Data
         {existing_data}
-        
+
         # New Input
         "{current_transcript}"
-        
+
         Update the JSON. Be strict.
         """
 
-        response = self.client.models.generate_content(
-            model=self.model_id,
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                system_instruction=system_prompt,
-                response_mime_type="application/json",
-                response_schema=EmergencyInfo,
-                temperature=0.0
-            )
+        config = types.GenerateContentConfig(
+            system_instruction=system_prompt,
+            response_mime_type="application/json",
+            response_schema=EmergencyInfo,
+            temperature=0.0
         )
-        return response.parsed
+        return prompt, config
 
-    def verifier_node(self, parameters: dict) -> VerificationResult:
-        """Audits the data. Now enforces Age Group."""
+    def _verifier_request(self, parameters: dict):
         system_prompt = """
         You are a Dispatch Supervisor. Audit the data for COMPLETENESS.
-        
+
         VALIDATION CHECKLIST (Add to missing_fields if failed):
         1. **location**: Must be specific (Street + City). Reject broad regions.
         2. **emergency_type**: Must not be 'unknown'.
-        3. **immediate_dangers**: 
+        3. **immediate_dangers**:
            - If emergency_type is 'medical', this CANNOT be 'N/A' or 'None'.
            - If fire/police, must be specific.
         4. **age_group**: Must not be 'unknown'. (Crucial for dispatching correct units).
         5. **caller_name**: Must not be 'N/A'.
-        
+
         Return the list of missing fields.
         """
 
         prompt = f"""
         Collected Data: {parameters}
-        
+
         Perform Audit.
         """
 
-        response = self.client.models.generate_content(
-            model=self.model_id,
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                system_instruction=system_prompt,
-                response_mime_type="application/json",
-                response_schema=VerificationResult,
-                temperature=0.0
-            )
+        config = types.GenerateContentConfig(
+            system_instruction=system_prompt,
+            response_mime_type="application/json",
+            response_schema=VerificationResult,
+            temperature=0.0
         )
-        return response.parsed
+        return prompt, config
 
-    def question_node(self, missing_field: str, conversation_history: list) -> str:
-        """Generates professional questions."""
+    def _question_request(self, missing_field: str, conversation_history: list):
         system_prompt = """
         You are a 911 Operator. Ask ONE direct question for the missing field.
         Tone: Professional, Efficient, Calm.
         """
-        
+
         prompt = f"""
         Missing Field: {missing_field}
         History: {conversation_history[-2:] if conversation_history else 'None'}
-        
+
         Directives:
         - If 'age_group' missing: "Approximate age of the patient?"
         - If 'immediate_dangers' missing (and it's medical): "Is the patient conscious and breathing?"
         - If 'location' missing: "State the exact address, including city."
-        
+
         Generate Question:
         """
-        
-        response = self.client.models.generate_content(
-            model=self.model_id,
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                system_instruction=system_prompt,
-                max_output_tokens=50,
-                temperature=0.1
-            )
+
+        config = types.GenerateContentConfig(
+            system_instruction=system_prompt,
+            max_output_tokens=50,
+            temperature=0.1
         )
-        return response.text.strip()
\ No newline at end of file
+        return prompt, config
+
+    def _turn_request(self, current_transcript: str, existing_data: dict, conversation_history: list):
+        system_prompt = """
+        You are a highly trained 112 Dispatch AI. In ONE step you must:
+        (a) update the incident report, (b) audit it, (c) ask the next question.
+
+        EXTRACTION RULES:
+        1. **Medical = Danger:** For a medical crisis, 'immediate_dangers' MUST NOT be 'N/A' or 'None'.
+        2. **Address Normalization:** "Street/Landmark, City, State". Reject "India" or "City only".
+        3. **Age Extraction:** "boy" (child), "old man" (senior), "baby" (child).
+
+        VALIDATION CHECKLIST (in this order, add to missing_fields if failed):
+        1. location: Must be specific (Street + City).
+        2. emergency_type: Must not be 'unknown'.
+        3. immediate_dangers: Cannot be 'N/A' or 'None' for medical; specific for fire/police.
+        4. age_group: Must not be 'unknown'.
+        5. caller_name: Must not be 'N/A'.
+
+        QUESTION (for missing_fields[0] only, Professional, Efficient, Calm):
+        - 'age_group': "Approximate age of the patient?"
+        - 'immediate_dangers' (medical): "Is the patient conscious and breathing?"
+        - 'location': "State the exact address, including city."
+        """
+
+        prompt = f"""
+        # History
+        {"".join(conversation_history)}
+
+        # Current Data
+        {existing_data}
+
+        # New Input
+        "{current_transcript}"
+
+        Update, audit and ask. Be strict.
+        """
+
+        config = types.GenerateContentConfig(
+            system_instruction=system_prompt,
+            response_mime_type="application/json",
+            response_schema=TurnResult,
+            temperature=0.0
+        )
+        return prompt, config
+
+    # --- Agent Nodes ---
+
+    def extractor_node(self, current_transcript: str, existing_data: dict, conversation_history: list) -> EmergencyInfo:
+        """Updates the incident report based on the conversation."""
+        prompt, config = self._extractor_request(current_transcript, existing_data, conversation_history)
+        return self._generate(prompt, config)
+
+    def verifier_node(self, parameters: dict) -> VerificationResult:
+        """Audits the data. Now enforces Age Group."""
+        prompt, config = self._verifier_request(parameters)
+        return self._generate(prompt, config)
+
+    def question_node(self, missing_field: str, conversation_history: list) -> str:
+        """Generates professional questions."""
+        prompt, config = self._question_request(missing_field, conversation_history)
+        return self._generate(prompt, config)
+
+    def turn_node(self, current_transcript: str, existing_data: dict, conversation_history: list) -> TurnResult:
+        """Extracts, audits and asks the next question in a single call."""
+        prompt, config = self._turn_request(current_transcript, existing_data, conversation_history)
+        return self._generate(prompt, config)
+
+
+class AsyncEmergencyAgents(EmergencyAgents):
+    """Same agents on the genai async client, so callers await instead of holding a thread."""
+
+    # Same cache, but a disk (SQLite) tier is read and written off the event loop
+
+    async def _acache_lookup(self, key, config):
+        if key is None:
+            return None
+        cached = await self.cache.aget(key)
+        if cached is None:
+            return None
+        return self._decode(cached, config)
+
+    async def _acache_store(self, key, response, config):
+        result = self._decode(response.text, config)
+        if key is not None:
+            await self.cache.aput(key, response.text)
+        return result
+
+    async def _agenerate(self, prompt: str, config):
+        call = CALL_NAMES.get(config.response_schema, "other")
+        key = self._cache_key(prompt, config)
+        cached = await self._acache_lookup(key, config)
+        if cached is not None:
+            LLM_CALL_SECONDS.observe(0.0, call=call, cache="hit")
+            return cached
+        # Cross-session gate: concurrency cap, coalescing, fair queuing, 429 backoff
+        scheduler_key = key or make_key(self.model_id, config.system_instruction, prompt, config.response_schema)
+        with span(LLM_CALL_SECONDS, call=call, cache="miss"):
+            response = await get_scheduler(self.model_id).submit(
+                scheduler_key,
+                lambda: self.client.aio.models.generate_content(model=self.model_id, contents=prompt, config=config)
+            )
+        return await self._acache_store(key, response, config)
+
+    async def extractor_node(self, current_transcript: str, existing_data: dict, conversation_history: list) -> EmergencyInfo:
+        prompt, config = self._extractor_request(current_transcript, existing_data, conversation_history)
+        return await self._agenerate(prompt, config)
+
+    async def verifier_node(self, parameters: dict) -> VerificationResult:
+        prompt, config = self._verifier_request(parameters)
+        return await self._agenerate(prompt, config)
+
+    async def question_node(self, missing_field: str, conversation_history: list) -> str:
+        prompt, config = self._question_request(missing_field, conversation_history)
+        return await self._agenerate(prompt, config)
+
+    async def turn_node(self, current_transcript: str, existing_data: dict, conversation_history: list) -> TurnResult:
+        prompt, config = self._turn_request(current_transcript, existing_data, conversation_history)
+        return await self._agenerate(prompt, config)
@@ -4,7 +4,6 @@ from pydantic import BaseModel
 # Changed import to generic 'g' assuming files are in same folder. 
 # If 'g.py' is in a 'GIS' folder, use: from GIS.g import ...
 from GIS.g import get_coordinates, geolocator, fetch_nearest_amenity, calculate_details
-import requests
 import math
 from rag import build_rag_chain
 from contextlib import asynccontextmanager
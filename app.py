@@ -1,14 +1,14 @@
 import streamlit as st
-import os
-import json
-import pickle
+from datetime import datetime
 from dotenv import load_dotenv
+from incident_store import get_incident_store, INCIDENT_DB
 
 # --- RAG IMPORTS ---
 from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_pinecone import PineconeVectorStore
-from langchain_community.retrievers import BM25Retriever
-from langchain.retrievers import EnsembleRetriever, ContextualCompressionRetriever
+from vector_index import load_vector_retriever
+from keyword_index import load_keyword_retriever
+from langchain.retrievers import ContextualCompressionRetriever
+from hybrid_retriever import build_hybrid_retriever
 from langchain_community.document_compressors import FlashrankRerank
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.chains import create_retrieval_chain, create_history_aware_retriever
@@ -21,14 +21,9 @@ from langchain_core.runnables.history import RunnableWithMessageHistory
 load_dotenv()
 st.set_page_config(page_title="Aarambh Dashboard", layout="wide", page_icon="🚑")
 
-BM25_PATH = "./bm25_index.pkl"
 EMBEDDING_MODEL = "BAAI/bge-small-en-v1.5"
 RERANK_MODEL = "ms-marco-TinyBERT-L-2-v2"
-INDEX_NAME = "aarambh"
-REPORTS_DIR = "incident_reports"
-
-# Ensure reports directory exists for visual safety
-os.makedirs(REPORTS_DIR, exist_ok=True)
+REPORTS_PAGE_SIZE = 50
 
 # --- 1. SESSION STATE SETUP ---
 if "chat_history" not in st.session_state:
@@ -37,6 +32,9 @@ if "chat_history" not in st.session_state:
 if "rag_chain" not in st.session_state:
     st.session_state.rag_chain = None
 
+if "report_cursors" not in st.session_state:
+    st.session_state.report_cursors = [None]  # keyset cursor of every page visited so far
+
 # --- 2. RAG LOGIC (CACHED) ---
 @st.cache_resource
 def initialize_rag_system():
@@ -44,25 +42,17 @@ def initialize_rag_system():
     try:
         # A. Embeddings & Vector Store
         embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
-        vectorstore = PineconeVectorStore(
-            index_name=INDEX_NAME, 
-            embedding=embeddings
-        )
-        vector_retriever = vectorstore.as_retriever(search_kwargs={"k": 10})
+        vector_retriever = load_vector_retriever(embeddings, k=10)
 
         # B. BM25 (Local Keywords)
-        with open(BM25_PATH, "rb") as f:
-            bm25_retriever = pickle.load(f)
+        bm25_retriever = load_keyword_retriever(k=10)
 
         # C. Hybrid & Reranking
-        ensemble_retriever = EnsembleRetriever(
-            retrievers=[bm25_retriever, vector_retriever],
-            weights=[0.5, 0.5]
-        )
+        hybrid_retriever = build_hybrid_retriever(bm25_retriever, vector_retriever)
         compressor = FlashrankRerank(model=RERANK_MODEL)
         compression_retriever = ContextualCompressionRetriever(
             base_compressor=compressor,
-            base_retriever=ensemble_retriever
+            base_retriever=hybrid_retriever
         )
 
         # D. LLM & Chains
@@ -107,8 +97,8 @@ def initialize_rag_system():
         
         return rag_chain
 
-    except FileNotFoundError:
-        st.error(f"❌ Could not find {BM25_PATH}. Please run ingest.py first.")
+    except FileNotFoundError as e:
+        st.error(f"❌ Could not find {e}. Please run ingest.py first.")
         return None
     except Exception as e:
         st.error(f"❌ RAG Init Error: {e}")
@@ -123,28 +113,53 @@ if st.session_state.rag_chain is None:
 # --- SIDEBAR: Incident Reports Viewer ---
 with st.sidebar:
     st.header("📋 Incident Reports")
-    st.caption(f"Reading from: `{REPORTS_DIR}/`")
-    
+    st.caption(f"Reading from: `{INCIDENT_DB}`")
+    store = get_incident_store()
+
     # Refresh Button
-    if st.button("🔄 Refresh Files"):
+    if st.button("🔄 Refresh Reports"):
+        st.session_state.report_cursors = [None]
         st.rerun()
 
-    # List Files
-    files = [f for f in os.listdir(REPORTS_DIR) if f.endswith('.json')]
-    
-    if not files:
+    # Filters (indexed; a page is one LIMIT query however many reports exist)
+    type_filter = st.selectbox("Emergency type", ["All"] + store.emergency_types())
+    location_filter = st.text_input("Location starts with")
+    filters = (type_filter, location_filter)
+    if st.session_state.get("report_filters") != filters:
+        st.session_state.report_filters = filters
+        st.session_state.report_cursors = [None]
+
+    reports, next_cursor = store.query(
+        limit=REPORTS_PAGE_SIZE,
+        cursor=st.session_state.report_cursors[-1],
+        emergency_type=None if type_filter == "All" else type_filter,
+        location=location_filter or None,
+    )
+
+    if not reports:
         st.info("No reports found yet.")
     else:
-        selected_file = st.selectbox("Select a Report", files)
-        
-        if selected_file:
-            file_path = os.path.join(REPORTS_DIR, selected_file)
-            with open(file_path, "r") as f:
-                data = json.load(f)
-            
+        labels = {
+            f"{datetime.fromtimestamp(r['created_at']):%Y-%m-%d %H:%M} · {r['emergency_type'] or 'unknown'} · {r['location'] or '?'} · {r['session_id'][:8]}": r["session_id"]
+            for r in reports
+        }
+        selected = st.selectbox("Select a Report", list(labels))
+
+        # Paging
+        col_newer, col_older = st.columns(2)
+        if col_newer.button("◀ Newer", disabled=len(st.session_state.report_cursors) == 1):
+            st.session_state.report_cursors.pop()
+            st.rerun()
+        if col_older.button("Older ▶", disabled=next_cursor is None):
+            st.session_state.report_cursors.append(next_cursor)
+            st.rerun()
+
+        if selected:
+            report = store.get(labels[selected])
+
             st.markdown("---")
             st.subheader("📄 Report Details")
-            st.json(data) # Beautified JSON display
+            st.json(report["data"] if report else {}) # Beautified JSON display
 
 # --- MAIN PAGE: RAG Chatbot ---
 st.title("🚑 Aarambh Emergency Assistant")
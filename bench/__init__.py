@@ -0,0 +1,2 @@
+# bench/__init__.py
+# Offline benchmarks and load tests. Run modules with `python -m bench.<name>` from the repo root.
@@ -0,0 +1,5 @@
+# bench/__main__.py
+"""`python -m bench`: the pipeline replay benchmark (see bench/replay.py)."""
+from bench.replay import main
+
+main()
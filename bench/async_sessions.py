@@ -0,0 +1,62 @@
+# bench/async_sessions.py
+"""
+Load test: N concurrent text sessions against a stubbed Gemini.
+
+    python -m bench.async_sessions --sessions 50 --latency 0.2
+
+'blocking' reproduces the old chat_with_agent (sync pipeline called inside
+`async def`), 'async' awaits arun_emergency_pipeline.
+"""
+import time
+import asyncio
+import argparse
+
+import pipline
+from agents import EmergencyAgents, AsyncEmergencyAgents
+from bench.stubs import StubGeminiClient
+
+UTTERANCES = ["there is an accident, a man fainted", "bandra west, mumbai"]
+
+
+def new_state():
+    return {"collected_data": {}, "transcript": "", "next_question": "", "is_complete": False,
+            "conversation_history": [], "pipeline_mode": "classic"}
+
+
+async def blocking_session():
+    state = new_state()
+    for text in UTTERANCES:
+        state = pipline.run_emergency_pipeline(text, state)
+
+
+async def async_session():
+    state = new_state()
+    for text in UTTERANCES:
+        state = await pipline.arun_emergency_pipeline(text, state)
+
+
+async def run(kind: str, sessions: int) -> float:
+    session_fn = blocking_session if kind == "blocking" else async_session
+    start = time.perf_counter()
+    await asyncio.gather(*(session_fn() for _ in range(sessions)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub Gemini latency (s)")
+    args = parser.parse_args()
+
+    client = StubGeminiClient(latency_s=args.latency)
+    pipline._agents_instance = EmergencyAgents(client=client, cache=None)
+    pipline._async_agents_instance = AsyncEmergencyAgents(client=client, cache=None)
+
+    print(f"{args.sessions} sessions x {len(UTTERANCES)} turns, stub latency {args.latency * 1000:.0f} ms")
+    for kind in ("blocking", "async"):
+        elapsed = asyncio.run(run(kind, args.sessions))
+        print(f"  {kind:<9} {elapsed:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
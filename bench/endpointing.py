@@ -0,0 +1,142 @@
+# bench/endpointing.py
+"""
+Replays Deepgram transcript event streams through the old fixed 1.2 s buffer
+timer and through endpointing.AdaptiveEndpointer, and reports the median turn
+gap (last final -> turn handed to the pipeline) and the false-split rate
+(caller turns cut into more than one pipeline turn).
+
+    python -m bench.endpointing --synthetic 200
+    python -m bench.endpointing --events deepgram_events.jsonl
+
+Event files are JSONL, one Deepgram message per line plus "call" and "t"
+(seconds), as written by call_section when DEEPGRAM_EVENT_LOG is set. A
+ground-truth "turn" number on finals enables the false-split rate.
+"""
+import json
+import random
+import argparse
+import statistics
+from collections import defaultdict
+
+from endpointing import AdaptiveEndpointer, MAX_GRACE_SECONDS
+
+FIXED_DELAY_SECONDS = 1.2
+
+
+def simulate(events: list, adaptive: bool) -> list:
+    """Returns [(commit_time, turn_ids, last_final_time)] for one call."""
+    endpointer = AdaptiveEndpointer()
+    buffer, commits = [], []
+    deadline, last_final = None, None
+
+    def flush(at):
+        nonlocal buffer, deadline
+        if buffer:
+            commits.append((at, set(buffer), last_final))
+            endpointer.on_flush(at)
+        buffer, deadline = [], None
+
+    for ev in events:
+        t = ev["t"]
+        if deadline is not None and t >= deadline:
+            flush(deadline)
+
+        if ev.get("type") == "UtteranceEnd":
+            if adaptive and buffer and deadline is not None:
+                deadline = t + endpointer.on_utterance_end(t)
+            continue
+
+        transcript = ev.get("transcript", "")
+        if not transcript:
+            continue
+        if not ev.get("is_final"):
+            if adaptive:
+                endpointer.on_speech(t)
+                if deadline is not None:
+                    deadline = t + MAX_GRACE_SECONDS
+            continue
+
+        buffer.append(ev.get("turn"))
+        last_final = t
+        if adaptive:
+            deadline = t + endpointer.on_final(t, ev.get("speech_final", False))
+        else:
+            deadline = t + FIXED_DELAY_SECONDS
+
+    if deadline is not None:
+        flush(deadline)
+    return commits
+
+
+def evaluate(calls: dict, adaptive: bool) -> dict:
+    gaps, split_turns, total_turns = [], 0, 0
+    for events in calls.values():
+        commits = simulate(sorted(events, key=lambda e: e["t"]), adaptive)
+        gaps.extend(at - last_final for at, _, last_final in commits)
+        pieces = defaultdict(int)
+        for _, turns, _ in commits:
+            for turn in turns:
+                pieces[turn] += 1
+        known = {k: v for k, v in pieces.items() if k is not None}
+        total_turns += len(known)
+        split_turns += sum(1 for v in known.values() if v > 1)
+    return {
+        "turns_committed": len(gaps),
+        "median_turn_gap_ms": round(statistics.median(gaps) * 1000) if gaps else None,
+        "false_split_rate": round(split_turns / total_turns, 3) if total_turns else None,
+    }
+
+
+def synthetic_calls(n_calls: int, seed: int = 1) -> dict:
+    """Callers with their own pause habits, emulating Deepgram endpointing=300 + utterance_end_ms=1000."""
+    rng = random.Random(seed)
+    calls = {}
+    for c in range(n_calls):
+        habit = rng.uniform(0.2, 0.8)  # this caller's typical mid-sentence pause
+        t, events = 0.0, []
+        for turn in range(rng.randint(4, 8)):
+            fragments = rng.randint(1, 3)
+            for frag in range(fragments):
+                speak = rng.uniform(0.6, 2.5)
+                for k in range(1, int(speak / 0.25)):
+                    events.append({"t": t + k * 0.25, "transcript": "...", "is_final": False})
+                t += speak
+                last_frag = frag == fragments - 1
+                # end of turn: the operator answers; mid-turn: this caller's pause habit
+                pause = rng.uniform(2.0, 4.0) if last_frag else max(0.05, rng.gauss(habit, 0.1))
+                events.append({"t": t + 0.05, "transcript": "words", "is_final": True,
+                               "speech_final": pause >= 0.3, "turn": turn})
+                if pause >= 1.0:
+                    events.append({"t": t + 1.0, "type": "UtteranceEnd"})
+                t += pause
+        calls[f"synthetic-{c}"] = events
+    return calls
+
+
+def load_events(path: str) -> dict:
+    calls = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                ev = json.loads(line)
+                if "channel" in ev:  # raw Deepgram Results message
+                    alts = ev["channel"].get("alternatives") or [{}]
+                    ev["transcript"] = alts[0].get("transcript", "").strip()
+                calls[ev.get("call", "call")].append(ev)
+    return calls
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", help="JSONL event log to replay")
+    parser.add_argument("--synthetic", type=int, default=200, help="number of synthetic calls")
+    args = parser.parse_args()
+
+    calls = load_events(args.events) if args.events else synthetic_calls(args.synthetic)
+    print(f"{len(calls)} calls")
+    print(f"  fixed {FIXED_DELAY_SECONDS}s timer : {evaluate(calls, adaptive=False)}")
+    print(f"  adaptive endpointing: {evaluate(calls, adaptive=True)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# bench/hybrid.py
+"""
+Latency of hybrid retrieval: LangChain's EnsembleRetriever (branches back
+to back) versus hybrid_retriever.HybridRetriever running them concurrently.
+
+    python -m bench.hybrid --vector-ms 120 --slow-vector-ms 5000 --timeout 1.0
+
+The keyword branch is the real mmap BM25 index over the chunk store. The
+vector branch is a stand-in with a fixed network latency. It returns some of
+the keyword top hits in another order plus other chunks, as copies with
+random ids (like Pinecone hits from a pre-manifest upload), so cross-branch
+deduplication is exercised; the fused ranking must equal EnsembleRetriever's.
+The last scenario makes the vector store slower than the branch timeout,
+which should return keyword-only results at about the timeout.
+"""
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from typing import Any, List
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+
+try:
+    from langchain.retrievers import EnsembleRetriever
+except ImportError:  # langchain >= 1.0 moved it
+    from langchain_classic.retrievers import EnsembleRetriever
+
+from keyword_index import load_keyword_retriever
+from hybrid_retriever import HybridRetriever
+
+QUERIES = [
+    "how to treat a burn", "snake bite first aid", "CPR chest compressions", "unconscious not breathing",
+    "fracture of the leg splint", "heart attack symptoms", "severe bleeding from the arm", "choking child",
+]
+
+
+class SlowVectorRetriever(BaseRetriever):
+    """
+    Stand-in for the Pinecone round trip: sleeps, then returns every other
+    keyword top-10 hit in reverse order, topped up with chunks picked from
+    the query hash. Copies carry random ids, as vectors from an older upload do.
+    """
+    index: Any
+    latency_s: float
+    k: int = 10
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        time.sleep(self.latency_s)
+        shared = self.index.search(query, 10)[::2][::-1]
+        rng = random.Random(query)
+        others = [self.index.chunks.get(rng.randrange(self.index.n_docs)) for _ in range(self.k - len(shared))]
+        return [Document(id=f"{rng.getrandbits(64):016x}", page_content=d.page_content, metadata=d.metadata)
+                for d in shared + others]
+
+
+def measure(label: str, fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            start = time.perf_counter()
+            docs = fn(query)
+            samples.append((time.perf_counter() - start) * 1000)
+    print(f"  {label:<36} p50 {statistics.median(samples):7.1f} ms  max {max(samples):7.1f} ms  ({len(docs)} fused docs)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vector-ms", type=float, default=120)
+    parser.add_argument("--slow-vector-ms", type=float, default=5000)
+    parser.add_argument("--timeout", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    keyword = load_keyword_retriever(k=10)
+    vector = SlowVectorRetriever(index=keyword.index, latency_s=args.vector_ms / 1000)
+    slow_vector = SlowVectorRetriever(index=keyword.index, latency_s=args.slow_vector_ms / 1000)
+    weights = [0.5, 0.5]
+
+    ensemble = EnsembleRetriever(retrievers=[keyword, vector], weights=weights)
+    hybrid = HybridRetriever(retrievers=[keyword, vector], weights=weights, names=["keyword", "vector"],
+                             timeout=args.timeout)
+    degraded = HybridRetriever(retrievers=[keyword, slow_vector], weights=weights, names=["keyword", "vector"],
+                               timeout=args.timeout)
+
+    # Same fused ranking as EnsembleRetriever, with chunks found by both branches merged
+    merged = 0
+    for query in QUERIES:
+        expected = [d.page_content for d in ensemble.invoke(query)]
+        assert [d.page_content for d in hybrid.invoke(query)] == expected
+        merged += len(keyword.invoke(query)) + len(vector.invoke(query)) - len(expected)
+
+    print(f"keyword: mmap BM25 ({keyword.index.n_docs} chunks); vector stand-in {args.vector_ms:.0f} ms; "
+          f"branch timeout {args.timeout:.1f} s")
+    print(f"  fused ranking identical to EnsembleRetriever on {len(QUERIES)} queries "
+          f"({merged} hits found by both branches merged)")
+    measure("EnsembleRetriever (sequential)", ensemble.invoke, args.repeat)
+    measure("HybridRetriever.invoke", hybrid.invoke, args.repeat)
+    measure("HybridRetriever.ainvoke", lambda q: asyncio.run(hybrid.ainvoke(q)), args.repeat)
+    measure(f"vector at {args.slow_vector_ms:.0f} ms (degrades)", degraded.invoke, 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# bench/ingest_throughput.py
+"""
+Ingestion throughput (pages/s, chunks/s) over a synthetic PDF corpus.
+
+    python -m bench.ingest_throughput --pdfs 60 --pages 50 --workers 1,2,4 --embed-batch 64,512
+    python -m bench.ingest_throughput --embedder model   # real bge-small instead of the hash embedder
+
+Writes a few thousand pages of first-aid-like text into PDFs with PyMuPDF,
+then runs a full ingest.main() (local vector backend, temp paths) for each
+worker count / embedding batch size, reporting the pipeline's own rates
+and the end-to-end time including the index writes. The default hash embedder is cheap, so
+it isolates the parse and chunk stages; --embedder model measures the real
+end-to-end rate.
+"""
+import io
+import os
+import sys
+import time
+import shutil
+import random
+import argparse
+import tempfile
+import contextlib
+
+import numpy as np
+
+WORDS = (
+    "patient airway breathing circulation bleeding pressure bandage wound burn cool water minutes "
+    "fracture splint immobilise limb shock raise legs warm blanket conscious unconscious recovery "
+    "position pulse check chest compressions rescue breaths ambulance call emergency poisoning snake "
+    "bite venom calm still hospital seizure protect head choking back blows abdominal thrusts child "
+    "infant adult heat stroke dehydration fluids allergic reaction swelling injector asthma inhaler"
+).split()
+
+
+class HashEmbeddings:
+    """384-d bag-of-words hashing; stands in for bge-small when only parsing/chunking is measured."""
+    def embed_documents(self, texts):
+        out = np.zeros((len(texts), 384), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.split():
+                out[row, hash(word) % 384] += 1.0
+        return out
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def write_corpus(directory: str, pdfs: int, pages: int, seed: int = 0) -> int:
+    import pymupdf
+    rng = random.Random(seed)
+    for i in range(pdfs):
+        doc = pymupdf.open()
+        for _ in range(pages):
+            page = doc.new_page()
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(250, 450)))
+            page.insert_textbox(pymupdf.Rect(40, 40, 555, 800), text, fontsize=9)
+        doc.save(os.path.join(directory, f"protocol_{i:03d}.pdf"))
+        doc.close()
+    return pdfs * pages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pdfs", type=int, default=60)
+    parser.add_argument("--pages", type=int, default=50, help="pages per PDF")
+    parser.add_argument("--workers", type=lambda s: [int(x) for x in s.split(",")],
+                        default=sorted({1, os.cpu_count() or 1}))
+    parser.add_argument("--embed-batch", type=lambda s: [int(x) for x in s.split(",")], default=[512])
+    parser.add_argument("--embedder", choices=["hash", "model"], default="hash")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="aarambh-ingest-")
+    data_dir = os.path.join(workdir, "Data")
+    os.makedirs(data_dir)
+    # ingest/keyword_index/vector_index read their paths at import time
+    os.environ.update({
+        "VECTOR_BACKEND": "local",
+        "KEYWORD_INDEX_PATH": os.path.join(workdir, "keyword_index.bin"),
+        "CHUNK_STORE_PATH": os.path.join(workdir, "chunk_store.bin"),
+        "LOCAL_VECTOR_PATH": os.path.join(workdir, "vector_index.bin"),
+    })
+    import ingest
+
+    start = time.perf_counter()
+    total_pages = write_corpus(data_dir, args.pdfs, args.pages)
+    print(f"corpus: {args.pdfs} PDFs / {total_pages} pages in {time.perf_counter() - start:.1f} s ({workdir})")
+
+    ingest.DATA_PATH = data_dir
+    ingest.MANIFEST_PATH = os.path.join(workdir, "ingest_manifest.json")
+    if args.embedder == "hash":
+        ingest.make_embeddings = HashEmbeddings
+
+    try:
+        for workers in args.workers:
+            for batch in args.embed_batch:
+                for path in (ingest.MANIFEST_PATH, ingest.KEYWORD_INDEX_PATH, ingest.LOCAL_VECTOR_PATH):
+                    if os.path.exists(path):
+                        os.remove(path)
+                ingest.INGEST_WORKERS = workers
+                ingest.EMBED_BATCH_SIZE = batch
+                output = io.StringIO()
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(sys.stdout if args.verbose else output):
+                    result = ingest.main()
+                # result["seconds"] covers parse/chunk/embed; this adds the index writes
+                wall = time.perf_counter() - start
+                print(f"  workers={workers} embed_batch={batch}: {result}, "
+                      f"end to end {wall:.2f} s ({total_pages / wall:.1f} pages/s)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# bench/keyword_index.py
+"""
+Scoring parity and load/query cost of keyword_index.KeywordIndex.
+
+    python -m bench.keyword_index --queries 500
+
+Rebuilds rank_bm25.BM25Okapi (what the pickled BM25Retriever wrapped) from
+the chunk store, then checks that every query gets bit-identical scores and
+the same top-k. Queries are a few fixed first-aid questions plus random
+word samples from the corpus. Also times opening the mmap index against
+unpickling bm25_index.pkl when that file and langchain_community exist.
+"""
+import os
+import time
+import pickle
+import random
+import argparse
+
+import numpy as np
+from rank_bm25 import BM25Okapi
+
+from keyword_index import KeywordIndex, tokenize, KEYWORD_INDEX_PATH, CHUNK_STORE_PATH, LEGACY_BM25_PATH
+
+FIXED_QUERIES = [
+    "how to treat a burn", "snake bite first aid", "CPR chest compressions", "unconscious not breathing",
+    "fracture of the leg splint", "heart attack", "bleeding bleeding nose", "the the the", "xyzzy",
+]
+
+
+def timed_ms(fn, repeat: int = 1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=500, help="random queries on top of the fixed ones")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    index, open_ms = timed_ms(lambda: KeywordIndex(KEYWORD_INDEX_PATH, CHUNK_STORE_PATH))
+    print(f"mmap open: {open_ms:.2f} ms ({index.n_docs} chunks, {index.n_terms} terms, "
+          f"{(os.path.getsize(KEYWORD_INDEX_PATH) + os.path.getsize(CHUNK_STORE_PATH)) / 1e6:.1f} MB on disk)")
+
+    if os.path.exists(LEGACY_BM25_PATH):
+        try:
+            _, pickle_ms = timed_ms(lambda: pickle.load(open(LEGACY_BM25_PATH, "rb")))
+            print(f"pickle load of {LEGACY_BM25_PATH}: {pickle_ms:.1f} ms")
+        except ImportError as e:
+            print(f"(skipping pickle load: {e})")
+
+    corpus = [index.chunks.get(i).page_content for i in range(index.n_docs)]
+    reference = BM25Okapi([tokenize(text) for text in corpus])
+
+    rng = random.Random(args.seed)
+    words = [w for text in corpus for w in tokenize(text)]
+    queries = FIXED_QUERIES + [" ".join(rng.sample(words, rng.randint(1, 8))) for _ in range(args.queries)]
+
+    score_mismatches = rank_mismatches = 0
+    for query in queries:
+        expected = reference.get_scores(tokenize(query))
+        if not np.array_equal(expected, index.get_scores(tokenize(query))):
+            score_mismatches += 1
+        top = np.argsort(expected)[::-1][:args.k]
+        if [corpus[i] for i in top] != [d.page_content for d in index.search(query, args.k)]:
+            rank_mismatches += 1
+    print(f"parity over {len(queries)} queries: {score_mismatches} score mismatches, {rank_mismatches} top-{args.k} mismatches")
+
+    _, mmap_ms = timed_ms(lambda: [index.search(q, args.k) for q in queries])
+    _, okapi_ms = timed_ms(lambda: [reference.get_top_n(tokenize(q), corpus, n=args.k) for q in queries])
+    print(f"query: mmap {mmap_ms / len(queries):.3f} ms, rank_bm25 {okapi_ms / len(queries):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+# bench/load_calls.py
+"""
+Concurrent-call load test of audio_stream_endpoint, entirely on localhost.
+
+    python -m bench.load_calls --levels 1,10,25,50 --gemini-ms 300 --tts-first-chunk-ms 150
+
+Stand-ins (bench/stub_servers.py):
+- fake Twilio callers stream 20 ms mulaw `media` events at real-time pace
+  and speak scripted utterances once the AI has finished talking,
+- a fake Deepgram STT WebSocket turns those frames into interim/final
+  results and UtteranceEnd events,
+- stub Deepgram TTS and Gemini HTTP endpoints with configurable latency
+  (reached through DEEPGRAM_TTS_URL / DEEPGRAM_STT_URL / GEMINI_BASE_URL).
+
+For each ramp level it reports turn latency (caller stops talking -> first
+AI audio frame) percentiles, TTS time-to-first-audio, event-loop lag and
+resident memory per call. Everything shares one event loop, so lag and
+memory include the harness itself.
+"""
+import os
+import io
+import sys
+import json
+import time
+import base64
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import contextlib
+
+from bench.stub_servers import (
+    StubTTSServer, StubGeminiServer, StubDeepgramSTTServer,
+    SILENCE_FRAME, WORD_SECONDS, speech_frame,
+)
+
+SCRIPTS = [
+    ["there is an accident a man fainted", "bandra west, mumbai", "he is around forty", "my name is ravi"],
+    ["my grandfather is not breathing", "jk college road, guntur", "he is old", "my name is asha"],
+    ["there is a fire in our building", "sector eighteen, noida", "nobody is trapped", "this is vikram"],
+]
+FRAME_SECONDS = 0.02
+QUIET_BEFORE_SPEAKING = 0.3   # caller waits for this much AI silence before answering
+TURN_TIMEOUT_SECONDS = 20.0
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))]) if ordered else None
+
+
+def rss_kb() -> int:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class FakeTwilioCall:
+    """One caller: a real-time media stream plus a scripted conversation."""
+    def __init__(self, url: str, script_index: int, call_index: int):
+        self.url = url
+        self.script_index = script_index
+        self.script = SCRIPTS[script_index]
+        self.stream_sid = f"MZload{call_index:05d}"
+        self.speaking = None          # utterance index being spoken
+        self.playback_until = 0.0     # when Twilio would finish playing what the AI sent
+        self.last_ai_frame = 0.0
+        self.waiting_since = None     # caller stopped talking and no AI audio has arrived yet
+        self.turn_latencies_ms = []
+        self.timeouts = 0
+
+    async def _send_media(self, ws):
+        next_at = time.monotonic()
+        while True:
+            frame = speech_frame(self.script_index, self.speaking) if self.speaking is not None else SILENCE_FRAME
+            await ws.send(json.dumps({
+                "event": "media",
+                "streamSid": self.stream_sid,
+                "media": {"payload": base64.b64encode(frame).decode("ascii")},
+            }))
+            next_at += FRAME_SECONDS
+            await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+
+    async def _receive(self, ws):
+        async for message in ws:
+            data = json.loads(message)
+            now = time.monotonic()
+            if data.get("event") == "media":
+                if self.waiting_since is not None:
+                    self.turn_latencies_ms.append((now - self.waiting_since) * 1000)
+                    self.waiting_since = None
+                self.last_ai_frame = now
+                self.playback_until = max(self.playback_until, now) + FRAME_SECONDS
+            elif data.get("event") == "clear":
+                self.playback_until = now
+
+    async def _wait_for_reply(self, spoke_until: float):
+        """Waits for the first AI frame after the caller stopped, then for the AI to finish."""
+        self.waiting_since = spoke_until
+        deadline = spoke_until + TURN_TIMEOUT_SECONDS
+        while self.waiting_since is not None:
+            if time.monotonic() > deadline:
+                self.waiting_since = None
+                self.timeouts += 1
+                return
+            await asyncio.sleep(0.01)
+        while True:
+            now = time.monotonic()
+            if now >= self.playback_until and now - self.last_ai_frame >= QUIET_BEFORE_SPEAKING:
+                return
+            await asyncio.sleep(0.02)
+
+    async def run(self):
+        from websockets.asyncio.client import connect
+        async with connect(self.url) as ws:
+            await ws.send(json.dumps({"event": "connected", "protocol": "Call"}))
+            await ws.send(json.dumps({"event": "start", "streamSid": self.stream_sid,
+                                      "start": {"streamSid": self.stream_sid}}))
+            sender = asyncio.create_task(self._send_media(ws))
+            receiver = asyncio.create_task(self._receive(ws))
+            try:
+                await asyncio.sleep(1.0)  # the TwiML <Say> greeting
+                for index, text in enumerate(self.script):
+                    self.speaking = index
+                    await asyncio.sleep(len(text.split()) * WORD_SECONDS)
+                    self.speaking = None
+                    await self._wait_for_reply(time.monotonic())
+                await ws.send(json.dumps({"event": "stop", "streamSid": self.stream_sid}))
+            finally:
+                sender.cancel()
+                receiver.cancel()
+
+
+async def monitor_loop(samples: dict, interval: float = 0.01):
+    """Event-loop lag (how late a 10 ms sleep wakes up) and peak RSS."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples["lag_ms"].append((time.perf_counter() - start - interval) * 1000)
+        samples["peak_rss_kb"] = max(samples["peak_rss_kb"], rss_kb())
+
+
+async def run_level(url: str, calls: int, stagger: float, tts_samples) -> dict:
+    samples = {"lag_ms": [], "peak_rss_kb": 0}
+    baseline_kb = rss_kb()
+    tts_samples.clear()
+    monitor = asyncio.create_task(monitor_loop(samples))
+
+    async def staggered(i):
+        await asyncio.sleep(random.uniform(0, stagger))
+        call = FakeTwilioCall(url, i % len(SCRIPTS), i)
+        await call.run()
+        return call
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(staggered(i) for i in range(calls)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    monitor.cancel()
+
+    finished = [r for r in results if isinstance(r, FakeTwilioCall)]
+    latencies = [ms for call in finished for ms in call.turn_latencies_ms]
+    tts = list(tts_samples)
+    return {
+        "calls": calls,
+        "failed_calls": len(results) - len(finished),
+        "turns": len(latencies),
+        "timeouts": sum(call.timeouts for call in finished),
+        "turn_latency_p50_ms": percentile(latencies, 0.50),
+        "turn_latency_p90_ms": percentile(latencies, 0.90),
+        "turn_latency_p99_ms": percentile(latencies, 0.99),
+        "tts_first_audio_p50_ms": percentile(tts, 0.50),
+        "tts_first_audio_p99_ms": percentile(tts, 0.99),
+        "loop_lag_p99_ms": percentile(samples["lag_ms"], 0.99),
+        "loop_lag_max_ms": percentile(samples["lag_ms"], 1.0),
+        "rss_per_call_kb": round(max(0, samples["peak_rss_kb"] - baseline_kb) / calls),
+        "elapsed_s": round(elapsed, 1),
+    }
+
+
+async def run(args):
+    workdir = tempfile.mkdtemp(prefix="aarambh-load-")
+    tts = StubTTSServer(first_chunk_ms=args.tts_first_chunk_ms)
+    gemini = StubGeminiServer(latency_ms=args.gemini_ms)
+    stt = StubDeepgramSTTServer(SCRIPTS)
+
+    # Everything the app reads at import time has to be in place before importing it
+    os.environ.update({
+        "DEEPGRAM_API_KEY": "stub",
+        "GEMINI_API": "stub",
+        "DEEPGRAM_TTS_URL": await tts.start(),
+        "GEMINI_BASE_URL": await gemini.start(),
+        "DEEPGRAM_STT_URL": await stt.start(),
+        "CHECKPOINT_BACKEND": "memory",
+        "LLM_CACHE": "1" if args.llm_cache else "0",
+        "INCIDENT_DB": os.path.join(workdir, "incidents.sqlite"),
+        "CALL_JOURNAL_PATH": os.path.join(workdir, "call_journal.jsonl"),
+        "TTS_CACHE_DIR": os.path.join(workdir, "tts_cache"),
+        "PIPELINE_MODE": args.mode,
+    })
+
+    import uvicorn
+    import main
+    import call_section
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    url = f"ws://127.0.0.1:{port}/audio_stream"
+    print(f"stubs: gemini {args.gemini_ms} ms, tts first chunk {args.tts_first_chunk_ms} ms, mode {args.mode}")
+    try:
+        for level in args.levels:
+            app_output = io.StringIO()
+            with contextlib.redirect_stdout(sys.stdout if args.verbose else app_output):
+                result = await run_level(url, level, args.stagger, call_section.TTS_FIRST_AUDIO_MS)
+            print(f"  {result}")
+    finally:
+        server.should_exit = True
+        await serving
+        for stub in (tts, gemini, stt):
+            await stub.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--levels", type=lambda s: [int(x) for x in s.split(",")], default=[1, 10, 25],
+                        help="concurrent calls per ramp step, e.g. 1,10,25,50")
+    parser.add_argument("--gemini-ms", type=float, default=300)
+    parser.add_argument("--tts-first-chunk-ms", type=float, default=150)
+    parser.add_argument("--stagger", type=float, default=2.0, help="spread call starts over this many seconds")
+    parser.add_argument("--mode", default="classic", choices=["classic", "turn"])
+    parser.add_argument("--llm-cache", action="store_true", help="keep the LLM response cache on")
+    parser.add_argument("--verbose", action="store_true", help="show the app's own logging")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# bench/replay.py
+"""
+Replay benchmark for the dispatch pipeline (also `python -m bench`).
+
+    python -m bench                                   # conversation_logs.txt, both modes, compare to baseline
+    python -m bench --logs call_journal.jsonl --mode turn
+    python -m bench --latencies-from call_journal.jsonl   # stub latencies = recorded per-node medians
+    python -m bench --update-baseline
+
+Caller turns are parsed from conversation_logs.txt ("[ts] User: ..." lines)
+or from call_journal.jsonl records, then replayed through
+run_emergency_pipeline against the deterministic stub Gemini client.
+Reports per-node wall time, LLM calls per turn, prompt sizes,
+turns-to-completion and time-to-dispatch, and compares them with
+bench/baseline.json (exit code 1 on a regression).
+"""
+import io
+import os
+import re
+import sys
+import json
+import argparse
+import contextlib
+import statistics
+from datetime import datetime
+
+os.environ.setdefault("CHECKPOINT_BACKEND", "memory")
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_NODE_LATENCIES_MS = {"extractor": 120, "verifier": 80, "question_gen": 60, "turn": 150}
+CALL_GAP_SECONDS = 300          # a longer silence in a text log starts a new call
+DISPATCH_MARKER = "dispatching units"
+LINE_PATTERN = re.compile(r"^\[(?P<ts>[\d\- :]+)\]\s*(?P<role>User|AI):\s*(?P<text>.*)$")
+
+# metric -> (direction, relative tolerance); "up" means higher is worse
+REGRESSION_RULES = {
+    "completion_rate": ("down", 0.0),
+    "turns_to_completion_mean": ("up", 0.0),
+    "llm_calls_per_turn": ("up", 0.0),
+    "prompt_tokens_p50": ("up", 0.10),
+    "prompt_tokens_max": ("up", 0.10),
+    "turn_ms_p50": ("up", 0.20),
+    "time_to_dispatch_ms_p50": ("up", 0.20),
+}
+LATENCY_SLACK_MS = 5  # sleeps jitter; ignore differences below this
+
+
+# --- Log parsing ---
+
+def _calls_from_lines(lines):
+    """[(role, text, timestamp)] -> calls as lists of caller turns (consecutive User lines merged)."""
+    calls, turns, pending, last_ts = [], [], [], None
+
+    def close_turn():
+        if pending:
+            turns.append(" ".join(pending))
+            pending.clear()
+
+    def close_call():
+        close_turn()
+        if turns:
+            calls.append(list(turns))
+            turns.clear()
+
+    for role, text, ts in lines:
+        if last_ts is not None and ts is not None and ts - last_ts > CALL_GAP_SECONDS:
+            close_call()
+        last_ts = ts if ts is not None else last_ts
+        if role == "User":
+            if text:
+                pending.append(text)
+        elif role == "AI":
+            close_turn()
+            if DISPATCH_MARKER in text.lower():
+                close_call()
+    close_call()
+    return calls
+
+
+def parse_text_log(path: str) -> list:
+    lines = []
+    with open(path, encoding="utf-8") as f:
+        for raw in f:
+            match = LINE_PATTERN.match(raw.strip())
+            if match:
+                ts = datetime.strptime(match["ts"], "%Y-%m-%d %H:%M:%S").timestamp()
+                lines.append((match["role"], match["text"].strip(), ts))
+    return _calls_from_lines(lines)
+
+
+def parse_journal(path: str) -> list:
+    sessions = {}
+    with open(path, encoding="utf-8") as f:
+        for raw in f:
+            if raw.strip():
+                record = json.loads(raw)
+                if record.get("role") in ("User", "AI"):
+                    sessions.setdefault(record.get("session_id"), []).append(record)
+    calls = []
+    for records in sessions.values():
+        records.sort(key=lambda r: r.get("t", 0))
+        calls.extend(_calls_from_lines([(r["role"], (r.get("text") or "").strip(), r.get("t")) for r in records]))
+    return calls
+
+
+def load_calls(path: str) -> list:
+    return parse_journal(path) if path.endswith((".jsonl", ".json")) else parse_text_log(path)
+
+
+def recorded_latencies(journal_path: str) -> dict:
+    """Median per-node wall time (ms) from the journal's AI records."""
+    samples = {}
+    with open(journal_path, encoding="utf-8") as f:
+        for raw in f:
+            if raw.strip():
+                for node, ms in (json.loads(raw).get("stage_latency_ms") or {}).items():
+                    samples.setdefault(node, []).append(ms)
+    return {node: statistics.median(values) for node, values in samples.items()}
+
+
+# --- Replay ---
+
+def _pct(samples, pct):
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))], 1) if ordered else None
+
+
+def replay(calls: list, mode: str, node_latencies_ms: dict) -> dict:
+    import pipline
+    from agents import EmergencyAgents
+    from bench.stubs import StubGeminiClient
+
+    client = StubGeminiClient(node_latencies={k: v / 1000 for k, v in node_latencies_ms.items()})
+    pipline._agents_instance = EmergencyAgents(client=client, cache=None)
+
+    node_ms, turn_ms, prompt_tokens = {}, [], []
+    completed_turns, dispatch_ms, turns_total = [], [], 0
+    for turns in calls:
+        state = {"collected_data": {}, "conversation_history": [], "is_complete": False, "pipeline_mode": mode}
+        elapsed = 0.0
+        for index, text in enumerate(turns):
+            with contextlib.redirect_stdout(io.StringIO()):  # per-turn pipeline logging
+                state = pipline.run_emergency_pipeline(text, state)
+            turns_total += 1
+            elapsed += state["last_turn_latency_ms"]
+            turn_ms.append(state["last_turn_latency_ms"])
+            prompt_tokens.append(state.get("prompt_tokens") or 0)
+            for node, ms in (state.get("last_stage_latency_ms") or {}).items():
+                node_ms.setdefault(node, []).append(ms)
+            if state.get("is_complete"):
+                completed_turns.append(index + 1)
+                dispatch_ms.append(elapsed)
+                break
+
+    return {
+        "calls": len(calls),
+        "turns": turns_total,
+        "completion_rate": round(len(completed_turns) / len(calls), 3) if calls else None,
+        "turns_to_completion_mean": round(statistics.mean(completed_turns), 2) if completed_turns else None,
+        "llm_calls_per_turn": round(client.models.calls / turns_total, 2) if turns_total else None,
+        "llm_calls_by_node": dict(sorted(client.models.calls_by_node.items())),
+        "prompt_tokens_p50": _pct(prompt_tokens, 0.50),
+        "prompt_tokens_max": max(prompt_tokens) if prompt_tokens else None,
+        "turn_ms_p50": _pct(turn_ms, 0.50),
+        "turn_ms_p90": _pct(turn_ms, 0.90),
+        "time_to_dispatch_ms_p50": _pct(dispatch_ms, 0.50),
+        "node_ms_p50": {node: _pct(values, 0.50) for node, values in sorted(node_ms.items())},
+    }
+
+
+def compare(results: dict, baseline: dict) -> list:
+    """Human-readable regressions of `results` against `baseline` (both keyed by mode)."""
+    problems = []
+    for mode, metrics in results.items():
+        base = baseline.get(mode)
+        if not base:
+            continue
+        for metric, (direction, tolerance) in REGRESSION_RULES.items():
+            new, old = metrics.get(metric), base.get(metric)
+            if new is None or old is None:
+                continue
+            slack = LATENCY_SLACK_MS if metric.endswith("_ms_p50") else 0
+            if direction == "up" and new > old * (1 + tolerance) + slack:
+                problems.append(f"{mode}.{metric}: {old} -> {new}")
+            if direction == "down" and new < old * (1 - tolerance):
+                problems.append(f"{mode}.{metric}: {old} -> {new}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench")
+    parser.add_argument("--logs", default="conversation_logs.txt", help="conversation_logs.txt or call_journal.jsonl")
+    parser.add_argument("--mode", choices=["classic", "turn", "both"], default="both")
+    parser.add_argument("--latencies-from", help="use per-node medians recorded in a call journal")
+    for node, ms in DEFAULT_NODE_LATENCIES_MS.items():
+        parser.add_argument(f"--{node.replace('_', '-')}-ms", type=float, default=ms, dest=f"{node}_ms")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="also write the results JSON here")
+    args = parser.parse_args(argv)
+
+    latencies = {node: getattr(args, f"{node}_ms") for node in DEFAULT_NODE_LATENCIES_MS}
+    if args.latencies_from:
+        latencies.update(recorded_latencies(args.latencies_from))
+
+    calls = load_calls(args.logs)
+    if not calls:
+        sys.exit(f"No caller turns found in {args.logs}")
+    print(f"{len(calls)} calls / {sum(map(len, calls))} caller turns from {args.logs}; stub latencies (ms) {latencies}")
+
+    modes = ["classic", "turn"] if args.mode == "both" else [args.mode]
+    results = {}
+    for mode in modes:
+        results[mode] = replay(calls, mode, latencies)
+        print(f"  {mode}: {json.dumps(results[mode])}")
+    results_doc = {"logs": os.path.basename(args.logs), "node_latencies_ms": latencies, **results}
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results_doc, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results_doc, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one.")
+        return
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("logs") != results_doc["logs"] or baseline.get("node_latencies_ms") != latencies:
+        print("Baseline was recorded with different logs or latencies; not comparing.")
+        return
+    problems = compare(results, baseline)
+    if problems:
+        print("REGRESSIONS:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+    print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
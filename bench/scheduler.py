@@ -0,0 +1,105 @@
+# bench/scheduler.py
+"""
+Surge benchmark for scheduler.GeminiScheduler against a local stub model server.
+
+    python -m bench.scheduler --calls 10 50 200
+
+Every simulated call fires an extractor and a verifier request at the same
+moment. The stub serves a limited number of requests at once and answers
+429 above a per-second quota, like the real API under load.
+"""
+import time
+import asyncio
+import argparse
+
+from scheduler import GeminiScheduler, _percentile
+
+
+class RateLimitError(Exception):
+    code = 429
+
+
+class StubModelServer:
+    """In-process stand-in for the Gemini endpoint: fixed latency, capacity and quota."""
+    def __init__(self, latency_s: float, capacity: int, quota_per_s: int):
+        self.latency_s = latency_s
+        self.capacity = asyncio.Semaphore(capacity)
+        self.quota_per_s = quota_per_s
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.rejected = 0
+
+    async def generate(self, prompt: str) -> str:
+        now = time.monotonic()
+        if now - self.window_start >= 1.0:
+            self.window_start, self.window_count = now, 0
+        self.window_count += 1
+        if self.window_count > self.quota_per_s:
+            self.rejected += 1
+            raise RateLimitError("429 RESOURCE_EXHAUSTED")
+        async with self.capacity:
+            await asyncio.sleep(self.latency_s)
+        return f"ok:{prompt}"
+
+
+async def naive_call(server: StubModelServer, prompt: str, max_retries: int = 2):
+    """What the agents did before: call directly and lean on client retries."""
+    for attempt in range(max_retries + 1):
+        try:
+            return await server.generate(prompt)
+        except RateLimitError:
+            if attempt == max_retries:
+                raise
+            await asyncio.sleep(1.0)
+
+
+async def run(kind: str, calls: int, args) -> dict:
+    server = StubModelServer(args.latency, args.capacity, args.quota)
+    scheduler = GeminiScheduler(max_concurrency=args.capacity, coalesce_window_ms=args.window_ms)
+    latencies, failures = [], 0
+
+    async def one_request(session: str, prompt: str):
+        nonlocal failures
+        start = time.perf_counter()
+        try:
+            if kind == "scheduled":
+                await scheduler.submit(f"{session}:{prompt}", lambda: server.generate(prompt), session_id=session)
+            else:
+                await naive_call(server, prompt)
+            latencies.append(time.perf_counter() - start)
+        except RateLimitError:
+            failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        one_request(f"call-{i}", node) for i in range(calls) for node in ("extractor", "verifier")
+    ))
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p99_latency_ms": round(_percentile(latencies, 0.99) * 1000),
+        "failed": failures,
+        "server_429s": server.rejected,
+    }
+    if kind == "scheduled":
+        result["p99_queue_wait_ms"] = scheduler.stats()["queue_wait_p99_ms"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--latency", type=float, default=0.3, help="stub model latency (s)")
+    parser.add_argument("--capacity", type=int, default=16, help="concurrent requests the stub serves")
+    parser.add_argument("--quota", type=int, default=60, help="requests per second before 429")
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    for calls in args.calls:
+        for kind in ("naive", "scheduled"):
+            print(f"{calls:>4} calls  {kind:<9} {asyncio.run(run(kind, calls, args))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+# bench/stub_servers.py
+import json
+import asyncio
+from types import SimpleNamespace
+
+# --- Minimal localhost stand-ins for the external services ---
+
+
+async def _read_request(reader: asyncio.StreamReader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    method, path, _ = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            k, v = line.split(":", 1)
+            headers[k.strip().lower()] = v.strip()
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return method, path, headers, body
+
+
+class StubTTSServer:
+    """
+    Fake Deepgram /v1/speak: waits `first_chunk_ms`, then streams mulaw
+    silence in `chunk_bytes` pieces every `chunk_interval_ms` (chunked encoding).
+    Audio length scales with the request body (~500 bytes = 60 ms of audio per character).
+    """
+    def __init__(self, first_chunk_ms=150, chunk_bytes=1600, chunk_interval_ms=40, bytes_per_char=500):
+        self.first_chunk_ms = first_chunk_ms
+        self.chunk_bytes = chunk_bytes
+        self.chunk_interval_ms = chunk_interval_ms
+        self.bytes_per_char = bytes_per_char
+        self.requests = 0
+        self.server = None
+
+    async def _handle(self, reader, writer):
+        try:
+            _, _, _, body = await _read_request(reader)
+            self.requests += 1
+            total = max(1, len(body)) * self.bytes_per_char
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: audio/basic\r\nTransfer-Encoding: chunked\r\n\r\n")
+            await asyncio.sleep(self.first_chunk_ms / 1000)
+            sent = 0
+            while sent < total:
+                size = min(self.chunk_bytes, total - sent)
+                writer.write(f"{size:x}\r\n".encode() + b"\xff" * size + b"\r\n")
+                await writer.drain()
+                sent += size
+                await asyncio.sleep(self.chunk_interval_ms / 1000)
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        except ConnectionError:
+            pass  # the client closed the stream (barge-in)
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=0) -> str:
+        self.server = await asyncio.start_server(self._handle, host, port)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}/v1/speak?model=stub&encoding=mulaw&sample_rate=8000"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+class StubGeminiServer:
+    """
+    Fake generateContent endpoint for genai.Client(http_options=HttpOptions(base_url=...)).
+    Answers with bench.stubs' deterministic responses after `latency_ms`.
+    """
+    def __init__(self, latency_ms=300):
+        self.latency_ms = latency_ms
+        self.requests = 0
+        self.server = None
+
+    @staticmethod
+    def _schema_for(generation_config: dict):
+        from schema import EmergencyInfo, VerificationResult, TurnResult
+        properties = (generation_config.get("responseSchema") or {}).get("properties", {})
+        if "updated_info" in properties:
+            return TurnResult
+        if "is_sufficient" in properties:
+            return VerificationResult
+        if "caller_name" in properties:
+            return EmergencyInfo
+        return None
+
+    async def _handle(self, reader, writer):
+        from bench.stubs import stub_response
+        try:
+            while True:  # keep-alive: the SDK reuses its connection
+                try:
+                    _, _, headers, body = await _read_request(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                self.requests += 1
+                request = json.loads(body)
+                prompt = request["contents"][0]["parts"][0]["text"]
+                config = SimpleNamespace(response_schema=self._schema_for(request.get("generationConfig", {})))
+                await asyncio.sleep(self.latency_ms / 1000)
+                text = stub_response(prompt, config).text
+                payload = json.dumps({
+                    "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}]
+                }).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+                )
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=0) -> str:
+        self.server = await asyncio.start_server(self._handle, host, port)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+# --- Fake Deepgram live STT ---
+# The fake Twilio caller marks its "speech" frames so the fake STT knows what was said:
+# byte 0 = SPEECH_MARK, byte 1 = script index, byte 2 = utterance index, the rest is loud audio.
+SAMPLE_RATE = 8000
+SPEECH_MARK = 0x00
+SILENCE_FRAME = b"\xff" * 160
+WORD_SECONDS = 0.3  # how long the caller takes per word
+
+
+def speech_frame(script: int, utterance: int) -> bytes:
+    return bytes([SPEECH_MARK, script, utterance]) + b"\x20" * 157
+
+
+def _results(transcript: str, is_final: bool, speech_final: bool = False) -> str:
+    return json.dumps({
+        "type": "Results",
+        "channel": {"alternatives": [{"transcript": transcript, "confidence": 0.99}]},
+        "is_final": is_final,
+        "speech_final": speech_final,
+    })
+
+
+class StubDeepgramSTTServer:
+    """
+    Fake wss://api.deepgram.com/v1/listen. Runs on the audio clock (bytes
+    received / 8000), like the real service with endpointing=300 and
+    utterance_end_ms=1000: interims every 250 ms of speech, a speech_final
+    result 300 ms after the caller stops, UtteranceEnd after 1 s.
+    """
+    def __init__(self, scripts: list, interim_seconds=0.25, endpointing_seconds=0.3, utterance_end_seconds=1.0):
+        self.scripts = scripts
+        self.interim_seconds = interim_seconds
+        self.endpointing_seconds = endpointing_seconds
+        self.utterance_end_seconds = utterance_end_seconds
+        self.connections = 0
+        self.server = None
+
+    async def _handle(self, ws):
+        self.connections += 1
+        clock = 0.0
+        words, started, last_interim, ended = None, None, None, None
+        final_sent = utterance_end_sent = False
+
+        async for message in ws:
+            if isinstance(message, str):
+                break  # `[]` / CloseStream
+            for offset in range(0, len(message), 160):
+                frame = message[offset:offset + 160]
+                clock += len(frame) / SAMPLE_RATE
+                if frame[:1] == bytes([SPEECH_MARK]) and len(frame) >= 3:
+                    text = self.scripts[frame[1]][frame[2]]
+                    if words is None or " ".join(words) != text or ended is not None:
+                        words, started, last_interim = text.split(), clock, clock
+                        ended, final_sent, utterance_end_sent = None, False, False
+                    if clock - last_interim >= self.interim_seconds:
+                        last_interim = clock
+                        spoken = max(1, int((clock - started) / WORD_SECONDS))
+                        await ws.send(_results(" ".join(words[:spoken]), is_final=False))
+                elif words is not None:
+                    if ended is None:
+                        ended = clock
+                    silence = clock - ended
+                    if not final_sent and silence >= self.endpointing_seconds:
+                        final_sent = True
+                        await ws.send(_results(" ".join(words), is_final=True, speech_final=True))
+                    if not utterance_end_sent and silence >= self.utterance_end_seconds:
+                        utterance_end_sent = True
+                        await ws.send(json.dumps({"type": "UtteranceEnd", "last_word_end": ended}))
+                        words = None
+
+    async def start(self, host="127.0.0.1", port=0) -> str:
+        from websockets.asyncio.server import serve
+        self.server = await serve(self._handle, host, port)
+        port = list(self.server.sockets)[0].getsockname()[1]
+        return f"ws://{host}:{port}/v1/listen?encoding=mulaw&sample_rate=8000&channels=1"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
@@ -0,0 +1,132 @@
+# bench/stubs.py
+import re
+import ast
+import time
+import asyncio
+from types import SimpleNamespace
+from schema import EmergencyInfo, VerificationResult, TurnResult
+from verifier import audit
+from question_templates import pick_template
+
+# --- Deterministic stand-in for the genai client ---
+# Implements just enough of `client.models` / `client.aio.models` for EmergencyAgents.
+
+AGE_WORDS = {"boy": "child", "girl": "child", "baby": "child", "child": "child",
+             "old": "senior", "grandfather": "senior", "grandmother": "senior",
+             "man": "adult", "woman": "adult", "forty": "adult", "twenty": "adult", "fifteen": "child"}
+TYPE_WORDS = {"accident": "traffic_accident", "fire": "fire", "smoke": "fire", "robbery": "police",
+              "fight": "police", "gas": "hazmat", "ambulance": "medical", "fainted": "medical",
+              "heart": "medical", "unconscious": "medical", "breathing": "medical"}
+DANGER_WORDS = {"not conscious": "Unconscious", "unconscious": "Unconscious", "fainted": "Unconscious",
+                "not breathing": "Not Breathing", "bleeding": "Severe Bleeding", "heart": "Cardiac Event",
+                "trapped": "People Trapped"}
+# "jk college road guntur" -> "Jk College Road, Guntur" (the real model adds the comma too)
+SPOKEN_ADDRESS = re.compile(r"^(?:it's |near |at )?(.*\S)\s+(guntur|mumbai|new delhi|delhi|new york|noida|thane|pune)(?:\s+(?:india|usa))?$")
+
+
+def _new_input(prompt: str) -> str:
+    match = re.search(r'# New Input\s*"(.*)"', prompt, re.S)
+    return match.group(1).lower() if match else ""
+
+
+def _literal_dict(text: str) -> dict:
+    """The prompts embed dict reprs; parse them as literals, never evaluate them."""
+    try:
+        value = ast.literal_eval(text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return {}
+    return value if isinstance(value, dict) else {}
+
+
+def _current_data(prompt: str) -> dict:
+    match = re.search(r"# Current Data\s*(\{.*?\})\s*#", prompt, re.S)
+    return _literal_dict(match.group(1)) if match else {}
+
+
+def stub_extract(prompt: str) -> EmergencyInfo:
+    """Keyword extraction good enough to walk a scripted call to completion."""
+    data = EmergencyInfo().model_dump()
+    data.update(_current_data(prompt))
+    text = _new_input(prompt)
+
+    for word, etype in TYPE_WORDS.items():
+        if word in text and data.get("emergency_type") in (None, "unknown"):
+            data["emergency_type"] = etype
+    for word, age in AGE_WORDS.items():
+        if re.search(rf"\b{word}\b", text) and data.get("age_group") in (None, "unknown"):
+            data["age_group"] = age
+    for phrase, danger in DANGER_WORDS.items():
+        if phrase in text and data.get("immediate_dangers") in (None, "N/A"):
+            data["immediate_dangers"] = danger
+    name = re.search(r"(?:my name is|this is|it's|i am)\s+([a-z]+)$", text)
+    if name and data.get("caller_name") in (None, "N/A"):
+        data["caller_name"] = name.group(1).title()
+    if "," in text:
+        data["location"] = text.title()
+    elif SPOKEN_ADDRESS.match(text):
+        street, city = SPOKEN_ADDRESS.match(text).groups()
+        data["location"] = f"{street}, {city}".title()
+    if not data.get("description"):
+        data["description"] = text
+    return EmergencyInfo.model_validate(data)
+
+
+def stub_response(prompt: str, config) -> SimpleNamespace:
+    schema = getattr(config, "response_schema", None)
+    if schema is EmergencyInfo:
+        parsed = stub_extract(prompt)
+    elif schema is VerificationResult:
+        match = re.search(r"Collected Data:\s*(\{.*\})", prompt, re.S)
+        data = _literal_dict(match.group(1)) if match else {}
+        parsed, _ = audit(data)
+    elif schema is TurnResult:
+        info = stub_extract(prompt)
+        verdict, _ = audit(info.model_dump())
+        question = ""
+        if verdict.missing_fields:
+            question = pick_template(verdict.missing_fields[0], info.emergency_type, []) or "Please repeat that."
+        parsed = TurnResult(updated_info=info, is_sufficient=verdict.is_sufficient,
+                            missing_fields=verdict.missing_fields, next_question=question)
+    else:
+        field = re.search(r"Missing Field:\s*(\w+)", prompt)
+        return SimpleNamespace(parsed=None, text=f"Could you tell me the {field.group(1) if field else 'details'}?")
+    return SimpleNamespace(parsed=parsed, text=parsed.model_dump_json())
+
+
+# Which pipeline node a request comes from, by its response schema
+NODE_BY_SCHEMA = {EmergencyInfo: "extractor", VerificationResult: "verifier", TurnResult: "turn", None: "question_gen"}
+
+
+class _StubModels:
+    def __init__(self, latency_s: float, node_latencies: dict = None):
+        self.latency_s = latency_s
+        self.node_latencies = node_latencies or {}
+        self.calls = 0
+        self.calls_by_node = {}
+
+    def _latency(self, config) -> float:
+        node = NODE_BY_SCHEMA.get(getattr(config, "response_schema", None), "question_gen")
+        self.calls_by_node[node] = self.calls_by_node.get(node, 0) + 1
+        return self.node_latencies.get(node, self.latency_s)
+
+    def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        time.sleep(self._latency(config))
+        return stub_response(contents, config)
+
+
+class _StubAsyncModels(_StubModels):
+    async def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        await asyncio.sleep(self._latency(config))
+        return stub_response(contents, config)
+
+
+class StubGeminiClient:
+    """
+    Drop-in for genai.Client with a fixed per-call latency, optionally per
+    node: node_latencies={"extractor": 0.4, "verifier": 0.3, ...} (seconds).
+    """
+    def __init__(self, latency_s: float = 0.2, node_latencies: dict = None):
+        self.models = _StubModels(latency_s, node_latencies)
+        self.aio = SimpleNamespace(models=_StubAsyncModels(latency_s, node_latencies))
@@ -0,0 +1,64 @@
+# bench/tts_stream.py
+"""
+Time-to-first-audio: buffered tts_request vs streaming tts_frames, against a
+local stub TTS server.
+
+    python -m bench.tts_stream --first-chunk-ms 150 --chunk-interval-ms 40
+"""
+import os
+import time
+import asyncio
+import argparse
+import statistics
+
+os.environ.setdefault("DEEPGRAM_API_KEY", "stub")
+os.environ.setdefault("CHECKPOINT_BACKEND", "memory")
+
+from bench.stub_servers import StubTTSServer
+
+PHRASES = [
+    "State the exact address, including city.",
+    "Approximate age of the patient?",
+    "Is the patient conscious and breathing? Dispatching units now.",
+]
+
+
+async def run(args):
+    server = StubTTSServer(args.first_chunk_ms, args.chunk_bytes, args.chunk_interval_ms)
+    os.environ["DEEPGRAM_TTS_URL"] = await server.start()
+
+    import call_section  # picks up DEEPGRAM_TTS_URL
+
+    buffered, streamed, frames = [], [], 0
+    for _ in range(args.rounds):
+        for text in PHRASES:
+            start = time.perf_counter()
+            await call_section.tts_request(text)
+            buffered.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            first = None
+            async for frame in call_section.tts_frames(text):
+                frames += 1
+                if first is None:
+                    first = (time.perf_counter() - start) * 1000
+                assert len(frame) <= call_section.TTS_FRAME_BYTES
+            streamed.append(first)
+
+    await server.stop()
+    print(f"stub: first chunk {args.first_chunk_ms} ms, {args.chunk_bytes} B every {args.chunk_interval_ms} ms")
+    print(f"  buffered  time-to-first-audio median {statistics.median(buffered):7.0f} ms")
+    print(f"  streaming time-to-first-audio median {statistics.median(streamed):7.0f} ms ({frames} frames)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--first-chunk-ms", type=float, default=150)
+    parser.add_argument("--chunk-bytes", type=int, default=1600)
+    parser.add_argument("--chunk-interval-ms", type=float, default=40)
+    parser.add_argument("--rounds", type=int, default=3)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# bench/vad.py
+"""
+Detection latency and per-frame cost of vad.EnergyVAD on synthetic calls.
+
+    python -m bench.vad --calls 200 --noise-dbfs -50
+
+Each synthetic call is line noise followed by a voiced "caller" signal
+(harmonics with a syllable-rate envelope) starting at a random time. Audio
+is mulaw-encoded and fed in 20 ms Twilio payloads; we report how long after
+the true speech onset the VAD fires, how often it fires on noise alone, and
+the CPU cost per frame.
+"""
+import time
+import argparse
+
+import numpy as np
+
+from vad import EnergyVAD, FRAME_BYTES, FRAME_MS
+
+SAMPLE_RATE = 8000
+
+
+def linear_to_mulaw(samples: np.ndarray) -> bytes:
+    """G.711 mu-law encoder (the inverse of vad.MULAW_TO_LINEAR)."""
+    x = np.clip(samples, -32635, 32635).astype(np.int32)
+    sign = np.where(x < 0, 0x80, 0)
+    magnitude = np.abs(x) + 0x84
+    exponent = np.floor(np.log2(magnitude)).astype(np.int32) - 7
+    exponent = np.clip(exponent, 0, 7)
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8).tobytes()
+
+
+def synthetic_call(rng: np.random.Generator, noise_dbfs: float, speech_dbfs: float):
+    """Returns (mulaw bytes, onset seconds or None)."""
+    duration = rng.uniform(2.0, 4.0)
+    t = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+    noise = rng.normal(0, 32768 * 10 ** (noise_dbfs / 20), len(t))
+
+    if rng.random() < 0.2:  # noise-only call: any detection is a false trigger
+        return linear_to_mulaw(noise), None
+
+    onset = rng.uniform(0.5, duration - 1.0)
+    pitch = rng.uniform(90, 250)
+    voiced = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6))
+    envelope = 0.6 + 0.4 * np.sin(2 * np.pi * rng.uniform(3, 6) * t)  # syllable rate
+    voiced *= envelope * (t >= onset)
+    voiced *= 32768 * 10 ** (speech_dbfs / 20) / (np.sqrt(np.mean(voiced[t >= onset] ** 2)) + 1e-9)
+    return linear_to_mulaw(noise + voiced), onset
+
+
+def run(args) -> dict:
+    rng = np.random.default_rng(args.seed)
+    latencies, false_triggers, missed, noise_calls = [], 0, 0, 0
+    frames, cpu = 0, 0.0
+
+    for _ in range(args.calls):
+        audio, onset = synthetic_call(rng, args.noise_dbfs, args.speech_dbfs)
+        vad = EnergyVAD()
+        detected_at = None
+        for offset in range(0, len(audio), FRAME_BYTES):
+            start = time.perf_counter()
+            fired = vad.process(audio[offset:offset + FRAME_BYTES])
+            cpu += time.perf_counter() - start
+            frames += 1
+            if fired and detected_at is None:
+                detected_at = (offset // FRAME_BYTES + 1) * FRAME_MS / 1000  # end of this frame
+
+        if onset is None:
+            noise_calls += 1
+            false_triggers += detected_at is not None
+        elif detected_at is None:
+            missed += 1
+        elif detected_at < onset:
+            false_triggers += 1
+        else:
+            latencies.append((detected_at - onset) * 1000)
+
+    latencies.sort()
+    pct = lambda p: round(latencies[min(len(latencies) - 1, int(len(latencies) * p))]) if latencies else None
+    return {
+        "speech_calls": args.calls - noise_calls,
+        "detection_p50_ms": pct(0.50),
+        "detection_p90_ms": pct(0.90),
+        "missed": missed,
+        "false_triggers": false_triggers,
+        "cpu_us_per_frame": round(cpu / frames * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--noise-dbfs", type=float, default=-50.0)
+    parser.add_argument("--speech-dbfs", type=float, default=-20.0)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+    print(run(args))
+
+
+if __name__ == "__main__":
+    main()
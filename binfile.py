@@ -0,0 +1,49 @@
+# binfile.py
+"""
+Helpers shared by the memory-mapped index files (keyword_index.py,
+vector_index.py): a fixed header followed by 8-byte aligned numpy sections.
+"""
+import os
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# name -> (byte offset, numpy dtype, item count)
+Sections = Dict[str, Tuple[int, str, int]]
+
+
+def align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def atomic_write(path: str, parts: Iterable[bytes]):
+    """Readers may have the old file mapped; replacing the inode leaves their view intact."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        for part in parts:
+            f.write(part)
+    os.replace(tmp, path)
+
+
+def sections(layout: List[Tuple[str, str, int]], header_size: int) -> Tuple[Sections, int]:
+    """[(name, dtype, count)] -> ({name: (offset, dtype, count)}, file size) with 8-byte aligned sections."""
+    offset, result = header_size, {}
+    for name, dtype, count in layout:
+        offset = align(offset)
+        result[name] = (offset, dtype, count)
+        offset += np.dtype(dtype).itemsize * count
+    return result, offset
+
+
+def write_sections(path: str, header: bytes, layout: Sections, arrays: Dict[str, np.ndarray]):
+    """Header, then each array at its section offset (zero padding in between), written atomically."""
+    def parts():
+        yield header
+        position = len(header)
+        for name, (offset, _, _) in layout.items():
+            yield b"\0" * (offset - position)
+            data = arrays[name].tobytes()
+            yield data
+            position = offset + len(data)
+
+    atomic_write(path, parts())
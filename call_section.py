@@ -3,20 +3,32 @@ import json
 import base64
 import asyncio
 import re
-from datetime import datetime
+import time
+import hashlib
+from collections import deque, OrderedDict
+from contextlib import aclosing
+from urllib.parse import urlparse, parse_qsl
 from typing import List, Optional
 
 from fastapi import APIRouter, WebSocket, Request, WebSocketDisconnect
 from fastapi.responses import HTMLResponse
 from twilio.twiml.voice_response import VoiceResponse, Connect
 from websockets.asyncio.client import connect as ws_connect
-import httpx
 from dotenv import load_dotenv
 
 # --- FLAT IMPORTS (Files in Root) ---
-from pipline import run_emergency_pipeline
+from pipline import arun_emergency_pipeline
 from agents import EmergencyAgents
 from schema import EmergencyInfo, VerificationResult
+from speculation import SpeculativeExtractor, get_speculation_stats
+from triage import turn_scheduler, score_turn
+from question_templates import all_template_questions
+from http_clients import registry as http_registry
+from endpointing import AdaptiveEndpointer, MAX_GRACE_SECONDS, record_event
+from vad import EnergyVAD
+from journal import journal
+from incident_store import get_incident_store
+from metrics import STAGE_SECONDS, ACTIVE_CALLS
 
 load_dotenv()
 
@@ -25,42 +37,133 @@ router = APIRouter()  # <--- DEFINED HERE, DO NOT IMPORT IT
 
 deepgram_key = os.getenv("DEEPGRAM_API_KEY")
 SERVER_DOMAIN = "09bc58cd631d.ngrok-free.app"  # Update with your NGROK URL
-BUFFER_DELAY_SECONDS = 1.2
-LOG_FILE = "conversation_logs.txt"
-REPORTS_DIR = "incident_reports"
-
-# Ensure reports directory exists
-os.makedirs(REPORTS_DIR, exist_ok=True)
-
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "classic")  # "classic" (3 calls) or "turn" (1 call)
+SPECULATIVE_EXTRACTION = os.getenv("SPECULATIVE_EXTRACTION", "1") == "1"
+LOCAL_VAD_BARGE_IN = os.getenv("LOCAL_VAD_BARGE_IN", "1") == "1"
 if not deepgram_key:
     raise ValueError("Missing DEEPGRAM_API_KEY.")
 
-DEEPGRAM_STT_URL = (
+DEEPGRAM_STT_URL = os.getenv(
+    "DEEPGRAM_STT_URL",
     "wss://api.deepgram.com/v1/listen?"
     "encoding=mulaw&sample_rate=8000&channels=1"
     "&smart_formatting=true&interim_results=true&endpointing=300"
+    "&utterance_end_ms=1000&vad_events=true"
+)
+DEEPGRAM_TTS_URL = os.getenv(
+    "DEEPGRAM_TTS_URL",
+    "https://api.deepgram.com/v1/speak?model=aura-asteria-en&encoding=mulaw&sample_rate=8000"
 )
-DEEPGRAM_TTS_URL = "https://api.deepgram.com/v1/speak?model=aura-asteria-en&encoding=mulaw&sample_rate=8000"
+TTS_FRAME_BYTES = 160  # 20 ms of 8 kHz mulaw = one Twilio media frame
+TTS_FRAME_SECONDS = 0.02
+
+# Time-to-first-audio samples (ms) for the streaming TTS path
+TTS_FIRST_AUDIO_MS = deque(maxlen=1000)
+
+# Pre-rendered audio for recurring operator prompts
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "tts_cache")
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+STOCK_PHRASES = ["Dispatching units now.", "Please provide any other relevant details."]
+TTS_CACHE_VERSION = "2"  # bump to drop every file rendered by an older cache
+
+class PhraseAudioCache:
+    """
+    Raw mulaw audio per (normalized text, voice/encoding params), LRU-capped by size.
+    Files on disk survive restarts; the LRU index and bytes live in memory.
+    Only the fixed operator phrases are cacheable: free-text replies carry
+    caller details and would grow the cache without bound.
+    """
+    def __init__(self, directory: str, max_bytes: int, tts_url: str, phrases: List[str]):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # model / encoding / sample_rate from the TTS URL are part of the key
+        self.voice = "&".join(f"{k}={v}" for k, v in sorted(parse_qsl(urlparse(tts_url).query)))
+        self.phrases = {self.normalize(text) for text in phrases}
+        self._allowed_keys = {self.key(text) for text in self.phrases}
+        self._entries = OrderedDict()  # key -> bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return re.sub(r"\s+", " ", text).strip().lower()
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"v{TTS_CACHE_VERSION}|{self.voice}|{self.normalize(text)}".encode("utf-8")).hexdigest()
+
+    def cacheable(self, text: str) -> bool:
+        return self.normalize(text) in self.phrases
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.ulaw")
+
+    def _load(self):
+        files = [f for f in os.listdir(self.directory) if f.endswith(".ulaw")]
+        files.sort(key=lambda f: os.path.getmtime(os.path.join(self.directory, f)))
+        for name in files:
+            path = os.path.join(self.directory, name)
+            if name[:-len(".ulaw")] not in self._allowed_keys:
+                os.remove(path)  # free-text reply, older cache version, or a phrase no longer in use
+                continue
+            with open(path, "rb") as f:
+                self._store(name[:-len(".ulaw")], f.read(), write=False)
 
-def log_to_file(role: str, text: str):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(f"[{timestamp}] {role}: {text}\n")
+    def get(self, text: str) -> Optional[bytes]:
+        if not self.cacheable(text):
+            return None
+        key = self.key(text)
+        audio = self._entries.get(key)
+        if audio is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return audio
 
-def save_report_to_json(session_id: str, data: dict):
-    """Helper to save the collected data to a JSON file."""
-    filename = f"{REPORTS_DIR}/report_{session_id}.json"
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
-    print(f"✅ Report saved to: {filename}")
+    def put(self, text: str, audio: bytes):
+        if audio and len(audio) <= self.max_bytes and self.cacheable(text):
+            self._store(self.key(text), audio, write=True)
+
+    def _store(self, key: str, audio: bytes, write: bool):
+        if key in self._entries:
+            self.size -= len(self._entries.pop(key))
+        self._entries[key] = audio
+        self.size += len(audio)
+        if write:
+            with open(self._path(key), "wb") as f:
+                f.write(audio)
+        while self.size > self.max_bytes:
+            old_key, old_audio = self._entries.popitem(last=False)
+            self.size -= len(old_audio)
+            try:
+                os.remove(self._path(old_key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "bytes": self.size, "hits": self.hits, "misses": self.misses}
+
+
+phrase_cache = PhraseAudioCache(TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES, DEEPGRAM_TTS_URL,
+                                all_template_questions() + STOCK_PHRASES)
 
 class VoiceCallSession:
     """Manages state for a single phone call."""
     def __init__(self):
         self.stream_sid = None
         self.ai_is_speaking = False
+        self.speech_id = 0  # bumped on every reply and on barge-in; stale TTS streams stop
+        self.playback_until = 0.0   # monotonic time Twilio finishes playing the frames we sent
+        self.vad = EnergyVAD()
         self.transcript_buffer: List[str] = [] 
         self.buffer_timer: Optional[asyncio.Task] = None 
+        self.speculator = SpeculativeExtractor()
+        self.endpointer = AdaptiveEndpointer()  # learns this caller's pause habits
+        self.flush_pending = False              # buffer_timer is still waiting (not yet running the pipeline)
+        self.last_interim = ""
         
         # Initial Pipeline State
         self.pipeline_state = {
@@ -68,7 +171,8 @@ class VoiceCallSession:
             "collected_data": {},
             "next_question": "911, what is your emergency?",
             "is_complete": False,
-            "conversation_history": []
+            "conversation_history": [],
+            "pipeline_mode": PIPELINE_MODE
         }
 
 # --- ENDPOINT 1: Twilio Webhook ---
@@ -105,11 +209,13 @@ async def audio_stream_endpoint(websocket: WebSocket):
         try:
             session.ai_is_speaking = True
             
-            # Run sync pipeline in a thread
-            new_state = await asyncio.to_thread(
-                run_emergency_pipeline, 
-                user_text, 
-                session.pipeline_state
+            # Native async pipeline: awaits Gemini without holding a worker thread.
+            # Under saturation, severe calls (cardiac arrest, unconscious...) go first.
+            priority = score_turn(
+                session.pipeline_state.get("collected_data"), user_text, session.pipeline_state.get("is_complete", False)
+            )
+            new_state = await turn_scheduler.run(
+                priority, lambda: arun_emergency_pipeline(user_text, session.pipeline_state)
             )
             
             session.pipeline_state = new_state
@@ -119,34 +225,69 @@ async def audio_stream_endpoint(websocket: WebSocket):
             if new_state.get("is_complete", False):
                 print(">>> INCIDENT REPORT COMPLETE <<<")
                 
-                # Save to JSON File
-                save_report_to_json(session.stream_sid, new_state.get("collected_data"))
+                # Save to the incident store (off the event loop)
+                report_id = await get_incident_store().asave(session.stream_sid, new_state.get("collected_data"), source="voice")
+                print(f"✅ Report saved: {report_id}")
                 
                 if "dispatch" not in ai_reply.lower():
                     ai_reply += " Dispatching units now."
 
             clean_reply = re.sub(r'[*_#]', '', ai_reply).strip()
-            print(f"[AI Pipeline] {clean_reply}")
-            log_to_file("AI", clean_reply)
-
-            # TTS Request
-            audio_bytes = await tts_request(clean_reply)
-            if audio_bytes:
-                payload_base64 = base64.b64encode(audio_bytes).decode("utf-8")
-                await audio_queue.put(payload_base64)
+            print(f"[AI Pipeline] {clean_reply} ({new_state.get('last_turn_latency_ms')} ms)")
+            journal.record(
+                session.stream_sid, "AI", clean_reply,
+                channel="voice",
+                priority=priority,
+                turn_latency_ms=new_state.get("last_turn_latency_ms"),
+                stage_latency_ms=new_state.get("last_stage_latency_ms"),
+                prompt_tokens=new_state.get("prompt_tokens"),
+                is_complete=new_state.get("is_complete", False)
+            )
+
+            # Streaming TTS: each 20 ms frame is queued as soon as it arrives
+            await speak(clean_reply)
                 
         except Exception as e:
             print(f"Pipeline/TTS Error: {e}")
 
+    async def speak(text: str):
+        session.speech_id += 1
+        speech_id = session.speech_id
+        start = time.perf_counter()
+        first_frame = True
+
+        # aclosing: on barge-in the Deepgram stream is closed now, not whenever the generator is collected
+        async with aclosing(phrase_frames(text)) as frames:
+            async for frame in frames:
+                if session.speech_id != speech_id:
+                    break  # caller barged in; drop the rest of this reply
+                if first_frame:
+                    first_frame = False
+                    ttfa_ms = (time.perf_counter() - start) * 1000
+                    TTS_FIRST_AUDIO_MS.append(ttfa_ms)
+                    STAGE_SECONDS.observe(ttfa_ms / 1000, stage="tts_first_audio")
+                    print(f"[TTS] first audio after {ttfa_ms:.0f} ms")
+                    journal.record(session.stream_sid, "TTS", channel="voice", tts_first_audio_ms=round(ttfa_ms, 1))
+                await audio_queue.put(base64.b64encode(frame).decode("utf-8"))
+
     # --- SUB-TASK: BUFFER TIMER ---
-    async def process_buffer_after_silence():
+    async def process_buffer_after_silence(delay: float):
         try:
-            await asyncio.sleep(BUFFER_DELAY_SECONDS)
+            await asyncio.sleep(delay)
+            session.flush_pending = False
             if session.transcript_buffer:
+                STAGE_SECONDS.observe(delay, stage="endpoint_wait")
+                session.endpointer.on_flush(time.monotonic())
                 full_text = " ".join(session.transcript_buffer)
                 session.transcript_buffer = [] 
                 print(f"[User Final] {full_text}")
-                log_to_file("User", full_text)
+                journal.record(session.stream_sid, "User", full_text, channel="voice", endpoint_delay_ms=round(delay * 1000))
+
+                if SPECULATIVE_EXTRACTION:
+                    session.pipeline_state["speculative_extraction"] = await session.speculator.commit(
+                        full_text, session.pipeline_state
+                    )
+                    print(f"[Speculation] {get_speculation_stats()}")
                 await process_pipeline_and_tts(full_text)     
         except asyncio.CancelledError:
             pass
@@ -159,11 +300,14 @@ async def audio_stream_endpoint(websocket: WebSocket):
             try:
                 audio_data = await audio_queue.get()
                 if session.stream_sid:
+                     send_start = time.perf_counter()
                      await websocket.send_text(json.dumps({
                         "event": "media",
                         "streamSid": session.stream_sid,
                         "media": {"payload": audio_data}
                     }))
+                     STAGE_SECONDS.observe(time.perf_counter() - send_start, stage="twilio_send")
+                     session.playback_until = max(session.playback_until, time.monotonic()) + TTS_FRAME_SECONDS
             except Exception as e:
                 break
 
@@ -177,9 +321,15 @@ async def audio_stream_endpoint(websocket: WebSocket):
 
                 if event == "start":
                     session.stream_sid = data["start"]["streamSid"]
+                    session.pipeline_state["session_id"] = session.stream_sid
                 elif event == "media":
                     audio_bytes = base64.b64decode(data["media"]["payload"])
                     await dg_ws.send(audio_bytes)
+                    # Local VAD: cut the reply as soon as the caller talks over it
+                    onset = session.vad.process(audio_bytes) if LOCAL_VAD_BARGE_IN else False
+                    if onset and time.monotonic() < session.playback_until:
+                        print("Barge-in detected (VAD)")
+                        await stop_playback()
                 elif event == "stop":
                     print("Twilio stopped.")
                     break
@@ -188,6 +338,25 @@ async def audio_stream_endpoint(websocket: WebSocket):
         finally:
             await dg_ws.send(json.dumps([]))
 
+    async def stop_playback():
+        """Clears Twilio's buffer and drops every queued/pending frame of the reply."""
+        if session.stream_sid:
+            await websocket.send_text(json.dumps({
+                "event": "clear",
+                "streamSid": session.stream_sid
+            }))
+        session.speech_id += 1  # stops any TTS stream still producing frames
+        session.playback_until = 0.0
+        while not audio_queue.empty():
+            try: audio_queue.get_nowait()
+            except asyncio.QueueEmpty: break
+
+    def schedule_flush(delay: float):
+        if session.buffer_timer:
+            session.buffer_timer.cancel()
+        session.buffer_timer = asyncio.create_task(process_buffer_after_silence(delay))
+        session.flush_pending = True
+
     # --- SUB-TASK: DEEPGRAM PROCESSOR ---
     async def deepgram_processor():
         async for message in dg_ws:
@@ -195,6 +364,13 @@ async def audio_stream_endpoint(websocket: WebSocket):
                 data = json.loads(message)
             except:
                 continue
+            record_event(session.stream_sid, time.monotonic(), data)
+
+            # Deepgram heard utterance_end_ms of silence: the turn is over, flush now
+            if data.get("type") == "UtteranceEnd":
+                if session.transcript_buffer and session.flush_pending:
+                    schedule_flush(session.endpointer.on_utterance_end(time.monotonic()))
+                continue
 
             channel_data = data.get("channel")
             if not channel_data or not isinstance(channel_data, dict):
@@ -206,43 +382,132 @@ async def audio_stream_endpoint(websocket: WebSocket):
             
             transcript = alternatives[0].get("transcript", "").strip()
             is_final = data.get("is_final", False)
+            speech_final = data.get("speech_final", False)
+
+            # Caller resumed talking inside the grace period: hold the flush
+            if transcript and not is_final:
+                session.endpointer.on_speech(time.monotonic())
+                if session.flush_pending:
+                    schedule_flush(MAX_GRACE_SECONDS)
             
             # Barge-in
             if transcript and session.ai_is_speaking:
                 print(f"Barge-in detected: {transcript}")
-                if session.stream_sid:
-                    await websocket.send_text(json.dumps({
-                        "event": "clear",
-                        "streamSid": session.stream_sid
-                    }))
-                while not audio_queue.empty():
-                    try: audio_queue.get_nowait()
-                    except asyncio.QueueEmpty: break
+                await stop_playback()
                 session.ai_is_speaking = False
                 if session.buffer_timer:
                     session.buffer_timer.cancel()
+                    session.flush_pending = False
                     session.transcript_buffer = []
+                    session.speculator.cancel()
+
+            # Speculation: an interim seen twice in a row is treated as a stable prefix
+            if SPECULATIVE_EXTRACTION and transcript and not is_final:
+                if transcript == session.last_interim:
+                    session.speculator.maybe_start(
+                        " ".join(session.transcript_buffer + [transcript]), session.pipeline_state
+                    )
+                session.last_interim = transcript
 
             # Buffering
             if is_final and transcript:
                 print(f"[Buffer Add] {transcript}")
                 session.transcript_buffer.append(transcript)
-                if session.buffer_timer:
-                    session.buffer_timer.cancel()
-                session.buffer_timer = asyncio.create_task(process_buffer_after_silence())
+                session.last_interim = ""
+                if SPECULATIVE_EXTRACTION:
+                    session.speculator.maybe_start(" ".join(session.transcript_buffer), session.pipeline_state)
+                # speech_final -> short learned grace; plain final -> fallback timer
+                schedule_flush(session.endpointer.on_final(time.monotonic(), speech_final))
+
+    ACTIVE_CALLS.inc()
+    # The sender only waits on the queue; stop it once the call itself is over
+    sender_task = asyncio.create_task(twilio_sender())
+    try:
+        await asyncio.gather(
+            twilio_receiver(),
+            deepgram_processor()
+        )
+    finally:
+        sender_task.cancel()
+        ACTIVE_CALLS.dec()
+
+async def tts_stream(text: str):
+    """Yields mulaw bytes as Deepgram produces them (chunk sizes are arbitrary)."""
+    if not text: return
+    # Shared keep-alive pool: no TCP/TLS handshake per utterance
+    client_http = http_registry.get_async("deepgram")
+    start = time.perf_counter()
+    first = True
+    async with client_http.stream(
+        "POST",
+        DEEPGRAM_TTS_URL, 
+        headers={"Authorization": f"Token {deepgram_key}"},
+        json={"text": text}
+    ) as r:
+        # Never hand an error body on as audio (it would be played, and cached)
+        r.raise_for_status()
+        content_type = r.headers.get("content-type", "")
+        if not content_type.startswith("audio/"):
+            raise ValueError(f"Deepgram TTS returned {content_type or 'no content type'}, not audio")
+        async for chunk in r.aiter_bytes():
+            if first:
+                first = False
+                STAGE_SECONDS.observe(time.perf_counter() - start, stage="tts_first_byte")
+            yield chunk
+    STAGE_SECONDS.observe(time.perf_counter() - start, stage="tts_request")
 
-    await asyncio.gather(
-        twilio_receiver(),
-        deepgram_processor(),
-        twilio_sender()
-    )
+async def tts_frames(text: str):
+    """Re-frames the TTS stream into fixed 20 ms Twilio frames."""
+    pending = b""
+    async with aclosing(tts_stream(text)) as chunks:
+        async for chunk in chunks:
+            pending += chunk
+            offset = 0
+            while len(pending) - offset >= TTS_FRAME_BYTES:
+                yield pending[offset:offset + TTS_FRAME_BYTES]
+                offset += TTS_FRAME_BYTES
+            pending = pending[offset:]
+    if pending:
+        yield pending
+
+def _split_frames(audio: bytes):
+    for offset in range(0, len(audio), TTS_FRAME_BYTES):
+        yield audio[offset:offset + TTS_FRAME_BYTES]
+
+async def phrase_frames(text: str):
+    """Frames from the phrase cache if we have them, else streamed (fixed phrases cached when complete)."""
+    cached = phrase_cache.get(text)
+    if cached is not None:
+        for frame in _split_frames(cached):
+            yield frame
+        return
+
+    cacheable = phrase_cache.cacheable(text)
+    rendered = []
+    async with aclosing(tts_frames(text)) as frames:
+        async for frame in frames:
+            if cacheable:
+                rendered.append(frame)
+            yield frame
+    # Only reached if the caller didn't barge in and Deepgram returned audio
+    if cacheable:
+        phrase_cache.put(text, b"".join(rendered))
+
+async def prewarm_phrase_cache():
+    """Renders the question templates and stock phrases once at startup."""
+    phrases = all_template_questions() + STOCK_PHRASES
+    rendered = 0
+    for text in phrases:
+        if phrase_cache.get(text) is not None:
+            continue
+        try:
+            audio = await tts_request(text)
+            phrase_cache.put(text, audio)
+            rendered += 1
+        except Exception as e:
+            print(f"Phrase cache pre-warm failed for '{text}': {e}")
+    print(f"🔊 Phrase cache ready: {rendered} rendered, {phrase_cache.stats()}")
 
 async def tts_request(text: str) -> bytes:
-    if not text: return b""
-    async with httpx.AsyncClient(timeout=10.0) as client_http:
-        r = await client_http.post(
-            DEEPGRAM_TTS_URL, 
-            headers={"Authorization": f"Token {deepgram_key}"},
-            json={"text": text}
-        )
-        return r.content
\ No newline at end of file
+    """Whole utterance in one buffer (kept for callers that don't stream)."""
+    return b"".join([chunk async for chunk in tts_stream(text)])
@@ -0,0 +1,134 @@
+# checkpoint.py
+import os
+import time
+import sqlite3
+import asyncio
+import threading
+from typing import Callable, Dict
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+# --- CONFIGURATION ---
+CHECKPOINT_BACKEND = os.getenv("CHECKPOINT_BACKEND", "sqlite")   # "sqlite" | "memory" | registered name
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", "checkpoints.sqlite")
+FINISHED_SESSION_TTL_SECONDS = int(os.getenv("FINISHED_SESSION_TTL_SECONDS", "600"))
+IDLE_SESSION_TTL_SECONDS = int(os.getenv("IDLE_SESSION_TTL_SECONDS", str(2 * 3600)))
+EVICTION_INTERVAL_SECONDS = 60
+
+
+class ThreadedSqliteSaver(SqliteSaver):
+    """
+    SqliteSaver only implements the sync API. The async pipeline needs the
+    async one too, so run the (sub-millisecond, local) calls in a thread.
+    """
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def _sqlite_saver() -> BaseCheckpointSaver:
+    conn = sqlite3.connect(CHECKPOINT_DB, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")  # several uvicorn workers share the file
+    return ThreadedSqliteSaver(conn)
+
+
+# Pluggable stores: register_checkpointer("redis", make_redis_saver) + CHECKPOINT_BACKEND=redis
+CHECKPOINTER_FACTORIES: Dict[str, Callable[[], BaseCheckpointSaver]] = {
+    "sqlite": _sqlite_saver,
+    "memory": InMemorySaver,
+}
+
+def register_checkpointer(name: str, factory: Callable[[], BaseCheckpointSaver]):
+    CHECKPOINTER_FACTORIES[name] = factory
+
+
+_checkpointer = None
+def get_checkpointer() -> BaseCheckpointSaver:
+    global _checkpointer
+    if _checkpointer is None:
+        if CHECKPOINT_BACKEND not in CHECKPOINTER_FACTORIES:
+            raise ValueError(f"Unknown CHECKPOINT_BACKEND '{CHECKPOINT_BACKEND}'")
+        _checkpointer = CHECKPOINTER_FACTORIES[CHECKPOINT_BACKEND]()
+    return _checkpointer
+
+
+class SessionActivity:
+    """Last-seen / finished marks per thread_id, shared by all workers via SQLite."""
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_activity ("
+            "thread_id TEXT PRIMARY KEY, last_seen REAL NOT NULL, finished INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.commit()
+
+    def touch(self, thread_id: str, finished: bool = False):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO session_activity (thread_id, last_seen, finished) VALUES (?, ?, ?) "
+                "ON CONFLICT(thread_id) DO UPDATE SET last_seen = excluded.last_seen, "
+                "finished = MAX(finished, excluded.finished)",
+                (thread_id, time.time(), int(finished))
+            )
+            self._conn.commit()
+
+    def expired(self) -> list:
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT thread_id FROM session_activity WHERE (finished = 1 AND last_seen < ?) OR last_seen < ?",
+                (now - FINISHED_SESSION_TTL_SECONDS, now - IDLE_SESSION_TTL_SECONDS)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def forget(self, thread_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM session_activity WHERE thread_id = ?", (thread_id,))
+            self._conn.commit()
+
+
+_activity = None
+def get_session_activity() -> SessionActivity:
+    global _activity
+    if _activity is None:
+        _activity = SessionActivity(CHECKPOINT_DB if CHECKPOINT_BACKEND == "sqlite" else ":memory:")
+    return _activity
+
+
+def evict_expired_sessions() -> int:
+    """Deletes checkpoints of finished/idle sessions. Returns how many were evicted."""
+    activity = get_session_activity()
+    expired = activity.expired()
+    for thread_id in expired:
+        get_checkpointer().delete_thread(thread_id)
+        activity.forget(thread_id)
+    return len(expired)
+
+
+async def eviction_loop(interval: float = EVICTION_INTERVAL_SECONDS):
+    """Background task for the FastAPI lifespan."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            evicted = await asyncio.to_thread(evict_expired_sessions)
+            if evicted:
+                print(f"🧹 Evicted {evicted} expired session(s)")
+        except Exception as e:
+            print(f"Session eviction error: {e}")
@@ -0,0 +1,78 @@
+# endpointing.py
+import os
+import json
+import statistics
+from collections import deque
+from typing import Optional
+
+# --- CONFIGURATION ---
+MIN_GRACE_SECONDS = 0.15      # never flush faster than this after speech_final
+MAX_GRACE_SECONDS = 1.2       # the old fixed BUFFER_DELAY_SECONDS; also the no-speech_final fallback
+DEFAULT_GRACE_SECONDS = 0.45  # until we have heard enough of this caller
+MIN_PAUSE_SAMPLES = 3
+GRACE_MARGIN_SECONDS = 0.1
+DEEPGRAM_EVENT_LOG = os.getenv("DEEPGRAM_EVENT_LOG")  # JSONL replay input for bench/endpointing.py
+
+
+class AdaptiveEndpointer:
+    """
+    Decides when a caller's turn is over, per caller.
+
+    Deepgram's `speech_final` (endpointing=300) and `UtteranceEnd` mark the end
+    of speech; we add a short grace period in case the caller was only pausing.
+    The grace is learned from this caller's own mid-turn pauses: every time
+    they resume talking shortly after a speech_final (or right after we already
+    flushed), that pause is recorded and the grace grows to cover it.
+    """
+    def __init__(self):
+        self.pauses = deque(maxlen=50)
+        self.speech_final_at: Optional[float] = None
+        self.flushed_at: Optional[float] = None
+
+    def grace_seconds(self) -> float:
+        if len(self.pauses) < MIN_PAUSE_SAMPLES:
+            return DEFAULT_GRACE_SECONDS
+        ordered = sorted(self.pauses)
+        p90 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+        return max(MIN_GRACE_SECONDS, min(MAX_GRACE_SECONDS, p90 + GRACE_MARGIN_SECONDS))
+
+    def on_speech(self, now: float):
+        """Caller is talking (interim or final text). Learns from resumed speech."""
+        for marker in (self.speech_final_at, self.flushed_at):
+            if marker is not None and now - marker <= MAX_GRACE_SECONDS:
+                self.pauses.append(now - marker)
+                break
+        self.speech_final_at = None
+        self.flushed_at = None
+
+    def on_final(self, now: float, speech_final: bool) -> float:
+        """Returns how long to wait before flushing the buffered turn."""
+        self.on_speech(now)
+        if speech_final:
+            self.speech_final_at = now
+            return self.grace_seconds()
+        # No end-of-speech signal yet: fall back to the old fixed timer
+        return MAX_GRACE_SECONDS
+
+    def on_utterance_end(self, now: float) -> float:
+        # Deepgram saw utterance_end_ms of silence after the last word
+        return 0.0
+
+    def on_flush(self, now: float):
+        # Keep speech_final_at: if the caller resumes, the real pause is measured from it
+        self.flushed_at = now
+
+    def stats(self) -> dict:
+        return {
+            "grace_ms": round(self.grace_seconds() * 1000),
+            "pause_samples": len(self.pauses),
+            "median_pause_ms": round(statistics.median(self.pauses) * 1000) if self.pauses else None,
+        }
+
+
+def record_event(call_id: str, now: float, data: dict):
+    """Appends one Deepgram message to DEEPGRAM_EVENT_LOG (no-op when unset)."""
+    if not DEEPGRAM_EVENT_LOG:
+        return
+    with open(DEEPGRAM_EVENT_LOG, "a", encoding="utf-8") as f:
+        f.write(json.dumps({**data, "call": call_id, "t": now}) + "\n")
@@ -0,0 +1,143 @@
+# http_clients.py
+import importlib.util
+import httpx
+
+# --- CONFIGURATION ---
+# HTTP/2 only if the optional `h2` package is installed (pip install "httpx[http2]")
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Monotonic per-client counts (the rest of stats() are gauges)
+HTTP_COUNTERS = ("requests", "responses", "errors")
+
+# One pool per outbound integration, so each host gets its own connection limit
+CLIENT_PROFILES = {
+    "deepgram": {
+        "timeout": httpx.Timeout(10.0, connect=3.0),
+        "limits": httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=120),
+    },
+    "overpass": {
+        "timeout": httpx.Timeout(20.0, connect=5.0),
+        "limits": httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60),
+    },
+    "default": {
+        "timeout": httpx.Timeout(15.0, connect=5.0),
+        "limits": httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+    },
+}
+
+
+class CountingTransport(httpx.AsyncBaseTransport):
+    """
+    Counts requests around the real transport. in_flight is decremented in a
+    finally, so connect errors, timeouts and cancellations don't leak it.
+    """
+    def __init__(self, inner: httpx.AsyncBaseTransport, counts: dict):
+        self.inner = inner
+        self.counts = counts
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.counts["requests"] += 1
+        self.counts["in_flight"] += 1
+        try:
+            response = await self.inner.handle_async_request(request)
+        except BaseException:
+            self.counts["errors"] += 1
+            raise
+        finally:
+            self.counts["in_flight"] -= 1
+        self.counts["responses"] += 1
+        return response
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+class CountingSyncTransport(httpx.BaseTransport):
+    """Sync twin of CountingTransport for the GIS helpers."""
+    def __init__(self, inner: httpx.BaseTransport, counts: dict):
+        self.inner = inner
+        self.counts = counts
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.counts["requests"] += 1
+        self.counts["in_flight"] += 1
+        try:
+            response = self.inner.handle_request(request)
+        except BaseException:
+            self.counts["errors"] += 1
+            raise
+        finally:
+            self.counts["in_flight"] -= 1
+        self.counts["responses"] += 1
+        return response
+
+    def close(self):
+        self.inner.close()
+
+
+class ClientRegistry:
+    """
+    Application-scoped, keep-alive httpx clients (async for the voice path,
+    sync for the GIS helpers). Close them from the FastAPI lifespan.
+    """
+    def __init__(self, profiles: dict = CLIENT_PROFILES):
+        self.profiles = profiles
+        self._async = {}
+        self._sync = {}
+        self.counters = {}
+
+    def _count(self, name: str):
+        return self.counters.setdefault(name, {"requests": 0, "responses": 0, "errors": 0, "in_flight": 0})
+
+    def _options(self, name: str) -> dict:
+        return self.profiles.get(name, self.profiles["default"])
+
+    def get_async(self, name: str) -> httpx.AsyncClient:
+        client = self._async.get(name)
+        if client is None or client.is_closed:
+            options = self._options(name)
+            transport = httpx.AsyncHTTPTransport(http2=HTTP2_AVAILABLE, limits=options["limits"])
+            client = httpx.AsyncClient(
+                transport=CountingTransport(transport, self._count(name)),
+                timeout=options["timeout"]
+            )
+            self._async[name] = client
+        return client
+
+    def get_sync(self, name: str) -> httpx.Client:
+        client = self._sync.get(name)
+        if client is None or client.is_closed:
+            options = self._options(name)
+            transport = httpx.HTTPTransport(http2=HTTP2_AVAILABLE, limits=options["limits"])
+            client = httpx.Client(
+                transport=CountingSyncTransport(transport, self._count(f"{name}_sync")),
+                timeout=options["timeout"]
+            )
+            self._sync[name] = client
+        return client
+
+    @staticmethod
+    def _pool_size(client) -> int:
+        # httpcore internals; best effort only
+        transport = getattr(client, "_transport", None)
+        pool = getattr(getattr(transport, "inner", transport), "_pool", None)
+        return len(getattr(pool, "connections", []) or [])
+
+    def stats(self) -> dict:
+        result = {}
+        for name, client in list(self._async.items()):
+            result[name] = {**self._count(name), "open_connections": self._pool_size(client), "http2": HTTP2_AVAILABLE}
+        for name, client in list(self._sync.items()):
+            result[f"{name}_sync"] = {**self._count(f"{name}_sync"), "open_connections": self._pool_size(client), "http2": HTTP2_AVAILABLE}
+        return result
+
+    async def aclose(self):
+        for client in self._async.values():
+            await client.aclose()
+        for client in self._sync.values():
+            client.close()
+        self._async.clear()
+        self._sync.clear()
+
+
+registry = ClientRegistry()
@@ -0,0 +1,120 @@
+# hybrid_retriever.py
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+
+# --- CONFIGURATION ---
+KEYWORD_WEIGHT = float(os.getenv("HYBRID_KEYWORD_WEIGHT", "0.5"))
+VECTOR_WEIGHT = float(os.getenv("HYBRID_VECTOR_WEIGHT", "0.5"))
+BRANCH_TIMEOUT_SECONDS = float(os.getenv("HYBRID_BRANCH_TIMEOUT", "2.0"))
+RRF_C = 60  # EnsembleRetriever's constant: score = weight / (rank + c)
+
+BRANCH_THREADS = 4
+
+# Sync-path threads, one pool per branch: timed-out calls finish in the background, and a
+# hung vector store can only use up its own threads, never the keyword branch's
+_branch_pools: Dict[str, ThreadPoolExecutor] = {}
+
+
+def _pool(name: str) -> ThreadPoolExecutor:
+    pool = _branch_pools.get(name)
+    if pool is None:
+        pool = _branch_pools[name] = ThreadPoolExecutor(max_workers=BRANCH_THREADS, thread_name_prefix=f"hybrid-{name}")
+    return pool
+
+
+def doc_key(doc: Document) -> str:
+    """
+    The chunk text, as EnsembleRetriever dedupes. Ids can't be compared across
+    branches: legacy chunk stores have none, and Pinecone vectors uploaded
+    before the manifest carry random ones.
+    """
+    return doc.page_content
+
+
+def weighted_rrf(result_lists: List[List[Document]], weights: List[float], c: int = RRF_C) -> List[Document]:
+    """Weighted reciprocal-rank fusion, deduplicated by chunk text; best first."""
+    scores, docs = {}, {}
+    for results, weight in zip(result_lists, weights):
+        for rank, doc in enumerate(results, start=1):
+            key = doc_key(doc)
+            scores[key] = scores.get(key, 0.0) + weight / (rank + c)
+            docs.setdefault(key, doc)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Replacement for EnsembleRetriever that runs every branch concurrently
+    (the CPU-bound keyword search on a thread, the vector search alongside
+    it) and fuses whatever arrived within the branch timeout. A slow or
+    failing vector store therefore degrades the turn to keyword-only
+    results instead of stalling it.
+    """
+    retrievers: List[BaseRetriever]
+    weights: List[float]
+    names: List[str] = []
+    timeout: float = BRANCH_TIMEOUT_SECONDS
+    c: int = RRF_C
+    k: Optional[int] = None  # fused candidates passed on to the reranker (None = all)
+
+    def _name(self, i: int) -> str:
+        return self.names[i] if i < len(self.names) else f"retriever_{i + 1}"
+
+    def _fuse(self, result_lists: List[Optional[List[Document]]]) -> List[Document]:
+        answered = [(results, weight) for results, weight in zip(result_lists, self.weights) if results is not None]
+        fused = weighted_rrf([r for r, _ in answered], [w for _, w in answered], self.c)
+        return fused[:self.k] if self.k else fused
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        start = time.monotonic()
+        futures = [
+            _pool(self._name(i)).submit(retriever.invoke, query, config={"callbacks": run_manager.get_child(tag=self._name(i))})
+            for i, retriever in enumerate(self.retrievers)
+        ]
+        result_lists = []
+        for i, future in enumerate(futures):
+            try:
+                result_lists.append(future.result(timeout=max(0.0, start + self.timeout - time.monotonic())))
+            except FutureTimeout:
+                print(f"⏱️ Hybrid search: {self._name(i)} exceeded {self.timeout:.1f}s, fusing without it")
+                result_lists.append(None)
+            except Exception as e:
+                print(f"⚠️ Hybrid search: {self._name(i)} failed ({e}), fusing without it")
+                result_lists.append(None)
+        return self._fuse(result_lists)
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        async def branch(i: int, retriever: BaseRetriever):
+            try:
+                # BaseRetriever.ainvoke runs sync retrievers (the mmap BM25) in a worker thread
+                return await asyncio.wait_for(
+                    retriever.ainvoke(query, config={"callbacks": run_manager.get_child(tag=self._name(i))}),
+                    timeout=self.timeout
+                )
+            except asyncio.TimeoutError:
+                print(f"⏱️ Hybrid search: {self._name(i)} exceeded {self.timeout:.1f}s, fusing without it")
+            except Exception as e:
+                print(f"⚠️ Hybrid search: {self._name(i)} failed ({e}), fusing without it")
+            return None
+
+        result_lists = await asyncio.gather(*(branch(i, r) for i, r in enumerate(self.retrievers)))
+        return self._fuse(list(result_lists))
+
+
+def build_hybrid_retriever(keyword_retriever: BaseRetriever, vector_retriever: BaseRetriever,
+                           k: Optional[int] = None) -> HybridRetriever:
+    """Keyword + vector branches with the configured weights (shared by rag.py and app.py)."""
+    return HybridRetriever(
+        retrievers=[keyword_retriever, vector_retriever],
+        weights=[KEYWORD_WEIGHT, VECTOR_WEIGHT],
+        names=["keyword", "vector"],
+        k=k,
+    )
@@ -0,0 +1,201 @@
+# incident_store.py
+import os
+import glob
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import threading
+from typing import Literal, Optional, Tuple, get_args, get_origin
+
+from schema import EmergencyInfo
+
+# --- CONFIGURATION ---
+INCIDENT_DB = os.getenv("INCIDENT_DB", "incidents.sqlite")
+LEGACY_REPORTS_DIR = "incident_reports"  # one pretty-printed JSON file per report (pre-SQLite)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS incidents (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT NOT NULL UNIQUE,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        source TEXT,
+        emergency_type TEXT,
+        location TEXT,
+        location_key TEXT,
+        data TEXT NOT NULL
+    )""",
+    # Every listing query is "newest first" + keyset cursor, optionally per type/location
+    "CREATE INDEX IF NOT EXISTS idx_incidents_time ON incidents (created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_incidents_type ON incidents (emergency_type, created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_incidents_location ON incidents (location_key, created_at DESC, id DESC)",
+    "CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT)",
+]
+
+SUMMARY_COLUMNS = "id, session_id, created_at, source, emergency_type, location"
+
+
+def _literal_values(annotation) -> list:
+    """["medical", "fire", ...] from Optional[Literal[...]]."""
+    if get_origin(annotation) is Literal:
+        return list(get_args(annotation))
+    return [v for arg in get_args(annotation) for v in _literal_values(arg)]
+
+
+# Filter options come from the schema, not from a scan of the table
+EMERGENCY_TYPES = _literal_values(EmergencyInfo.model_fields["emergency_type"].annotation)
+
+
+def _location_key(location) -> Optional[str]:
+    return str(location).strip().lower() if location else None
+
+
+def encode_cursor(row: dict) -> str:
+    return f"{row['created_at']!r}:{row['id']}"
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    created_at, row_id = cursor.rsplit(":", 1)
+    return float(created_at), int(row_id)
+
+
+class IncidentStore:
+    """
+    Incident reports in one SQLite file (WAL, so the dashboard can read
+    while calls write). Each save is a single upsert, i.e. atomic.
+    Listing is keyset-paged on (created_at, id), so a page costs the same
+    with a hundred reports or a million.
+    """
+    def __init__(self, path: str = INCIDENT_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn:
+            for statement in SCHEMA:
+                self._conn.execute(statement)
+
+    def save(self, session_id: Optional[str], data: dict, source: Optional[str] = None,
+             created_at: Optional[float] = None) -> str:
+        """
+        Inserts or replaces the report of a session (first-save time is kept).
+        A report without a session id (e.g. a call that never sent "start")
+        gets a generated one. Returns the id the report was saved under.
+        """
+        session_id = session_id or f"anon-{uuid.uuid4().hex}"
+        data = data or {}
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO incidents (session_id, created_at, updated_at, source, emergency_type, location, location_key, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET updated_at = excluded.updated_at, source = excluded.source, "
+                "emergency_type = excluded.emergency_type, location = excluded.location, "
+                "location_key = excluded.location_key, data = excluded.data",
+                (
+                    session_id, created_at or now, now, source,
+                    data.get("emergency_type"), data.get("location"), _location_key(data.get("location")),
+                    json.dumps(data, ensure_ascii=False, default=str),
+                )
+            )
+        return session_id
+
+    async def asave(self, session_id: Optional[str], data: dict, source: Optional[str] = None) -> str:
+        """save() off the event loop."""
+        return await asyncio.to_thread(self.save, session_id, data, source)
+
+    def get(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {SUMMARY_COLUMNS}, updated_at, data FROM incidents WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        report = dict(row)
+        report["data"] = json.loads(report["data"])
+        return report
+
+    def query(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+              emergency_type: Optional[str] = None, location: Optional[str] = None) -> Tuple[list, Optional[str]]:
+        """
+        Newest reports first. Returns (summaries, next_cursor); pass next_cursor
+        back for the following page. `location` matches as a case-insensitive prefix.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        clauses, params = [], []
+        if emergency_type:
+            clauses.append("emergency_type = ?")
+            params.append(emergency_type)
+        if location:
+            prefix = _location_key(location)
+            clauses.append("location_key >= ? AND location_key < ?")
+            params += [prefix, prefix + "\uffff"]
+        if cursor:
+            clauses.append("(created_at, id) < (?, ?)")
+            params += list(decode_cursor(cursor))
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {SUMMARY_COLUMNS} FROM incidents {where} ORDER BY created_at DESC, id DESC LIMIT ?",
+                params + [limit + 1]
+            ).fetchall()
+
+        summaries = [dict(r) for r in rows[:limit]]
+        next_cursor = encode_cursor(summaries[-1]) if len(rows) > limit else None
+        return summaries, next_cursor
+
+    async def aquery(self, *args, **kwargs) -> Tuple[list, Optional[str]]:
+        return await asyncio.to_thread(self.query, *args, **kwargs)
+
+    def emergency_types(self) -> list:
+        """Values the type filter can take; constant, so the dashboard can call it on every rerun."""
+        return list(EMERGENCY_TYPES)
+
+    def migrate_json_reports(self, directory: str = LEGACY_REPORTS_DIR) -> int:
+        """Imports report_<session>.json files once; the file mtime becomes created_at."""
+        with self._lock:
+            done = self._conn.execute("SELECT value FROM store_meta WHERE key = 'json_migrated'").fetchone()
+        if done:
+            return 0
+
+        imported = 0
+        for path in sorted(glob.glob(os.path.join(directory, "report_*.json"))):
+            session_id = os.path.basename(path)[len("report_"):-len(".json")]
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Skipping {path}: {e}")
+                continue
+            if self.get(session_id) is None:
+                self.save(session_id, data, source="json", created_at=os.path.getmtime(path))
+                imported += 1
+
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES ('json_migrated', ?)", (str(time.time()),))
+        return imported
+
+
+_store = None
+def get_incident_store() -> IncidentStore:
+    global _store
+    if _store is None:
+        _store = IncidentStore(INCIDENT_DB)
+        imported = _store.migrate_json_reports()
+        if imported:
+            print(f"📦 Imported {imported} legacy JSON report(s) into {INCIDENT_DB}")
+    return _store
+
+
+if __name__ == "__main__":
+    # python incident_store.py -> run the one-time JSON import and show the newest reports
+    store = get_incident_store()
+    for report in store.query(limit=10)[0]:
+        print(report)
@@ -1,6 +1,9 @@
 import os
-import pickle
+import json
 import time
+import hashlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # 1. Document Loading (Using your safe loader function)
@@ -13,70 +16,174 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_huggingface import HuggingFaceEmbeddings
 
 # 4. BM25 (Keyword Search)
-from langchain_community.retrievers import BM25Retriever
+from keyword_index import build_keyword_index, patch_keyword_index, KeywordIndex, KEYWORD_INDEX_PATH, CHUNK_STORE_PATH
 
 # 5. Pinecone Vector Store (Official Integration)
-from langchain_pinecone import PineconeVectorStore
 from pinecone import Pinecone, ServerlessSpec
+from vector_index import (build_vector_index, patch_vector_index, LocalVectorIndex,
+                          VECTOR_BACKEND, LOCAL_VECTOR_PATH, VECTOR_DTYPE)
 
 load_dotenv()
 
 # --- CONFIGURATION ---
 DATA_PATH = "./Data/"
-BM25_PATH = "./bm25_index.pkl"
 EMBEDDING_MODEL = "BAAI/bge-small-en-v1.5"
 INDEX_NAME = "aarambh"
+MANIFEST_PATH = "./ingest_manifest.json"  # per-file and per-chunk hashes of what is indexed
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 100
+PINECONE_DELETE_BATCH = 1000
+PINECONE_UPSERT_BATCH = 100  # vectors per upsert request (stays under Pinecone's 2 MB limit)
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))  # PDF parsing processes
+EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH", "512"))  # chunks per embed_documents call
+ENCODE_BATCH_SIZE = 64  # sentence-transformers forward pass; it length-sorts each 512 so padding stays low
 
-def load_all_pdfs(path):
-    """
-    Safe PDF loader that avoids DirectoryLoader issues.
-    It walks through folders and loads PDFs one by one using PyMuPDF.
-    """
-    docs = []
+def list_pdfs(path):
+    """Walks the data folder; the order is stable so chunk order is too."""
     if not os.path.exists(path):
         print(f"Error: Data folder '{path}' not found.")
         return []
-
+    pdfs = []
     for root, _, files in os.walk(path):
         for file in files:
             if file.lower().endswith(".pdf"):
-                pdf_path = os.path.join(root, file)
-                print(f"Loading: {file}")
-                try:
-                    loader = PyMuPDFLoader(pdf_path)
-                    file_docs = loader.load()
-                    docs.extend(file_docs)
-                except Exception as e:
-                    print(f"Failed to load {file}: {e}")
-    return docs
+                pdfs.append(os.path.join(root, file))
+    return sorted(pdfs)
 
-def main():
-    # 1. Check API Keys
-    if "PINECONE_API_KEY" not in os.environ:
-        os.environ["PINECONE_API_KEY"] = input("Enter Pinecone API Key: ")
-    
-    # 2. Load PDFs
-    print("\n--- Step 1: Loading PDFs ---")
-    docs = load_all_pdfs(DATA_PATH)
-    
-    if not docs:
-        print(" No PDFs found. Please check your ./Data/ folder.")
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def assign_chunk_ids(chunks):
+    """
+    Content-addressed ids (source, page and text), so an unchanged chunk keeps
+    its id across runs. Repeats of the same text on one page get a suffix.
+    """
+    seen = {}
+    for chunk in chunks:
+        key = f"{chunk.metadata.get('source')}\0{chunk.metadata.get('page')}\0{chunk.page_content}"
+        base = hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+        repeat = seen.get(base, 0)
+        seen[base] = repeat + 1
+        chunk.id = base if repeat == 0 else f"{base}-{repeat}"
+    return chunks
+
+def parse_pdf(pdf_path):
+    """Safe single-file loader (PyMuPDF). Runs in a worker process."""
+    print(f"Loading: {os.path.basename(pdf_path)}")
+    return PyMuPDFLoader(pdf_path).load()
+
+def _parsed(path, future):
+    try:
+        return path, future.result()
+    except Exception as e:
+        return path, e
+
+def iter_parsed_pdfs(paths, workers=None):
+    """
+    Yields (path, pages or the exception) in input order. A process pool parses
+    ahead of the consumer, at most 2 files per worker, which bounds the memory
+    held by parsed-but-unchunked pages.
+    """
+    workers = workers or INGEST_WORKERS
+    if workers <= 1:
+        for path in paths:
+            try:
+                yield path, parse_pdf(path)
+            except Exception as e:
+                yield path, e
         return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for path in paths:
+            pending.append((path, pool.submit(parse_pdf, path)))
+            if len(pending) >= 2 * workers:
+                yield _parsed(*pending.popleft())
+        while pending:
+            yield _parsed(*pending.popleft())
 
-    # 3. Chunking
-    print(f"\n--- Step 2: Chunking {len(docs)} pages ---")
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=500,
-        chunk_overlap=100
-    )
-    chunks = splitter.split_documents(docs)
-    print(f"Created {len(chunks)} chunks.")
+def make_embeddings():
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL, encode_kwargs={"batch_size": ENCODE_BATCH_SIZE})
+
+class BatchEmbedder:
+    """
+    Embeds chunks in large batches as they stream in. Each batch's upsert runs
+    on a background thread while the next batch is embedded (one in flight).
+    The model is only loaded once there is something to embed.
+    """
+    def __init__(self, upsert, batch_size=None):
+        self.upsert = upsert
+        self.batch_size = batch_size or EMBED_BATCH_SIZE
+        self.embeddings = None
+        self.embedded = 0
+        self.embed_seconds = 0.0
+        self._pending = []
+        self._uploader = ThreadPoolExecutor(max_workers=1)
+        self._in_flight = None
+
+    def add(self, chunks):
+        self._pending.extend(chunks)
+        while len(self._pending) >= self.batch_size:
+            batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            self._embed(batch)
+
+    def _embed(self, batch):
+        if self.embeddings is None:
+            print("\n--- Step 3: Initializing Embeddings ---")
+            self.embeddings = make_embeddings()
+        start = time.perf_counter()
+        vectors = self.embeddings.embed_documents([chunk.page_content for chunk in batch])
+        self.embed_seconds += time.perf_counter() - start
+        self.embedded += len(batch)
+        if self._in_flight is not None:
+            self._in_flight.result()  # surfaces upload errors and keeps a single batch in flight
+        self._in_flight = self._uploader.submit(self.upsert, batch, vectors)
+
+    def close(self):
+        if self._pending:
+            self._embed(self._pending)
+            self._pending = []
+        if self._in_flight is not None:
+            self._in_flight.result()
+        self._uploader.shutdown()
 
-    # 4. Embeddings
-    print("\n--- Step 3: Initializing Embeddings ---")
-    embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
 
-    # 5. Pinecone Setup
+def save_manifest(manifest):
+    tmp = f"{MANIFEST_PATH}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, MANIFEST_PATH)
+
+def indexes_match_manifest(chunk_ids):
+    """
+    True if the local indexes hold exactly the manifest's chunks, in order.
+    The vectors, keyword index and manifest are separate files; a run that
+    dies between writing them leaves them out of step, and only a full
+    rebuild can recover from that.
+    """
+    try:
+        keyword = KeywordIndex(KEYWORD_INDEX_PATH, CHUNK_STORE_PATH)
+        if keyword.n_docs != len(chunk_ids):
+            return False
+        if any(keyword.chunks.get(i).id != chunk_id for i, chunk_id in enumerate(chunk_ids)):
+            return False
+        if VECTOR_BACKEND == "local" and LocalVectorIndex(LOCAL_VECTOR_PATH, chunk_path=None).n != len(chunk_ids):
+            return False
+    except (OSError, ValueError) as e:
+        print(f"Local index unreadable: {e}")
+        return False
+    return True
+
+def connect_pinecone(reset):
     print("\n--- Step 4: Connecting to Pinecone ---")
     pc = Pinecone(api_key=os.environ["PINECONE_API_KEY"])
 
@@ -96,26 +203,151 @@ def main():
         time.sleep(15) # Wait for initialization
     else:
         print(f"Index '{INDEX_NAME}' already exists.")
+        if reset:
+            # Earlier uploads may use random ids (pre-manifest) or old settings; they can't be matched
+            print("Full ingestion: clearing existing vectors first.")
+            pc.Index(INDEX_NAME).delete(delete_all=True)
+    return pc.Index(INDEX_NAME)
+
+def pinecone_upserter(index):
+    """Same record layout as PineconeVectorStore (page text under metadata["text"])."""
+    def upsert(batch, vectors):
+        records = [
+            {"id": chunk.id, "values": [float(x) for x in vector], "metadata": {**chunk.metadata, "text": chunk.page_content}}
+            for chunk, vector in zip(batch, vectors)
+        ]
+        for start in range(0, len(records), PINECONE_UPSERT_BATCH):
+            index.upsert(vectors=records[start:start + PINECONE_UPSERT_BATCH])
+    return upsert
+
+def main():
+    # 1. Check API Keys
+    if VECTOR_BACKEND == "pinecone" and "PINECONE_API_KEY" not in os.environ:
+        os.environ["PINECONE_API_KEY"] = input("Enter Pinecone API Key: ")
+
+    settings = {"chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP,
+                "embedding_model": EMBEDDING_MODEL, "vector_backend": VECTOR_BACKEND}
+    if VECTOR_BACKEND == "local":
+        settings["vector_dtype"] = VECTOR_DTYPE
+    manifest = load_manifest()
+    full_rebuild = (
+        manifest.get("settings") != settings
+        or not os.path.exists(KEYWORD_INDEX_PATH)
+        or (VECTOR_BACKEND == "local" and not os.path.exists(LOCAL_VECTOR_PATH))
+        or not indexes_match_manifest(manifest.get("chunks", []))
+    )
+    if full_rebuild:
+        print("Full ingestion (no manifest, changed settings, or missing or interrupted index).")
+        manifest = {"files": {}, "chunks": []}
 
-    # 6. Upload Vectors
-    print("\n--- Step 5: Uploading Vectors to Cloud ---")
-    PineconeVectorStore.from_documents(
-        documents=chunks,
-        embedding=embeddings,
-        index_name=INDEX_NAME
+    # 2. Find new or changed PDFs (size+mtime, then content hash)
+    print("\n--- Step 1: Checking PDFs ---")
+    pdfs = list_pdfs(DATA_PATH)
+    if not pdfs:
+        print(" No PDFs found. Please check your ./Data/ folder.")
+        return
+    files, to_parse = {}, {}
+    for pdf_path in pdfs:
+        stat = os.stat(pdf_path)
+        entry = manifest["files"].get(pdf_path)
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            files[pdf_path] = entry
+            continue
+        digest = file_sha256(pdf_path)
+        if entry and entry["sha256"] == digest:
+            files[pdf_path] = {**entry, "mtime": stat.st_mtime}
+            continue
+        to_parse[pdf_path] = {"sha256": digest, "size": stat.st_size, "mtime": stat.st_mtime}
+    removed_files = [path for path in manifest["files"] if path not in pdfs]
+    indexed = manifest["chunks"]
+    if not to_parse and not removed_files:
+        save_manifest({"settings": settings, "files": files, "chunks": indexed})
+        print("\nIndex is up to date. Nothing to ingest.")
+        return
+
+    # 3. Streaming pipeline: parse (process pool) -> chunk -> embed in batches -> upsert (overlapped)
+    print(f"\n--- Step 2: Parsing {len(to_parse)} PDFs on {INGEST_WORKERS} workers ---")
+    local_vectors = []
+    if VECTOR_BACKEND == "local":
+        embedder = BatchEmbedder(lambda batch, vectors: local_vectors.extend(vectors))
+    else:
+        pinecone_index = connect_pinecone(reset=full_rebuild)
+        embedder = BatchEmbedder(pinecone_upserter(pinecone_index))
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP
     )
-    print("Vectors Uploaded.")
+    indexed_ids = set(indexed)
+    to_add, pages_parsed, chunks_made = [], 0, 0
+    start = time.perf_counter()
+    try:
+        for pdf_path, pages in iter_parsed_pdfs(list(to_parse)):
+            if isinstance(pages, Exception):
+                print(f"Failed to load {os.path.basename(pdf_path)}: {pages}")
+                if pdf_path in manifest["files"]:
+                    files[pdf_path] = manifest["files"][pdf_path]  # keep what is indexed rather than deleting it
+                continue
+            chunks = assign_chunk_ids(splitter.split_documents(pages))
+            pages_parsed += len(pages)
+            chunks_made += len(chunks)
+            new_chunks = [chunk for chunk in chunks if chunk.id not in indexed_ids]
+            to_add.extend(new_chunks)
+            embedder.add(new_chunks)
+            files[pdf_path] = {**to_parse[pdf_path], "chunks": [chunk.id for chunk in chunks]}
+    finally:
+        embedder.close()
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    throughput = {
+        "pdfs": len(to_parse),
+        "pages": pages_parsed,
+        "chunks": chunks_made,
+        "embedded": embedder.embedded,
+        "seconds": round(elapsed, 2),
+        "pages_per_s": round(pages_parsed / elapsed, 1),
+        "chunks_per_s": round(chunks_made / elapsed, 1),
+        "embed_chunks_per_s": round(embedder.embedded / embedder.embed_seconds, 1) if embedder.embed_seconds else None,
+    }
+    print(f"Throughput: {throughput}")
 
-    # 7. Build Local BM25
-    print("\n--- Step 6: Building Local BM25 Keyword Index ---")
-    bm25_retriever = BM25Retriever.from_documents(chunks)
-    bm25_retriever.k = 10
+    # 4. Deletions: chunks no longer produced by any PDF
+    wanted_ids = {chunk_id for entry in files.values() for chunk_id in entry["chunks"]}
+    to_delete = set(indexed) - wanted_ids
+    print(f"{len(files)} PDFs ({len(to_parse)} new/changed, {len(removed_files)} removed): "
+          f"{len(to_add)} chunks added, {len(to_delete)} to delete.")
+    if not wanted_ids:
+        print(" No chunks left to index. Please check your ./Data/ folder.")
+        return throughput
 
-    with open(BM25_PATH, "wb") as f:
-        pickle.dump(bm25_retriever, f)
-    print(f"BM25 index saved to {BM25_PATH}")
+    keep = [chunk_id not in to_delete for chunk_id in indexed]
+    if VECTOR_BACKEND == "local":
+        if full_rebuild:
+            build_vector_index(local_vectors)
+        else:
+            patch_vector_index(keep, local_vectors)
+        print(f"Local vector index saved to {LOCAL_VECTOR_PATH} ({VECTOR_DTYPE}).")
+    else:
+        ids = sorted(to_delete)
+        for batch_start in range(0, len(ids), PINECONE_DELETE_BATCH):
+            pinecone_index.delete(ids=ids[batch_start:batch_start + PINECONE_DELETE_BATCH])
+        print(f"Vectors Uploaded. Deleted {len(ids)} stale vectors.")
+
+    # 5. Local BM25 (also the chunk store both local indexes read from), patched in place of a rebuild
+    print("\n--- Step 5: Updating Local BM25 Keyword Index ---")
+    if full_rebuild:
+        build_keyword_index(to_add)
+    else:
+        patch_keyword_index(keep, to_add)
+    print(f"BM25 index saved to {KEYWORD_INDEX_PATH} (chunks in {CHUNK_STORE_PATH})")
 
+    save_manifest({
+        "settings": settings,
+        "files": files,
+        "chunks": [chunk_id for chunk_id, kept in zip(indexed, keep) if kept] + [chunk.id for chunk in to_add],
+    })
     print("\nIngestion Complete! You are ready to chat.")
+    return throughput
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,119 @@
+# journal.py
+import os
+import json
+import time
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+# --- CONFIGURATION ---
+JOURNAL_PATH = os.getenv("CALL_JOURNAL_PATH", "call_journal.jsonl")
+JOURNAL_MAX_BYTES = int(os.getenv("CALL_JOURNAL_MAX_BYTES", str(10 * 1024 * 1024)))
+JOURNAL_BACKUPS = int(os.getenv("CALL_JOURNAL_BACKUPS", "5"))
+JOURNAL_FLUSH_SECONDS = 0.5
+JOURNAL_BATCH_SIZE = 200       # flush early once this many records are waiting
+JOURNAL_MAX_PENDING = 10000    # beyond this, records are dropped (and counted) rather than buffered
+
+
+class CallJournal:
+    """
+    Structured JSONL log of every call/chat line.
+    `record()` only appends to an in-memory batch; a background task writes
+    batches from a worker thread, so disk I/O never runs on the audio path.
+    Rotates like logging's RotatingFileHandler: journal.jsonl.1 ... .N
+    """
+    def __init__(self, path: str = JOURNAL_PATH, max_bytes: int = JOURNAL_MAX_BYTES, backups: int = JOURNAL_BACKUPS,
+                 flush_seconds: float = JOURNAL_FLUSH_SECONDS, batch_size: int = JOURNAL_BATCH_SIZE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_seconds = flush_seconds
+        self.batch_size = batch_size
+        self._pending = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.counters = {"recorded": 0, "written": 0, "dropped": 0, "batches": 0, "rotations": 0}
+
+    def record(self, session_id: Optional[str], role: str, text: str = "", **fields):
+        """Queues one record. Extra fields (latencies, priority...) are stored as given."""
+        if len(self._pending) >= JOURNAL_MAX_PENDING:
+            self.counters["dropped"] += 1
+            return
+        now = time.time()
+        self._pending.append({
+            "ts": datetime.fromtimestamp(now).isoformat(timespec="milliseconds"),
+            "t": round(now, 3),
+            "session_id": session_id,
+            "role": role,
+            "text": text,
+            **fields
+        })
+        self.counters["recorded"] += 1
+        if self._wakeup is not None and len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def start(self):
+        """Starts the writer task (call from the FastAPI lifespan)."""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._writer_loop())
+
+    async def stop(self):
+        """Stops the writer and flushes whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        lines = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in batch)
+        await asyncio.to_thread(self._write, lines)
+        self.counters["written"] += len(batch)
+        self.counters["batches"] += 1
+
+    async def _writer_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Journal write error: {e}")
+
+    def _write(self, lines: str):
+        data = lines.encode("utf-8")
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            size = 0
+        if size and size + len(data) > self.max_bytes:
+            self._rotate()
+        with open(self.path, "ab") as f:
+            f.write(data)
+
+    def _rotate(self):
+        if self.backups <= 0:
+            os.remove(self.path)
+        else:
+            for i in range(self.backups - 1, 0, -1):
+                src = f"{self.path}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        self.counters["rotations"] += 1
+
+    def stats(self) -> dict:
+        return {**self.counters, "pending": len(self._pending)}
+
+
+journal = CallJournal()
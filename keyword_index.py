@@ -0,0 +1,332 @@
+# keyword_index.py
+import os
+import json
+import math
+import mmap
+import struct
+import pickle
+from typing import Any, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+
+from binfile import align, atomic_write, sections, write_sections
+
+# --- CONFIGURATION ---
+KEYWORD_INDEX_PATH = os.getenv("KEYWORD_INDEX_PATH", "./keyword_index.bin")
+CHUNK_STORE_PATH = os.getenv("CHUNK_STORE_PATH", "./chunk_store.bin")
+LEGACY_BM25_PATH = "./bm25_index.pkl"  # pickled LangChain BM25Retriever (pre-mmap)
+
+# rank_bm25.BM25Okapi defaults, which BM25Retriever used
+BM25_K1 = 1.5
+BM25_B = 0.75
+BM25_EPSILON = 0.25
+
+INDEX_MAGIC = b"AKWBM25\0"
+CHUNKS_MAGIC = b"AKWCHNK\0"
+FORMAT_VERSION = 1
+# magic, version, docs, terms, postings, avgdl, k1, b, epsilon
+INDEX_HEADER = struct.Struct("<8sIIIQdddd")
+# magic, version, chunks
+CHUNKS_HEADER = struct.Struct("<8sII")
+
+
+def tokenize(text: str) -> List[str]:
+    """Same as BM25Retriever's default_preprocessing_func."""
+    return text.split()
+
+
+def _index_layout(n_docs: int, n_terms: int, n_postings: int, blob_size: int):
+    return [
+        ("doc_len", "<i4", n_docs),
+        ("idf", "<f8", n_terms),
+        ("postings_start", "<i8", n_terms + 1),
+        ("postings_doc", "<i4", n_postings),
+        ("postings_tf", "<i4", n_postings),
+        ("term_start", "<i8", n_terms + 1),
+        ("terms_sorted", "<i4", n_terms),  # term ids in byte order of the term, for binary search
+        ("term_blob", "u1", blob_size),
+    ]
+
+
+def _collect_postings(documents: List[Document], first_doc: int, term_id_of):
+    """Tokenizes documents into flat (term, doc, tf) postings; term_id_of(token) assigns ids."""
+    doc_len, terms, docs, tfs = [], [], [], []
+    for doc_id, doc in enumerate(documents, start=first_doc):
+        tokens = tokenize(doc.page_content)
+        frequencies = {}
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0) + 1
+        doc_len.append(len(tokens))
+        for token, tf in frequencies.items():
+            terms.append(term_id_of(token))
+            docs.append(doc_id)
+            tfs.append(tf)
+    return doc_len, np.asarray(terms, dtype=np.int64), np.asarray(docs, dtype=np.int64), np.asarray(tfs, dtype=np.int64)
+
+
+def _write_index(path: str, doc_len, encoded_terms: List[bytes], post_term, post_doc, post_tf,
+                 k1: float, b: float, epsilon: float):
+    """Writes an index from postings in any order; term ids must be the corpus's first-occurrence order."""
+    n_docs, n_terms = len(doc_len), len(encoded_terms)
+    if not n_docs:
+        raise ValueError("Cannot build a keyword index from zero documents")
+    avgdl = sum(doc_len) / n_docs
+    order = np.lexsort((post_doc, post_term))
+    document_frequency = np.bincount(post_term, minlength=n_terms)
+
+    # BM25Okapi._calc_idf: negative idfs are floored at epsilon * mean idf, summed in term-id order
+    idf = np.empty(n_terms, dtype="<f8")
+    idf_sum, negative = 0.0, []
+    for term_id, df in enumerate(document_frequency.tolist()):
+        value = math.log(n_docs - df + 0.5) - math.log(df + 0.5)
+        idf[term_id] = value
+        idf_sum += value
+        if value < 0:
+            negative.append(term_id)
+    idf[negative] = epsilon * (idf_sum / n_terms)
+
+    term_start = np.zeros(n_terms + 1, dtype="<i8")
+    term_start[1:] = np.cumsum([len(t) for t in encoded_terms])
+    postings_start = np.zeros(n_terms + 1, dtype="<i8")
+    postings_start[1:] = np.cumsum(document_frequency)
+    n_postings = int(postings_start[-1])
+
+    arrays = {
+        "doc_len": np.asarray(doc_len, dtype="<i4"),
+        "idf": idf,
+        "postings_start": postings_start,
+        "postings_doc": post_doc[order].astype("<i4"),
+        "postings_tf": post_tf[order].astype("<i4"),
+        "term_start": term_start,
+        "terms_sorted": np.asarray(sorted(range(n_terms), key=encoded_terms.__getitem__), dtype="<i4"),
+        "term_blob": np.frombuffer(b"".join(encoded_terms), dtype="u1"),
+    }
+    layout, _ = sections(_index_layout(n_docs, n_terms, n_postings, int(term_start[-1])), INDEX_HEADER.size)
+    header = INDEX_HEADER.pack(INDEX_MAGIC, FORMAT_VERSION, n_docs, n_terms, n_postings, avgdl, k1, b, epsilon)
+    write_sections(path, header, layout, arrays)
+
+
+def build_keyword_index(documents: List[Document], index_path: str = KEYWORD_INDEX_PATH,
+                        chunk_path: str = CHUNK_STORE_PATH, k1: float = BM25_K1, b: float = BM25_B,
+                        epsilon: float = BM25_EPSILON) -> int:
+    """
+    Writes the BM25 index and the chunk store for `documents` (in that order).
+    Term ids follow first occurrence in the corpus, the order rank_bm25 sums
+    idf in, so the epsilon floor and every score come out bit-identical.
+    """
+    term_ids = {}
+    doc_len, post_term, post_doc, post_tf = _collect_postings(
+        documents, 0, lambda token: term_ids.setdefault(token, len(term_ids))
+    )
+    encoded = [term.encode("utf-8") for term in term_ids]
+    write_chunk_store(documents, chunk_path)
+    _write_index(index_path, doc_len, encoded, post_term, post_doc, post_tf, k1, b, epsilon)
+    return len(documents)
+
+
+def patch_keyword_index(keep, documents: List[Document], index_path: str = KEYWORD_INDEX_PATH,
+                        chunk_path: str = CHUNK_STORE_PATH) -> int:
+    """
+    Drops the chunks where `keep` is False and appends `documents`, reusing the
+    stored postings and chunk records of everything kept (nothing is
+    re-tokenized). Kept chunks stay in order, new ones go last. Append-only
+    patches are bit-identical to a rebuild; after deletions the idf floor can
+    differ from one in the last bit, as term order is then approximated.
+    """
+    old = KeywordIndex(index_path, chunk_path)
+    keep = np.asarray(keep, dtype=bool)
+    if len(keep) != old.n_docs:
+        raise ValueError(f"keep mask has {len(keep)} entries for {old.n_docs} indexed chunks")
+    new_doc_id = np.cumsum(keep) - 1
+    n_kept = int(keep.sum())
+
+    # Kept postings, renumbered; terms left without postings disappear
+    old_term = np.repeat(np.arange(old.n_terms), np.diff(old._postings_start))
+    kept_posting = keep[old._postings_doc]
+    kept_term = old_term[kept_posting]
+    kept_doc = new_doc_id[old._postings_doc[kept_posting]]
+    kept_tf = old._postings_tf[kept_posting].astype(np.int64)
+
+    surviving = np.flatnonzero(np.bincount(kept_term, minlength=old.n_terms))
+    first_doc = np.full(old.n_terms, np.iinfo(np.int64).max)
+    np.minimum.at(first_doc, kept_term, kept_doc)
+    surviving = surviving[np.lexsort((surviving, first_doc[surviving]))]
+    remap = np.full(old.n_terms, -1, dtype=np.int64)
+    remap[surviving] = np.arange(len(surviving))
+    encoded = [old._term(int(t)) for t in surviving]
+
+    new_terms = {}
+    def term_id_of(token):
+        old_id = old.term_id(token)
+        if old_id is not None and remap[old_id] >= 0:
+            return int(remap[old_id])
+        return new_terms.setdefault(token, len(surviving) + len(new_terms))
+
+    added_len, added_term, added_doc, added_tf = _collect_postings(documents, n_kept, term_id_of)
+    encoded += [term.encode("utf-8") for term in new_terms]
+    doc_len = old._doc_len[keep].tolist() + added_len
+
+    kept_rows = np.flatnonzero(keep)
+    records = [old.chunks.raw(int(i)) for i in kept_rows] + [_encode_chunk(doc) for doc in documents]
+    _write_chunk_records(records, chunk_path)
+    _write_index(index_path, doc_len, encoded,
+                 np.concatenate([remap[kept_term], added_term]), np.concatenate([kept_doc, added_doc]),
+                 np.concatenate([kept_tf, added_tf]), old.k1, old.b, old.epsilon)
+    return len(doc_len)
+
+
+def _encode_chunk(doc: Document) -> bytes:
+    return json.dumps({"id": doc.id, "page_content": doc.page_content, "metadata": doc.metadata},
+                      ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _write_chunk_records(records: List[bytes], path: str):
+    offsets = np.zeros(len(records) + 1, dtype="<i8")
+    offsets[1:] = np.cumsum([len(r) for r in records])
+    header = CHUNKS_HEADER.pack(CHUNKS_MAGIC, FORMAT_VERSION, len(records))
+    atomic_write(path, [header, b"\0" * (align(len(header)) - len(header)), offsets.tobytes(), *records])
+
+
+def write_chunk_store(documents: List[Document], path: str = CHUNK_STORE_PATH):
+    """One JSON record per chunk, addressed through an offset table."""
+    _write_chunk_records([_encode_chunk(doc) for doc in documents], path)
+
+
+def _map(path: str, magic: bytes) -> mmap.mmap:
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[:len(magic)] != magic:
+        mm.close()
+        raise ValueError(f"{path} is not a keyword index file")
+    return mm
+
+
+class ChunkStore:
+    """Read-only, memory-mapped view of a chunk store; chunks are decoded on access."""
+    def __init__(self, path: str = CHUNK_STORE_PATH):
+        self.path = path
+        self._mm = _map(path, CHUNKS_MAGIC)
+        _, version, count = CHUNKS_HEADER.unpack_from(self._mm)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported chunk store version {version}")
+        self._offsets = np.frombuffer(self._mm, dtype="<i8", count=count + 1, offset=align(CHUNKS_HEADER.size))
+        self._base = align(CHUNKS_HEADER.size) + self._offsets.nbytes
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def raw(self, position: int) -> bytes:
+        start = self._base + int(self._offsets[position])
+        return self._mm[start:self._base + int(self._offsets[position + 1])]
+
+    def get(self, position: int) -> Document:
+        record = json.loads(self.raw(position))
+        return Document(id=record.get("id"), page_content=record["page_content"], metadata=record["metadata"])
+
+
+class KeywordIndex:
+    """
+    BM25 over a flat binary file opened with mmap: opening costs a header
+    parse, and the OS shares the pages between every worker that maps it.
+    Scores and ranking match rank_bm25.BM25Okapi / BM25Retriever exactly.
+    """
+    def __init__(self, index_path: str = KEYWORD_INDEX_PATH, chunk_path: str = CHUNK_STORE_PATH):
+        self.path = index_path
+        self._mm = _map(index_path, INDEX_MAGIC)
+        _, version, n_docs, n_terms, n_postings, self.avgdl, self.k1, self.b, self.epsilon = \
+            INDEX_HEADER.unpack_from(self._mm)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{index_path}: unsupported keyword index version {version}")
+        self.n_docs, self.n_terms = n_docs, n_terms
+
+        # The term blob is last, so every offset is known without its size; terms are sliced from the map
+        layout, _ = sections(_index_layout(n_docs, n_terms, n_postings, 0), INDEX_HEADER.size)
+        for name, (offset, dtype, count) in layout.items():
+            if name != "term_blob":
+                setattr(self, f"_{name}", np.frombuffer(self._mm, dtype=dtype, count=count, offset=offset))
+        self._blob_offset = layout["term_blob"][0]
+        self._length_norm = None
+
+        self.chunks = ChunkStore(chunk_path)
+        if len(self.chunks) != n_docs:
+            raise ValueError(f"{chunk_path} has {len(self.chunks)} chunks but {index_path} indexes {n_docs}")
+
+    def _term(self, term_id: int) -> bytes:
+        start = self._blob_offset + int(self._term_start[term_id])
+        return self._mm[start:self._blob_offset + int(self._term_start[term_id + 1])]
+
+    def term_id(self, term: str) -> Optional[int]:
+        """Binary search of the sorted term dictionary."""
+        key = term.encode("utf-8")
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(int(self._terms_sorted[mid])) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.n_terms:
+            candidate = int(self._terms_sorted[lo])
+            if self._term(candidate) == key:
+                return candidate
+        return None
+
+    def get_scores(self, query_tokens: List[str]) -> np.ndarray:
+        """BM25Okapi.get_scores, evaluated over postings instead of every document."""
+        if self._length_norm is None:
+            self._length_norm = self.k1 * (1 - self.b + self.b * self._doc_len.astype(np.int64) / self.avgdl)
+        scores = np.zeros(self.n_docs)
+        for token in query_tokens:
+            term_id = self.term_id(token)
+            if term_id is None:
+                continue
+            start, end = int(self._postings_start[term_id]), int(self._postings_start[term_id + 1])
+            docs = self._postings_doc[start:end]
+            tf = self._postings_tf[start:end].astype(np.int64)
+            scores[docs] += float(self._idf[term_id]) * (tf * (self.k1 + 1) / (tf + self._length_norm[docs]))
+        return scores
+
+    def search(self, query: str, k: int = 10) -> List[Document]:
+        # Full argsort, as BM25Okapi.get_top_n does, so ties rank in the same order
+        top = np.argsort(self.get_scores(tokenize(query)))[::-1][:k]
+        return [self.chunks.get(int(i)) for i in top]
+
+
+class KeywordRetriever(BaseRetriever):
+    """Drop-in for the pickled BM25Retriever (same k, same results)."""
+    index: Any
+    k: int = 10
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.index.search(query, self.k)
+
+
+def convert_legacy_pickle(pickle_path: str = LEGACY_BM25_PATH, index_path: str = KEYWORD_INDEX_PATH,
+                          chunk_path: str = CHUNK_STORE_PATH) -> int:
+    """Rebuilds the mmap index from the documents inside a pickled BM25Retriever."""
+    with open(pickle_path, "rb") as f:
+        retriever = pickle.load(f)
+    preprocess = getattr(retriever, "preprocess_func", None)
+    if preprocess is not None and getattr(preprocess, "__name__", "") != "default_preprocessing_func":
+        print(f"⚠️ {pickle_path} used a custom tokenizer; the keyword index uses whitespace splitting")
+    return build_keyword_index(retriever.docs, index_path, chunk_path)
+
+
+def load_keyword_retriever(k: int = 10, index_path: str = KEYWORD_INDEX_PATH, chunk_path: str = CHUNK_STORE_PATH,
+                           legacy_path: str = LEGACY_BM25_PATH) -> KeywordRetriever:
+    """Opens the mmap index, converting a legacy bm25_index.pkl first if that is all there is."""
+    if not os.path.exists(index_path) and os.path.exists(legacy_path):
+        print(f"📦 Converting {legacy_path} to {index_path} (one time)...")
+        convert_legacy_pickle(legacy_path, index_path, chunk_path)
+    if not os.path.exists(index_path):
+        raise FileNotFoundError(index_path)
+    return KeywordRetriever(index=KeywordIndex(index_path, chunk_path), k=k)
+
+
+if __name__ == "__main__":
+    # python keyword_index.py -> convert bm25_index.pkl in place of re-running ingest.py
+    count = convert_legacy_pickle()
+    print(f"Keyword index written: {count} chunks -> {KEYWORD_INDEX_PATH}, {CHUNK_STORE_PATH}")
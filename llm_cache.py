@@ -0,0 +1,150 @@
+# llm_cache.py
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# --- CONFIGURATION ---
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") == "1"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")  # e.g. "llm_cache.sqlite"; unset = memory only
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+
+def make_key(model_id: str, system_instruction: str, prompt: str, schema=None) -> str:
+    """Content address of a generate_content call."""
+    schema_repr = ""
+    if schema is not None:
+        schema_repr = json.dumps(schema.model_json_schema(), sort_keys=True) if hasattr(schema, "model_json_schema") else repr(schema)
+    h = hashlib.sha256()
+    for part in (model_id, system_instruction or "", prompt, schema_repr):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class MemoryTier:
+    """In-process LRU."""
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: str, value: str):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+class SQLiteTier:
+    """On-disk tier with TTL; survives restarts and can be shipped pre-warmed."""
+    def __init__(self, path: str, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        if self.ttl_seconds and time.time() - created_at > self.ttl_seconds:
+            with self._lock:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+            return None
+        return value
+
+    def put(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, time.time())
+            )
+            self._conn.commit()
+
+
+class LLMCache:
+    """Two-tier response cache (memory LRU in front of optional SQLite)."""
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES, sqlite_path: Optional[str] = None,
+                 ttl_seconds: int = LLM_CACHE_TTL_SECONDS):
+        self.memory = MemoryTier(max_entries)
+        self.disk = SQLiteTier(sqlite_path, ttl_seconds) if sqlite_path else None
+        self.counters = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.counters["hits"] += 1
+            self.counters["memory_hits"] += 1
+        return value
+
+    def _disk_result(self, key: str, value: Optional[str]) -> Optional[str]:
+        if value is not None:
+            self.memory.put(key, value)
+            self.counters["hits"] += 1
+            self.counters["disk_hits"] += 1
+        else:
+            self.counters["misses"] += 1
+        return value
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+        return self._disk_result(key, self.disk.get(key) if self.disk else None)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """get() for the event loop: the SQLite read runs in a worker thread."""
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+        return self._disk_result(key, await asyncio.to_thread(self.disk.get, key) if self.disk else None)
+
+    def put(self, key: str, value: str):
+        self.memory.put(key, value)
+        if self.disk:
+            self.disk.put(key, value)
+        self.counters["writes"] += 1
+
+    async def aput(self, key: str, value: str):
+        """put() for the event loop: the SQLite write runs in a worker thread."""
+        self.memory.put(key, value)
+        if self.disk:
+            await asyncio.to_thread(self.disk.put, key, value)
+        self.counters["writes"] += 1
+
+    def stats(self) -> dict:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {**self.counters, "hit_rate": round(self.counters["hits"] / lookups, 3) if lookups else 0.0}
+
+
+_default_cache = None
+def get_default_cache() -> Optional[LLMCache]:
+    """Process-wide cache configured from the environment (None when disabled)."""
+    global _default_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _default_cache is None:
+        _default_cache = LLMCache(sqlite_path=LLM_CACHE_PATH)
+    return _default_cache
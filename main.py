@@ -1,84 +1,160 @@
-import os
-import json
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
 # --- FLAT IMPORTS ---
-from pipline import run_emergency_pipeline
-from call_section import router as voice_router
+from pipline import arun_emergency_pipeline, aload_session_state, PIPELINE_GRAPHS
+from checkpoint import eviction_loop
+from call_section import router as voice_router, prewarm_phrase_cache, phrase_cache
+from triage import turn_scheduler, score_turn
+from http_clients import registry as http_registry, HTTP_COUNTERS
+from journal import journal
+from incident_store import get_incident_store
+from scheduler import scheduler_stats
+from speculation import get_speculation_stats
+from llm_cache import get_default_cache
+import metrics
 
 load_dotenv()
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Batched JSONL call journal; flushed from a background task, never on the audio path
+    journal.start()
+    # Evict checkpoints of finished / abandoned sessions so the store stays flat
+    eviction_task = asyncio.create_task(eviction_loop())
+    # Render recurring operator prompts in the background; cached replies skip TTS entirely
+    prewarm_task = asyncio.create_task(prewarm_phrase_cache())
+    yield
+    prewarm_task.cancel()
+    eviction_task.cancel()
+    await journal.stop()
+    await http_registry.aclose()
+
+app = FastAPI(lifespan=lifespan)
+
+# Existing stats() are exported on /metrics; they are only read when scraped
+metrics.register_collector("gemini_scheduler", scheduler_stats, label="model",
+                           counters=("submitted", "coalesced", "completed", "failed", "rate_limited"))
+metrics.register_collector("pipeline_workers", turn_scheduler.stats)
+metrics.register_collector("llm_cache", lambda: get_default_cache().stats() if get_default_cache() else {},
+                           counters=("hits", "memory_hits", "disk_hits", "misses", "writes"))
+metrics.register_collector("speculation", get_speculation_stats,
+                           counters=("started", "hits", "misses", "cancelled", "saved_ms_total"))
+metrics.register_collector("phrase_cache", phrase_cache.stats, counters=("hits", "misses"))
+metrics.register_collector("http", http_registry.stats, label="client", counters=HTTP_COUNTERS)
+metrics.register_collector("journal", journal.stats,
+                           counters=("recorded", "written", "dropped", "batches", "rotations"))
 
 # Mount the Voice Router
 app.include_router(voice_router)
 
-# Ensure reports directory exists (Mirroring logic in call_section)
-REPORTS_DIR = "incident_reports"
-os.makedirs(REPORTS_DIR, exist_ok=True)
-
-def save_report_to_json(session_id: str, data: dict):
-    """Helper to save the collected data to a JSON file."""
-    filename = f"{REPORTS_DIR}/report_{session_id}.json"
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
-    print(f"✅ Text Chat Report saved to: {filename}")
-
 @app.get("/", response_class=JSONResponse)
 async def index_page():
     return {"message": "Server is up. Use /chat for text or call the Twilio number."}
 
+@app.get("/stats/http")
+async def http_pool_stats():
+    """Connection-pool usage of the shared outbound HTTP clients."""
+    return http_registry.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus scrape target: per-stage latency histograms, active calls and the stats above."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats/journal")
+async def journal_stats():
+    return journal.stats()
+
+@app.get("/incidents")
+async def list_incidents(limit: int = 50, cursor: str | None = None,
+                         emergency_type: str | None = None, location: str | None = None):
+    """Newest incident reports first; pass `next_cursor` back to get the next page."""
+    try:
+        items, next_cursor = await get_incident_store().aquery(
+            limit=limit, cursor=cursor, emergency_type=emergency_type, location=location
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return {"items": items, "next_cursor": next_cursor}
+
+@app.get("/incidents/{session_id}")
+async def get_incident(session_id: str):
+    report = await asyncio.to_thread(get_incident_store().get, session_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Report not found.")
+    return report
+
 # ==========================================
 # TEXT CHAT ENDPOINT (FOR TESTING)
 # ==========================================
 
-active_text_sessions = {}
-
 class ChatInput(BaseModel):
     session_id: str
     message: str
+    mode: str = "classic"  # "classic" (3 LLM calls) or "turn" (1 fused call)
 
 class ChatResponse(BaseModel):
     reply: str
     is_complete: bool
     collected_data: dict | None = None
+    latency_ms: float | None = None
 
 @app.post("/chat", response_model=ChatResponse)
 async def chat_with_agent(data: ChatInput):
     session_id = data.session_id
     user_message = data.message
 
-    if session_id not in active_text_sessions:
-        active_text_sessions[session_id] = {
+    if data.mode not in PIPELINE_GRAPHS:
+        raise HTTPException(status_code=400, detail=f"Unknown mode '{data.mode}'. Use one of {list(PIPELINE_GRAPHS)}.")
+
+    # State lives in the checkpointer (by thread_id), not in this worker's memory
+    current_state = await aload_session_state(session_id)
+    if not current_state:
+        current_state = {
             "collected_data": {},
             "transcript": "",
             "next_question": "112, what is your emergency?",
             "is_complete": False,
-            "conversation_history": []
+            "conversation_history": [],
+            "pipeline_mode": data.mode,
+            "session_id": session_id
         }
 
-    current_state = active_text_sessions[session_id]
-    
+    journal.record(session_id, "User", user_message, channel="chat")
     try:
-        updated_state = run_emergency_pipeline(user_message, current_state)
+        priority = score_turn(current_state.get("collected_data"), user_message, current_state.get("is_complete", False))
+        updated_state = await turn_scheduler.run(
+            priority, lambda: arun_emergency_pipeline(user_message, current_state)
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    active_text_sessions[session_id] = updated_state
+    journal.record(
+        session_id, "AI", updated_state["next_question"],
+        channel="chat",
+        priority=priority,
+        turn_latency_ms=updated_state.get("last_turn_latency_ms"),
+        stage_latency_ms=updated_state.get("last_stage_latency_ms"),
+        prompt_tokens=updated_state.get("prompt_tokens"),
+        is_complete=updated_state.get("is_complete", False)
+    )
 
-    # --- SAVE JSON LOGIC FOR TEXT CHAT ---
+    # --- SAVE REPORT FOR TEXT CHAT ---
     if updated_state.get("is_complete", False):
-        save_report_to_json(session_id, updated_state.get("collected_data", {}))
-        # Optional: Clean up memory after saving
-        # del active_text_sessions[session_id]
+        await get_incident_store().asave(session_id, updated_state.get("collected_data", {}), source="chat")
+        print(f"✅ Text Chat Report saved: {session_id}")
+        # The checkpoint is evicted after FINISHED_SESSION_TTL_SECONDS
 
     return ChatResponse(
         reply=updated_state["next_question"],
         is_complete=updated_state["is_complete"],
-        collected_data=updated_state["collected_data"] if updated_state["is_complete"] else None
+        collected_data=updated_state["collected_data"] if updated_state["is_complete"] else None,
+        latency_ms=updated_state.get("last_turn_latency_ms")
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,116 @@
+# memory.py
+import json
+from schema import EmergencyInfo
+
+# --- CONFIGURATION ---
+MAX_VERBATIM_EXCHANGES = 3     # last K caller/operator exchanges kept word for word
+MAX_STORED_HISTORY_LINES = 20  # hard cap on state["conversation_history"]
+PROMPT_TOKEN_BUDGET = 600      # history + data + new input, per extractor prompt
+MAX_TRANSCRIPT_TOKENS = 200    # a single utterance never eats the whole budget
+MIN_TRANSCRIPT_TOKENS = 32     # the new utterance is never clipped below this, even over budget
+MIN_FIELD_CHARS = 48           # shortest a data value is cut to when the prompt is over budget
+# Free text cut (after history) when over budget; dispatch checklist fields are never cut
+DATA_TRIM_ORDER = ["description", "medical_conditions"]
+ELLIPSIS = " ... "
+
+_DEFAULTS = EmergencyInfo().model_dump()
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap ~4 chars/token estimate; good enough to enforce a budget."""
+    return (len(text) + 3) // 4
+
+
+def compact_data(existing_data: dict) -> dict:
+    """Drops fields still at their schema default; older turns already live here."""
+    return {k: v for k, v in (existing_data or {}).items() if _DEFAULTS.get(k) != v}
+
+
+def clip_transcript(transcript: str, max_tokens: int) -> str:
+    """
+    Keeps the head of an over-long utterance (callers name the emergency and
+    place first) and a short tail, joined by an ellipsis.
+    """
+    if estimate_tokens(transcript) <= max_tokens:
+        return transcript
+    chars = max_tokens * 4 - len(ELLIPSIS)
+    if chars <= 0:
+        return transcript[:max(max_tokens, 0) * 4]
+    head = chars * 3 // 4
+    return transcript[:head] + ELLIPSIS + transcript[len(transcript) - (chars - head):]
+
+
+def shrink_data(data: dict, max_tokens: int) -> dict:
+    """Cuts the DATA_TRIM_ORDER free text until the data fits max_tokens or can't shrink further."""
+    data = dict(data)
+    for field in DATA_TRIM_ORDER:
+        excess = estimate_tokens(json.dumps(data)) - max_tokens
+        if excess <= 0:
+            break
+        value = data.get(field)
+        if isinstance(value, str) and len(value) > MIN_FIELD_CHARS:
+            keep = max(MIN_FIELD_CHARS, len(value) - excess * 4 - len(ELLIPSIS))
+            data[field] = value[:keep] + ELLIPSIS.rstrip()
+    return data
+
+
+def restore_cut_fields(original: dict, prompt_data: dict, extracted: dict) -> dict:
+    """
+    Puts back the full value of any field the prompt only saw cut, unless the
+    model changed it; text the model appended to the cut copy is kept.
+    """
+    restored = dict(extracted)
+    for field in DATA_TRIM_ORDER:
+        full, cut, value = (original or {}).get(field), prompt_data.get(field), extracted.get(field)
+        if not isinstance(cut, str) or cut == full or not isinstance(value, str):
+            continue
+        shown = cut[:-len(ELLIPSIS.rstrip())]
+        if value.startswith(shown):
+            tail = value[len(shown):]
+            tail = tail[len(ELLIPSIS.rstrip()):] if tail.startswith(ELLIPSIS.rstrip()) else tail
+            restored[field] = full + tail
+    return restored
+
+
+def _history_lines(recent: list, folded: int) -> list:
+    return ([f"({folded} earlier lines summarized in Current Data)\n"] if folded else []) + \
+        [line if line.endswith("\n") else line + "\n" for line in recent]
+
+
+def trim_history(history: list) -> list:
+    """Bounds the stored history so state doesn't grow for the whole call."""
+    return history[-MAX_STORED_HISTORY_LINES:]
+
+
+def build_extractor_context(transcript: str, existing_data: dict, conversation_history: list):
+    """
+    Returns (history_lines, data, transcript, prompt_tokens) that fit PROMPT_TOKEN_BUDGET.
+    Only the last K exchanges are verbatim; anything older is represented by
+    the structured data, plus a one-line marker so the model knows it happened.
+    Over budget, history goes first, then description/medical_conditions, then
+    the utterance; checklist fields are sent whole, so only they can overrun it.
+    """
+    transcript = clip_transcript(transcript or "", MAX_TRANSCRIPT_TOKENS)
+
+    # Data and the new utterance come before history; if they alone overflow,
+    # cut the data's free text, then the utterance itself
+    data = shrink_data(compact_data(existing_data), PROMPT_TOKEN_BUDGET - estimate_tokens(transcript))
+    data_tokens = estimate_tokens(json.dumps(data))
+    transcript = clip_transcript(transcript, max(PROMPT_TOKEN_BUDGET - data_tokens, MIN_TRANSCRIPT_TOKENS))
+
+    history = list(conversation_history or [])
+    recent = history[-MAX_VERBATIM_EXCHANGES * 2:]
+    folded = len(history) - len(recent)
+
+    budget = PROMPT_TOKEN_BUDGET - data_tokens - estimate_tokens(transcript)
+    lines = _history_lines(recent, folded)
+    while lines and sum(estimate_tokens(line) for line in lines) > budget:
+        if recent:
+            recent.pop(0)
+            folded += 1
+            lines = _history_lines(recent, folded)
+        else:
+            lines = []  # not even room for the marker
+
+    prompt_tokens = data_tokens + estimate_tokens(transcript) + sum(estimate_tokens(line) for line in lines)
+    return lines, data, transcript, prompt_tokens
@@ -0,0 +1,187 @@
+# metrics.py
+import time
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# --- CONFIGURATION ---
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.5, 5.0, 10.0]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{k}="{_escape(v)}"' for k, v in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram. observe() is a bisect + two adds."""
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets: List[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = list(buckets)
+        self._series: Dict[tuple, list] = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {k: list(v) for k, v in self._series.items()}
+        for key, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ["+Inf"], series[:-1]):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {self.value}"]
+
+
+class span:
+    """
+    Times a block into a histogram, e.g.
+
+        with span(STAGE_SECONDS, stage="tts_request"):
+            ...
+    """
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, **labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+# --- The app's metrics ---
+STAGE_SECONDS = Histogram(
+    "aarambh_stage_seconds",
+    "Wall time of one stage of a caller turn (endpointing, graph nodes, TTS, Twilio send, GIS).",
+    ("stage",),
+)
+LLM_CALL_SECONDS = Histogram(
+    "aarambh_llm_call_seconds",
+    "EmergencyAgents Gemini calls, including scheduler queueing.",
+    ("call", "cache"),
+)
+TURN_SECONDS = Histogram(
+    "aarambh_turn_seconds",
+    "Whole pipeline turn (all graph nodes).",
+    ("mode",),
+)
+TURN_QUEUE_WAIT_SECONDS = Histogram(
+    "aarambh_turn_queue_wait_seconds",
+    "Time a pipeline turn waited for a triage worker slot.",
+    ("priority",),
+)
+ACTIVE_CALLS = Gauge("aarambh_active_calls", "Twilio media streams currently connected.")
+
+METRICS = [STAGE_SECONDS, LLM_CALL_SECONDS, TURN_SECONDS, TURN_QUEUE_WAIT_SECONDS, ACTIVE_CALLS]
+
+# Existing stats() dicts, exported only when /metrics is scraped
+# prefix -> (collect, label, counter keys)
+_collectors: Dict[str, Tuple[Callable[[], dict], Optional[str], frozenset]] = {}
+
+def register_collector(prefix: str, collect: Callable[[], dict], label: Optional[str] = None,
+                       counters: Iterable[str] = ()):
+    """
+    Exports collect()'s numbers as aarambh_<prefix>_<key> gauges. With `label`,
+    collect() returns {label value: stats} (per model, per HTTP client...) and
+    each value becomes a {label="..."} series of the same metric. Keys listed in
+    `counters` only ever grow and are exported as <name>_total counters.
+    """
+    _collectors[prefix] = (collect, label, frozenset(counters))
+
+
+def _flatten(prefix: str, value, out: list):
+    if isinstance(value, bool):
+        out.append((prefix, int(value)))
+    elif isinstance(value, (int, float)):
+        out.append((prefix, value))
+    elif isinstance(value, dict):
+        for k, v in value.items():
+            _flatten(f"{prefix}_{k}" if prefix else str(k), v, out)
+
+
+def _metric_name(name: str) -> str:
+    return "".join(c if c.isalnum() or c == "_" else "_" for c in name)
+
+
+def _collect(prefix: str, collect: Callable[[], dict], label: Optional[str], counters: frozenset) -> list:
+    """[(metric name, type, label text, value)] for one collector."""
+    stats = collect() or {}
+    groups = stats.items() if label else [(None, stats)]
+    samples = []
+    for label_value, values in groups:
+        flat = []
+        _flatten("", values, flat)
+        labels = _label_text((label,), (label_value,)) if label else ""
+        for key, value in flat:
+            if key in counters:
+                name = _metric_name(f"aarambh_{prefix}_{key}" + ("" if key.endswith("_total") else "_total"))
+                samples.append((name, "counter", labels, value))
+            else:
+                samples.append((_metric_name(f"aarambh_{prefix}_{key}"), "gauge", labels, value))
+    return samples
+
+
+def render() -> str:
+    """Prometheus text exposition format (0.0.4)."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    families: Dict[str, Tuple[str, list]] = {}  # one TYPE line per metric, all its label series under it
+    for prefix, (collect, label, counters) in list(_collectors.items()):
+        try:
+            samples = _collect(prefix, collect, label, counters)
+        except Exception as e:
+            print(f"Metrics collector '{prefix}' failed: {e}")
+            continue
+        for name, kind, labels, value in samples:
+            families.setdefault(name, (kind, []))[1].append(f"{name}{labels} {value}")
+    for name, (kind, series) in families.items():
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(series)
+    return "\n".join(lines) + "\n"
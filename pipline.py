@@ -1,7 +1,18 @@
 # pipeline.py
-from typing import TypedDict, List
+import time
+import uuid
+import asyncio
+import contextvars
+from typing import TypedDict, List, Optional
 from langgraph.graph import StateGraph, END
-from schema import EmergencyInfo
+from langchain_core.runnables import RunnableLambda
+from schema import EmergencyInfo, VerificationResult
+from verifier import audit, merge_llm_verdict
+from question_templates import pick_template
+from memory import build_extractor_context, restore_cut_fields, trim_history
+from scheduler import current_session
+from checkpoint import get_checkpointer, get_session_activity
+from metrics import STAGE_SECONDS, TURN_SECONDS
 
 # Lazily import and cache the agents instance to avoid import-time failures
 _agents_instance = None
@@ -13,6 +24,14 @@ def get_agents():
         _agents_instance = EmergencyAgents()
     return _agents_instance
 
+_async_agents_instance = None
+def get_async_agents():
+    global _async_agents_instance
+    if _async_agents_instance is None:
+        from agents import AsyncEmergencyAgents
+        _async_agents_instance = AsyncEmergencyAgents()
+    return _async_agents_instance
+
 # 1. Define State
 class AgentState(TypedDict):
     transcript: str               
@@ -21,43 +40,106 @@ class AgentState(TypedDict):
     next_question: str            
     is_complete: bool             
     conversation_history: List[str] 
+    pipeline_mode: str
+    speculative_extraction: Optional[dict]  # {"transcript", "collected_data"} computed ahead of time
+    prompt_tokens: int                      # size of the last extractor prompt (telemetry)
+    session_id: str                         # call/chat id, used for fair queuing of Gemini calls
 
 agents = None  # kept for backward-compatibility; call get_agents() where needed
 
 # 2. Node Functions
 
-def extraction_step(state: AgentState):
-    """Extracts facts from text."""
+def _extractor_inputs(state: AgentState):
     current_data = state.get("collected_data", {})
     if not current_data:
         current_data = EmergencyInfo().model_dump()
-        
-    updated_info = get_agents().extractor_node(
-        current_transcript=state['transcript'],
-        existing_data=current_data,
-        conversation_history=state.get('conversation_history', [])
+
+    # Bounded prompt: last K exchanges verbatim, the rest lives in the structured data
+    history, data, transcript, prompt_tokens = build_extractor_context(
+        state['transcript'], current_data, state.get('conversation_history', [])
     )
-    return {"collected_data": updated_info.model_dump()}
+    inputs = {
+        "current_transcript": transcript,
+        "existing_data": data,
+        "conversation_history": history
+    }
+    return inputs, prompt_tokens
+
+def _extracted_data(state: AgentState, inputs: dict, updated_info: EmergencyInfo) -> dict:
+    """The model's report, with any free text the prompt only saw cut put back in full."""
+    return restore_cut_fields(state.get("collected_data", {}), inputs["existing_data"], updated_info.model_dump())
+
+def _speculative_hit(state: AgentState):
+    """Reuses an extraction started on interim transcripts if it saw the same text."""
+    spec = state.get("speculative_extraction")
+    if spec and spec.get("transcript") == (state.get("transcript") or "").strip():
+        return {"collected_data": spec["collected_data"], "speculative_extraction": None}
+    return None
+
+def extraction_step(state: AgentState):
+    """Extracts facts from text."""
+    hit = _speculative_hit(state)
+    if hit:
+        return hit
+    inputs, prompt_tokens = _extractor_inputs(state)
+    updated_info = get_agents().extractor_node(**inputs)
+    return {"collected_data": _extracted_data(state, inputs, updated_info), "speculative_extraction": None, "prompt_tokens": prompt_tokens}
+
+async def aextraction_step(state: AgentState):
+    hit = _speculative_hit(state)
+    if hit:
+        return hit
+    inputs, prompt_tokens = _extractor_inputs(state)
+    updated_info = await get_async_agents().extractor_node(**inputs)
+    return {"collected_data": _extracted_data(state, inputs, updated_info), "speculative_extraction": None, "prompt_tokens": prompt_tokens}
 
 def verification_step(state: AgentState):
     """Audits data and finds missing fields."""
     current_data = state["collected_data"]
-    verification = get_agents().verifier_node(current_data)
+    verification, ambiguous = audit(current_data)
+
+    # Only pay for the Gemini audit when the rules can't decide (e.g. vague location)
+    if ambiguous:
+        llm_verdict = get_agents().verifier_node(current_data)
+        verification = merge_llm_verdict(verification, ambiguous, llm_verdict)
     
     return {
         "is_complete": verification.is_sufficient,
         "missing_fields": verification.missing_fields 
     }
 
-def question_generation_step(state: AgentState):
-    """Picks the first missing field and generates a question."""
+async def averification_step(state: AgentState):
+    current_data = state["collected_data"]
+    verification, ambiguous = audit(current_data)
+
+    if ambiguous:
+        llm_verdict = await get_async_agents().verifier_node(current_data)
+        verification = merge_llm_verdict(verification, ambiguous, llm_verdict)
+
+    return {
+        "is_complete": verification.is_sufficient,
+        "missing_fields": verification.missing_fields
+    }
+
+def _canned_question(state: AgentState):
+    """Returns (target_field, question); question is None when Gemini must phrase it."""
     missing = state.get("missing_fields", [])
     
     if not missing:
-        return {"next_question": "Please provide any other relevant details."}
+        return None, "Please provide any other relevant details."
     
     # Priority Queue Strategy
     target_field = missing[0]
+
+    # Canned wording first; Gemini only when no template fits or it already failed
+    emergency_type = state.get("collected_data", {}).get("emergency_type")
+    return target_field, pick_template(target_field, emergency_type, state.get('conversation_history', []))
+
+def question_generation_step(state: AgentState):
+    """Picks the first missing field and generates a question."""
+    target_field, question = _canned_question(state)
+    if question:
+        return {"next_question": question}
     
     question = get_agents().question_node(
         missing_field=target_field,
@@ -66,6 +148,52 @@ def question_generation_step(state: AgentState):
     
     return {"next_question": question}
 
+async def aquestion_generation_step(state: AgentState):
+    target_field, question = _canned_question(state)
+    if question:
+        return {"next_question": question}
+
+    question = await get_async_agents().question_node(
+        missing_field=target_field,
+        conversation_history=state.get('conversation_history', [])
+    )
+
+    return {"next_question": question}
+
+def _turn_update(state: AgentState, inputs: dict, turn, prompt_tokens: int):
+    collected_data = _extracted_data(state, inputs, turn.updated_info)
+
+    # The model's own audit is not trusted alone: the rule checklist must agree before dispatch,
+    # and the model only decides the fields the rules find ambiguous (as in the classic graph)
+    rules, ambiguous = audit(collected_data)
+    model_verdict = VerificationResult(is_sufficient=turn.is_sufficient, missing_fields=turn.missing_fields)
+    verification = merge_llm_verdict(rules, ambiguous, model_verdict)
+    is_complete = turn.is_sufficient and verification.is_sufficient
+    missing_fields = verification.missing_fields
+
+    question = turn.next_question.strip()
+    if not is_complete and (not question or (missing_fields and turn.missing_fields[:1] != missing_fields[:1])):
+        # The model asked about nothing, or about a different field than the checklist's first gap
+        _, canned = _canned_question({**state, "collected_data": collected_data, "missing_fields": missing_fields})
+        question = canned or question or "Please provide any other relevant details."
+
+    return {
+        "collected_data": collected_data,
+        "is_complete": is_complete,
+        "missing_fields": missing_fields,
+        "next_question": question,
+        "prompt_tokens": prompt_tokens
+    }
+
+def fused_turn_step(state: AgentState):
+    """Extracts, audits and generates the next question in one LLM call."""
+    inputs, prompt_tokens = _extractor_inputs(state)
+    return _turn_update(state, inputs, get_agents().turn_node(**inputs), prompt_tokens)
+
+async def afused_turn_step(state: AgentState):
+    inputs, prompt_tokens = _extractor_inputs(state)
+    return _turn_update(state, inputs, await get_async_agents().turn_node(**inputs), prompt_tokens)
+
 def update_history_step(state: AgentState):
     """Logs the conversation."""
     history = state.get("conversation_history", [])
@@ -76,7 +204,7 @@ def update_history_step(state: AgentState):
     if not state['is_complete']:
         history.append(f"Operator: {state['next_question']}")
 
-    return {"conversation_history": history}
+    return {"conversation_history": trim_history(history)}
 
 # 3. Conditional Logic
 def check_status(state: AgentState):
@@ -86,11 +214,43 @@ def check_status(state: AgentState):
         return "generate_question"
 
 # 4. Build Graph
+# Per-node wall time of the current turn ({node: ms}); set by the run_* entry points
+stage_timings = contextvars.ContextVar("stage_timings", default=None)
+
+def _record_stage(name: str, start: float):
+    elapsed = time.perf_counter() - start
+    STAGE_SECONDS.observe(elapsed, stage=name)
+    timings = stage_timings.get()
+    if timings is not None:
+        timings[name] = round(elapsed * 1000, 1)
+
+def _timed(name: str, func):
+    def wrapper(state):
+        start = time.perf_counter()
+        try:
+            return func(state)
+        finally:
+            _record_stage(name, start)
+    return wrapper
+
+def _atimed(name: str, afunc):
+    async def wrapper(state):
+        start = time.perf_counter()
+        try:
+            return await afunc(state)
+        finally:
+            _record_stage(name, start)
+    return wrapper
+
+# Each LLM node carries a sync and an async body, so the same graph serves invoke() and ainvoke()
+def _node(name: str, func, afunc):
+    return RunnableLambda(_timed(name, func), afunc=_atimed(name, afunc), name=name)
+
 workflow = StateGraph(AgentState)
 
-workflow.add_node("extractor", extraction_step)
-workflow.add_node("verifier", verification_step)
-workflow.add_node("question_gen", question_generation_step)
+workflow.add_node("extractor", _node("extractor", extraction_step, aextraction_step))
+workflow.add_node("verifier", _node("verifier", verification_step, averification_step))
+workflow.add_node("question_gen", _node("question_gen", question_generation_step, aquestion_generation_step))
 workflow.add_node("history_updater", update_history_step)
 
 workflow.set_entry_point("extractor")
@@ -109,13 +269,87 @@ workflow.add_conditional_edges(
 workflow.add_edge("question_gen", "history_updater")
 workflow.add_edge("history_updater", END)
 
-app_graph = workflow.compile()
+# Persisted per thread_id (= session_id), so any worker can continue a session
+app_graph = workflow.compile(checkpointer=get_checkpointer())
 
-# 5. Helper function
-def run_emergency_pipeline(user_input: str, current_state: dict):
+# 4b. Single-call "turn" graph (one Gemini call per caller utterance)
+turn_workflow = StateGraph(AgentState)
+
+turn_workflow.add_node("turn", _node("turn", fused_turn_step, afused_turn_step))
+turn_workflow.add_node("history_updater", update_history_step)
+
+turn_workflow.set_entry_point("turn")
+turn_workflow.add_edge("turn", "history_updater")
+turn_workflow.add_edge("history_updater", END)
+
+turn_graph = turn_workflow.compile(checkpointer=get_checkpointer())
+
+# Selectable per session via state["pipeline_mode"]
+DEFAULT_MODE = "classic"
+PIPELINE_GRAPHS = {
+    "classic": app_graph,
+    "turn": turn_graph,
+}
+
+# 5. Helper functions
+def _prepare_turn(user_input: str, current_state: dict):
     current_state["transcript"] = user_input
     if "conversation_history" not in current_state:
         current_state["conversation_history"] = []
-    
-    result = app_graph.invoke(current_state)
-    return result
\ No newline at end of file
+
+    mode = current_state.get("pipeline_mode") or DEFAULT_MODE
+    if mode not in PIPELINE_GRAPHS:
+        raise ValueError(f"Unknown pipeline mode: {mode}")
+
+    # No session id (scripts, benchmarks): use a throwaway thread
+    thread_id = current_state.get("session_id") or f"ephemeral-{uuid.uuid4()}"
+    return mode, {"configurable": {"thread_id": thread_id}}
+
+def _finish_turn(result: dict, mode: str, start: float, timings: dict):
+    latency_ms = (time.perf_counter() - start) * 1000
+
+    result["last_turn_latency_ms"] = round(latency_ms, 1)
+    TURN_SECONDS.observe(latency_ms / 1000, mode=mode)
+    result["last_stage_latency_ms"] = timings
+    print(f"[Pipeline:{mode}] turn latency {latency_ms:.0f} ms, prompt ~{result.get('prompt_tokens', 0)} tokens")
+    return result
+
+def _record_activity(config: dict, result: dict):
+    """Marks the thread for TTL eviction (or drops it right away if it was throwaway)."""
+    thread_id = config["configurable"]["thread_id"]
+    if thread_id.startswith("ephemeral-"):
+        get_checkpointer().delete_thread(thread_id)
+    else:
+        get_session_activity().touch(thread_id, finished=result.get("is_complete", False))
+
+def run_emergency_pipeline(user_input: str, current_state: dict):
+    mode, config = _prepare_turn(user_input, current_state)
+    timings = {}
+    token = stage_timings.set(timings)
+    try:
+        start = time.perf_counter()
+        result = PIPELINE_GRAPHS[mode].invoke(current_state, config)
+    finally:
+        stage_timings.reset(token)
+    _record_activity(config, result)
+    return _finish_turn(result, mode, start, timings)
+
+async def arun_emergency_pipeline(user_input: str, current_state: dict):
+    """Async twin of run_emergency_pipeline; awaits Gemini instead of blocking a thread."""
+    mode, config = _prepare_turn(user_input, current_state)
+    timings = {}
+    token = current_session.set(current_state.get("session_id") or "anonymous")
+    timings_token = stage_timings.set(timings)
+    try:
+        start = time.perf_counter()
+        result = await PIPELINE_GRAPHS[mode].ainvoke(current_state, config)
+    finally:
+        stage_timings.reset(timings_token)
+        current_session.reset(token)
+    await asyncio.to_thread(_record_activity, config, result)
+    return _finish_turn(result, mode, start, timings)
+
+async def aload_session_state(session_id: str) -> dict:
+    """Latest checkpointed state for a session ({} if unknown or evicted)."""
+    snapshot = await app_graph.aget_state({"configurable": {"thread_id": session_id}})
+    return dict(snapshot.values) if snapshot else {}
\ No newline at end of file
@@ -0,0 +1,42 @@
+# question_templates.py
+from typing import Optional
+
+# --- TEMPLATE BANK ---
+# Keyed by (missing_field, emergency_type). emergency_type=None is the generic fallback.
+QUESTION_TEMPLATES = {
+    ("location", None): "State the exact address, including city.",
+    ("emergency_type", None): "What is the nature of your emergency?",
+    ("caller_name", None): "Caller, what is your name?",
+
+    ("age_group", None): "Approximate age of the patient?",
+    ("age_group", "fire"): "Approximate age of the people trapped or injured?",
+    ("age_group", "police"): "Approximate age of the person involved?",
+
+    ("immediate_dangers", "medical"): "Is the patient conscious and breathing?",
+    ("immediate_dangers", "traffic_accident"): "Is anyone trapped, unconscious or bleeding?",
+    ("immediate_dangers", "fire"): "Is anyone trapped inside, and is the fire spreading?",
+    ("immediate_dangers", "police"): "Is anyone armed or hurt right now?",
+    ("immediate_dangers", "hazmat"): "Is anyone having trouble breathing, and what is leaking?",
+}
+
+
+def all_template_questions():
+    """Every distinct template sentence (used to pre-render audio)."""
+    return sorted(set(QUESTION_TEMPLATES.values()))
+
+
+def pick_template(missing_field: str, emergency_type: Optional[str], conversation_history: list) -> Optional[str]:
+    """
+    Returns a canned question for the field, or None when the LLM should phrase it.
+    A template that was already asked (and the field is still missing) counts as failed.
+    """
+    question = QUESTION_TEMPLATES.get((missing_field, emergency_type))
+    if question is None:
+        question = QUESTION_TEMPLATES.get((missing_field, None))
+    if question is None:
+        return None
+
+    if f"Operator: {question}" in (conversation_history or []):
+        return None
+
+    return question
@@ -1,13 +1,12 @@
 import os
-import pickle
 import getpass
 from dotenv import load_dotenv
 
 # --- 1. Imports for Logic ---
 from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_pinecone import PineconeVectorStore
-from langchain_community.retrievers import BM25Retriever
-from langchain.retrievers import EnsembleRetriever
+from vector_index import load_vector_retriever, VECTOR_BACKEND
+from keyword_index import load_keyword_retriever
+from hybrid_retriever import build_hybrid_retriever
 from langchain.retrievers import ContextualCompressionRetriever
 
 # --- 2. Imports for Reranking & Chat ---
@@ -22,10 +21,8 @@ from langchain_core.runnables.history import RunnableWithMessageHistory
 load_dotenv()
 
 # --- CONFIGURATION ---
-BM25_PATH = "./bm25_index.pkl"
 EMBEDDING_MODEL = "BAAI/bge-small-en-v1.5"
 RERANK_MODEL = "ms-marco-TinyBERT-L-2-v2"
-INDEX_NAME = "aarambh"
 
 # --- MEMORY SETUP ---
 store = {}
@@ -39,42 +36,38 @@ def load_brain():
     print("🚀 Connecting to Brain...")
 
     # 1. API Key Check
-    if "PINECONE_API_KEY" not in os.environ:
+    if VECTOR_BACKEND == "pinecone" and "PINECONE_API_KEY" not in os.environ:
         os.environ["PINECONE_API_KEY"] = getpass.getpass("Enter Pinecone API Key: ")
     if "GOOGLE_API_KEY" not in os.environ:
         os.environ["GOOGLE_API_KEY"] = getpass.getpass("Enter Google API Key: ")
 
-    # 2. Connect to Pinecone (Cloud Vectors)
-    print("☁️  Connecting to Pinecone...")
+    # 2. Dense Vectors (Pinecone in the cloud, or the local mmap index)
+    print("☁️  Connecting to Pinecone..." if VECTOR_BACKEND == "pinecone" else "📂 Opening Local Vector Index...")
     embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
-    vectorstore = PineconeVectorStore(
-        index_name=INDEX_NAME, 
-        embedding=embeddings
-    )
-    vector_retriever = vectorstore.as_retriever(search_kwargs={"k": 10})
+    try:
+        vector_retriever = load_vector_retriever(embeddings, k=10)
+    except FileNotFoundError as e:
+        print(f"❌ Error: {e} not found. Run ingest.py (or vector_index.py) with VECTOR_BACKEND=local first!")
+        return None
 
     # 3. Load BM25 (Local Keywords)
     print("📂 Loading Local Keywords...")
     try:
-        with open(BM25_PATH, "rb") as f:
-            bm25_retriever = pickle.load(f)
+        bm25_retriever = load_keyword_retriever(k=10)
     except FileNotFoundError:
-        print("❌ Error: bm25_index.pkl not found. You must run ingest.py first!")
+        print("❌ Error: keyword index not found. You must run ingest.py first!")
         return None
 
     # 4. Hybrid Search (Vector + Keyword)
     print("⚡ constructing Hybrid Search...")
-    ensemble_retriever = EnsembleRetriever(
-        retrievers=[bm25_retriever, vector_retriever],
-        weights=[0.5, 0.5]
-    )
+    hybrid_retriever = build_hybrid_retriever(bm25_retriever, vector_retriever)
 
     # 5. Reranking (Refining Results)
     print("🧠 Initializing Reranker...")
     compressor = FlashrankRerank(model=RERANK_MODEL)
     compression_retriever = ContextualCompressionRetriever(
         base_compressor=compressor,
-        base_retriever=ensemble_retriever
+        base_retriever=hybrid_retriever
     )
     
     return compression_retriever
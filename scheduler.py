@@ -0,0 +1,166 @@
+# scheduler.py
+import os
+import time
+import random
+import asyncio
+import contextvars
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+# --- CONFIGURATION ---
+MAX_CONCURRENCY_PER_MODEL = int(os.getenv("GEMINI_MAX_CONCURRENCY", "16"))
+COALESCE_WINDOW_MS = float(os.getenv("GEMINI_COALESCE_WINDOW_MS", "5"))
+RATE_LIMIT_RETRIES = 5
+BASE_BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 8.0
+
+# Which call/session a Gemini request belongs to (set by the pipeline entry points)
+current_session = contextvars.ContextVar("current_session", default="anonymous")
+
+
+def is_rate_limited(exc: Exception) -> bool:
+    """429 / RESOURCE_EXHAUSTED from the genai SDK (or a stub that mimics it)."""
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    return code == 429 or "RESOURCE_EXHAUSTED" in str(exc)
+
+
+def _percentile(samples, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+@dataclass
+class _Request:
+    key: str
+    call: Callable[[], Awaitable]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class GeminiScheduler:
+    """
+    Central gate in front of one model:
+    - caps concurrent requests,
+    - waits a few ms so concurrent identical requests collapse into one call,
+    - round-robins between sessions so one chatty call can't starve the others,
+    - backs off globally when the API says we're rate limited.
+    """
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY_PER_MODEL, coalesce_window_ms: float = COALESCE_WINDOW_MS):
+        self.max_concurrency = max_concurrency
+        self.coalesce_window = coalesce_window_ms / 1000
+        self._queues = {}            # session_id -> deque[_Request]
+        self._ready = deque()        # round-robin order of sessions with queued work
+        self._inflight = {}          # key -> future (coalescing)
+        self._slots = None
+        self._wakeup = None
+        self._dispatcher = None
+        self._cooldown_until = 0.0
+        self.queue_waits = deque(maxlen=10000)
+        self.counters = {"submitted": 0, "coalesced": 0, "completed": 0, "failed": 0, "rate_limited": 0}
+        self.active = 0
+
+    def _ensure_started(self):
+        if self._dispatcher is None or self._dispatcher.done():
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch_loop())
+
+    async def submit(self, key: str, call: Callable[[], Awaitable], session_id: Optional[str] = None):
+        """Queues `call` (a zero-arg coroutine factory) and returns its result."""
+        self._ensure_started()
+        self.counters["submitted"] += 1
+
+        if key in self._inflight:
+            self.counters["coalesced"] += 1
+            return await asyncio.shield(self._inflight[key])
+
+        session_id = session_id or current_session.get()
+        future = asyncio.get_running_loop().create_future()
+        # Mark errors as retrieved even if every waiter was cancelled (e.g. barge-in)
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+
+        queue = self._queues.setdefault(session_id, deque())
+        if not queue:
+            self._ready.append(session_id)
+        queue.append(_Request(key, call, future))
+        self._wakeup.set()
+
+        return await asyncio.shield(future)
+
+    async def _dispatch_loop(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # Coalescing window: let the rest of a burst arrive before dispatching
+            if self.coalesce_window:
+                await asyncio.sleep(self.coalesce_window)
+
+            while self._ready:
+                delay = self._cooldown_until - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await self._slots.acquire()
+
+                session_id = self._ready.popleft()
+                queue = self._queues[session_id]
+                request = queue.popleft()
+                if queue:
+                    self._ready.append(session_id)
+                else:
+                    del self._queues[session_id]
+
+                self.queue_waits.append(time.perf_counter() - request.enqueued_at)
+                asyncio.create_task(self._execute(request))
+
+    async def _execute(self, request: _Request):
+        self.active += 1
+        try:
+            for attempt in range(RATE_LIMIT_RETRIES + 1):
+                try:
+                    result = await request.call()
+                    request.future.set_result(result)
+                    self.counters["completed"] += 1
+                    return
+                except Exception as e:
+                    if not is_rate_limited(e) or attempt == RATE_LIMIT_RETRIES:
+                        raise
+                    self.counters["rate_limited"] += 1
+                    backoff = min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * (2 ** attempt))
+                    backoff *= random.uniform(0.5, 1.0)
+                    # Pause new dispatches too, not just this request
+                    self._cooldown_until = max(self._cooldown_until, time.monotonic() + backoff)
+                    await asyncio.sleep(backoff)
+        except Exception as e:
+            self.counters["failed"] += 1
+            if not request.future.done():
+                request.future.set_exception(e)
+        finally:
+            self.active -= 1
+            self._inflight.pop(request.key, None)
+            self._slots.release()
+
+    def stats(self) -> dict:
+        waits = list(self.queue_waits)
+        return {
+            **self.counters,
+            "active": self.active,
+            "queued": sum(len(q) for q in self._queues.values()),
+            "queue_wait_p50_ms": round(_percentile(waits, 0.50) * 1000, 2),
+            "queue_wait_p99_ms": round(_percentile(waits, 0.99) * 1000, 2),
+        }
+
+
+_schedulers = {}
+def get_scheduler(model_id: str) -> GeminiScheduler:
+    """One scheduler (and one concurrency cap) per model."""
+    if model_id not in _schedulers:
+        _schedulers[model_id] = GeminiScheduler()
+    return _schedulers[model_id]
+
+
+def scheduler_stats() -> dict:
+    return {model_id: s.stats() for model_id, s in _schedulers.items()}
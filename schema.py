@@ -38,4 +38,10 @@ class EmergencyInfo(BaseModel):
 
 class VerificationResult(BaseModel):
     is_sufficient: bool = Field(description="True ONLY if all critical fields are valid.")
-    missing_fields: List[str] = Field(description="List of invalid fields.")
\ No newline at end of file
+    missing_fields: List[str] = Field(description="List of invalid fields.")
+
+class TurnResult(BaseModel):
+    updated_info: EmergencyInfo = Field(description="The incident report updated with the new input.")
+    is_sufficient: bool = Field(description="True ONLY if all critical fields are valid.")
+    missing_fields: List[str] = Field(description="List of invalid fields.")
+    next_question: str = Field(description="ONE direct question for the first missing field. Empty if sufficient.")
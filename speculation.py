@@ -0,0 +1,108 @@
+# speculation.py
+import time
+import asyncio
+from typing import Optional
+
+from pipline import aextraction_step
+from scheduler import current_session
+
+# --- CONFIGURATION ---
+MIN_SPECULATION_CHARS = 8  # don't burn a Gemini call on "uh" / "hello"
+
+# Process-wide counters (exported via get_speculation_stats)
+SPECULATION_STATS = {
+    "started": 0,
+    "hits": 0,
+    "misses": 0,
+    "cancelled": 0,
+    "saved_ms_total": 0.0,
+}
+
+
+def get_speculation_stats() -> dict:
+    stats = dict(SPECULATION_STATS)
+    decided = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / decided, 3) if decided else 0.0
+    stats["saved_ms_per_turn"] = round(stats["saved_ms_total"] / decided, 1) if decided else 0.0
+    return stats
+
+
+class SpeculativeExtractor:
+    """
+    Runs extraction_step on the caller's words while they are still talking.
+    If the text that finally reaches the pipeline is the same, the result is
+    committed and the extractor call is skipped; otherwise it is thrown away.
+    """
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.text: Optional[str] = None
+        self.turn_marker = None
+        self.started_at = 0.0
+        self.finished_at: Optional[float] = None
+
+    def maybe_start(self, text: str, pipeline_state: dict):
+        text = text.strip()
+        if len(text) < MIN_SPECULATION_CHARS or text == self.text:
+            return
+        if pipeline_state.get("pipeline_mode", "classic") != "classic":
+            return  # the fused turn graph has no separate extraction step
+
+        self.cancel()
+        history = list(pipeline_state.get("conversation_history", []))
+        snapshot = {
+            "transcript": text,
+            "collected_data": dict(pipeline_state.get("collected_data") or {}),
+            "conversation_history": history,
+        }
+        self.text = text
+        self.turn_marker = self._turn_marker(history)
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        self.task = asyncio.create_task(self._run(snapshot, pipeline_state.get("session_id") or "anonymous"))
+        SPECULATION_STATS["started"] += 1
+
+    @staticmethod
+    def _turn_marker(history: list):
+        # History is length-capped, so pair its length with the last line
+        return len(history), history[-1] if history else None
+
+    async def _run(self, snapshot: dict, session_id: str):
+        current_session.set(session_id)  # task-local context copy
+        result = await aextraction_step(snapshot)
+        self.finished_at = time.perf_counter()
+        return result["collected_data"]
+
+    def cancel(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+            SPECULATION_STATS["cancelled"] += 1
+        self.task = None
+        self.text = None
+
+    async def commit(self, final_text: str, pipeline_state: dict) -> Optional[dict]:
+        """Returns a `speculative_extraction` entry for the pipeline state, or None on a miss."""
+        task, text = self.task, self.text
+        self.task, self.text = None, None
+
+        same_turn = self.turn_marker == self._turn_marker(pipeline_state.get("conversation_history", []))
+        if task is None or text != final_text.strip() or not same_turn:
+            if task and not task.done():
+                task.cancel()
+                SPECULATION_STATS["cancelled"] += 1
+            SPECULATION_STATS["misses"] += 1
+            return None
+
+        commit_at = time.perf_counter()
+        try:
+            collected_data = await task
+        except Exception as e:
+            print(f"Speculative extraction failed: {e}")
+            SPECULATION_STATS["misses"] += 1
+            return None
+
+        # Time the extractor already spent before the turn was handed over
+        saved_ms = (min(commit_at, self.finished_at or commit_at) - self.started_at) * 1000
+        SPECULATION_STATS["hits"] += 1
+        SPECULATION_STATS["saved_ms_total"] += saved_ms
+        print(f"[Speculation] hit, saved {saved_ms:.0f} ms")
+        return {"transcript": final_text.strip(), "collected_data": collected_data}
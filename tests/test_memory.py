@@ -0,0 +1,86 @@
+# tests/test_memory.py
+import asyncio
+
+import pipline
+from memory import (PROMPT_TOKEN_BUDGET, MAX_TRANSCRIPT_TOKENS, build_extractor_context,
+                    clip_transcript, estimate_tokens)
+from schema import EmergencyInfo
+
+OPENING = "There is a fire at Gandhi Road, Guntur"
+
+
+def test_long_utterance_keeps_its_opening():
+    transcript = OPENING + " and" + " the smoke is spreading" * 200
+    clipped = clip_transcript(transcript, MAX_TRANSCRIPT_TOKENS)
+    assert clipped.startswith(OPENING)
+    assert clipped.endswith("spreading")
+    assert estimate_tokens(clipped) <= MAX_TRANSCRIPT_TOKENS
+
+
+def test_prompt_stays_within_budget_when_data_overflows():
+    data = {
+        "caller_name": "Ravi",
+        "emergency_type": "fire",
+        "location": "Gandhi Road, Guntur",
+        "description": "caller reports smoke " * 400,
+        "medical_conditions": "asthma " * 200,
+    }
+    history = [f"Caller: line {i} " + "words " * 30 for i in range(20)]
+    lines, compacted, transcript, prompt_tokens = build_extractor_context(OPENING + " help" * 500, data, history)
+    assert prompt_tokens <= PROMPT_TOKEN_BUDGET
+    assert transcript.startswith(OPENING)
+    # Checklist fields survive untouched; only free text is cut
+    assert compacted["caller_name"] == "Ravi"
+    assert compacted["location"] == "Gandhi Road, Guntur"
+    assert len(compacted["description"]) < len(data["description"])
+
+
+def test_short_context_is_unchanged():
+    lines, data, transcript, _ = build_extractor_context("Bandra, Mumbai", {"location": "N/A"}, ["Operator: Where?"])
+    assert lines == ["Operator: Where?\n"]
+    assert data == {}
+    assert transcript == "Bandra, Mumbai"
+
+
+LONG_ADDRESS = "Flat 12B, Sai Krupa Apartments, behind the old water tank, " * 6 + "Gandhi Road, Guntur"
+
+
+class EchoAgents:
+    """Async extractor stand-in that hands back the data it was prompted with, as a model with nothing new would."""
+    async def extractor_node(self, current_transcript, existing_data, conversation_history):
+        return EmergencyInfo(**existing_data)
+
+
+def over_budget_state():
+    return {
+        "transcript": "please hurry" * 100,
+        "collected_data": {
+            **EmergencyInfo().model_dump(),
+            "caller_name": "Ravi",
+            "emergency_type": "fire",
+            "location": LONG_ADDRESS,
+            "description": "caller reports smoke " * 400,
+            "medical_conditions": "asthma " * 200,
+        },
+        "conversation_history": [f"Caller: line {i} " + "words " * 30 for i in range(20)],
+    }
+
+
+def test_history_goes_before_free_text():
+    # Data + utterance fit alone; with the verbatim exchanges they don't
+    data = {"location": LONG_ADDRESS, "description": "caller reports smoke " * 70}
+    history = [f"Caller: line {i} " + "words " * 30 for i in range(6)]
+    lines, compacted, _, prompt_tokens = build_extractor_context("help", data, history)
+    assert compacted == data
+    assert len(lines) < len(history)
+    assert prompt_tokens <= PROMPT_TOKEN_BUDGET
+
+
+def test_extraction_keeps_cut_fields_whole(monkeypatch):
+    monkeypatch.setattr(pipline, "get_async_agents", lambda: EchoAgents())
+    state = over_budget_state()
+    inputs, _ = pipline._extractor_inputs(state)
+    assert inputs["existing_data"]["description"] != state["collected_data"]["description"]  # the prompt saw it cut
+
+    update = asyncio.run(pipline.aextraction_step(state))
+    assert update["collected_data"] == state["collected_data"]
@@ -0,0 +1,35 @@
+# tests/test_pipline.py
+from pipline import _turn_update
+from schema import EmergencyInfo, TurnResult
+
+REPORT = {
+    "caller_name": "Ravi Kumar",
+    "emergency_type": "medical",
+    "location": "Near Bandra station, Mumbai",
+    "age_group": "senior",
+    "immediate_dangers": "Unconscious, not breathing",
+}
+
+
+def turn(is_sufficient, missing_fields, next_question="", **overrides):
+    return TurnResult(updated_info=EmergencyInfo(**{**REPORT, **overrides}), is_sufficient=is_sufficient,
+                           missing_fields=missing_fields, next_question=next_question)
+
+
+def test_rules_overrule_a_premature_dispatch():
+    update = _turn_update({"conversation_history": []}, {"existing_data": {}}, turn(True, [], location="Mumbai"), 0)
+    assert not update["is_complete"]
+    assert update["missing_fields"] == ["location"]
+    assert update["next_question"]
+
+
+def test_complete_when_model_and_rules_agree():
+    update = _turn_update({"conversation_history": []}, {"existing_data": {}}, turn(True, []), 0)
+    assert update["is_complete"]
+    assert update["missing_fields"] == []
+
+
+def test_model_can_still_hold_the_dispatch():
+    update = _turn_update({"conversation_history": []}, {"existing_data": {}}, turn(False, ["age_group"], "How old is the patient?"), 0)
+    assert not update["is_complete"]
+    assert update["next_question"] == "How old is the patient?"
@@ -0,0 +1,90 @@
+# tests/test_verifier.py
+"""
+verifier.audit / merge_llm_verdict against hand-labelled checklist verdicts.
+
+Each case is a report plus the VerificationResult the verifier_node prompt's
+checklist calls for, labelled by hand from that prompt (these are not captured
+Gemini outputs). Rule-only cases must match without an LLM call; ambiguous
+cases must flag the right fields, and merging a stubbed LLM verdict must give
+the labelled result.
+"""
+import pytest
+
+from schema import VerificationResult
+from verifier import CHECKLIST_ORDER, audit, merge_llm_verdict
+
+COMPLETE_MEDICAL = {
+    "caller_name": "Ravi Kumar",
+    "emergency_type": "medical",
+    "location": "Near Bandra station, Mumbai",
+    "age_group": "senior",
+    "immediate_dangers": "Unconscious, not breathing",
+}
+
+
+def report(**overrides):
+    return {**COMPLETE_MEDICAL, **overrides}
+
+
+# (report, checklist verdict)
+RULE_ONLY_CASES = [
+    (COMPLETE_MEDICAL, VerificationResult(is_sufficient=True, missing_fields=[])),
+    ({}, VerificationResult(is_sufficient=False,
+                            missing_fields=["location", "emergency_type", "age_group", "caller_name"])),
+    (report(location="India"), VerificationResult(is_sufficient=False, missing_fields=["location"])),
+    (report(location="Mumbai"), VerificationResult(is_sufficient=False, missing_fields=["location"])),
+    (report(location="Maharashtra, India"), VerificationResult(is_sufficient=False, missing_fields=["location"])),
+    (report(location="  N/A "), VerificationResult(is_sufficient=False, missing_fields=["location"])),
+    (report(immediate_dangers="N/A"), VerificationResult(is_sufficient=False, missing_fields=["immediate_dangers"])),
+    (report(immediate_dangers="none"), VerificationResult(is_sufficient=False, missing_fields=["immediate_dangers"])),
+    (report(emergency_type="traffic_accident", immediate_dangers="N/A"),
+     VerificationResult(is_sufficient=True, missing_fields=[])),
+    (report(emergency_type="fire", immediate_dangers="Gas cylinder next to the flames"),
+     VerificationResult(is_sufficient=True, missing_fields=[])),
+    (report(emergency_type="unknown"), VerificationResult(is_sufficient=False, missing_fields=["emergency_type"])),
+    (report(age_group="unknown", caller_name="unknown"),
+     VerificationResult(is_sufficient=False, missing_fields=["age_group", "caller_name"])),
+    (report(caller_name=None, location="Mumbai", immediate_dangers=""),
+     VerificationResult(is_sufficient=False, missing_fields=["location", "immediate_dangers", "caller_name"])),
+]
+
+# (report, fields the rules can't decide, stubbed LLM audit verdict, checklist verdict)
+AMBIGUOUS_CASES = [
+    (report(location="the parliament new delhi"), ["location"],
+     VerificationResult(is_sufficient=False, missing_fields=["location"]),
+     VerificationResult(is_sufficient=False, missing_fields=["location"])),
+    (report(location="jk college road guntur"), ["location"],
+     VerificationResult(is_sufficient=True, missing_fields=[]),
+     VerificationResult(is_sufficient=True, missing_fields=[])),
+    (report(emergency_type="police", immediate_dangers="yes"), ["immediate_dangers"],
+     VerificationResult(is_sufficient=False, missing_fields=["immediate_dangers"]),
+     VerificationResult(is_sufficient=False, missing_fields=["immediate_dangers"])),
+    # Rule verdicts stand: the LLM can't clear a missing name or flag a field the rules accepted
+    (report(emergency_type="fire", immediate_dangers="danger", caller_name="N/A"), ["immediate_dangers"],
+     VerificationResult(is_sufficient=False, missing_fields=["age_group"]),
+     VerificationResult(is_sufficient=False, missing_fields=["caller_name"])),
+    (report(location="mumbai, bandra west", immediate_dangers="N/A"), ["location"],
+     VerificationResult(is_sufficient=False, missing_fields=["location"]),
+     VerificationResult(is_sufficient=False, missing_fields=["location", "immediate_dangers"])),
+]
+
+
+@pytest.mark.parametrize("parameters, expected", RULE_ONLY_CASES)
+def test_rule_only_matches_checklist(parameters, expected):
+    result, ambiguous = audit(parameters)
+    assert ambiguous == []
+    assert result == expected
+
+
+@pytest.mark.parametrize("parameters, ambiguous_fields, llm_result, expected", AMBIGUOUS_CASES)
+def test_ambiguous_fields_fall_back_to_llm(parameters, ambiguous_fields, llm_result, expected):
+    result, ambiguous = audit(parameters)
+    assert ambiguous == ambiguous_fields
+    assert not result.is_sufficient  # never sufficient until the LLM has ruled
+    assert merge_llm_verdict(result, ambiguous, llm_result) == expected
+
+
+def test_missing_fields_follow_checklist_order():
+    result, _ = audit({"emergency_type": "medical"})
+    assert result.missing_fields == [f for f in CHECKLIST_ORDER if f in result.missing_fields]
+    assert result.missing_fields == ["location", "immediate_dangers", "age_group", "caller_name"]
@@ -0,0 +1,105 @@
+# triage.py
+import os
+import time
+import asyncio
+import itertools
+from typing import Awaitable, Callable
+
+from metrics import Histogram, TURN_QUEUE_WAIT_SECONDS
+
+# --- CONFIGURATION ---
+MAX_PIPELINE_WORKERS = int(os.getenv("MAX_PIPELINE_WORKERS", "32"))
+AGING_SECONDS = float(os.getenv("TRIAGE_AGING_SECONDS", "2.0"))  # waited this long = one level more urgent
+
+PRIORITY_CRITICAL, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW = 0, 1, 2, 3
+PRIORITY_NAMES = {0: "critical", 1: "high", 2: "normal", 3: "low"}
+
+CRITICAL_TERMS = [
+    "cardiac arrest", "heart attack", "cardiac", "unconscious", "not conscious", "not breathing",
+    "no pulse", "severe bleeding", "stroke", "choking", "drowning", "trapped", "gunshot", "stabbed",
+]
+HIGH_TYPES = {"fire", "hazmat", "traffic_accident"}
+
+
+def score_turn(collected_data: dict, transcript: str = "", is_complete: bool = False) -> int:
+    """
+    Severity of a pipeline turn from what we know so far (lower = more urgent).
+    Once the report is complete (units dispatched), further turns are low
+    priority unless the caller reports something critical.
+    """
+    data = collected_data or {}
+    text = " ".join([
+        str(data.get("immediate_dangers") or ""),
+        str(data.get("medical_conditions") or ""),
+        transcript or "",
+    ]).lower()
+
+    if any(term in text for term in CRITICAL_TERMS):
+        return PRIORITY_CRITICAL
+    if is_complete:
+        return PRIORITY_LOW
+    if data.get("emergency_type") in HIGH_TYPES or data.get("emergency_type") == "medical":
+        return PRIORITY_HIGH
+    return PRIORITY_NORMAL
+
+
+class TurnScheduler:
+    """
+    Runs pipeline turns on a fixed number of slots, most urgent first.
+    Waiting turns age toward critical so low-priority calls still get served.
+    """
+    def __init__(self, max_workers: int = MAX_PIPELINE_WORKERS, aging_seconds: float = AGING_SECONDS,
+                 wait_seconds: Histogram = TURN_QUEUE_WAIT_SECONDS):
+        self.max_workers = max_workers
+        self.aging_seconds = aging_seconds
+        self.running = 0
+        self._waiting = []  # [priority, enqueued_at, seq, future]
+        self._seq = itertools.count()
+        self.wait_seconds = wait_seconds
+
+    def _effective(self, entry, now: float) -> float:
+        priority, enqueued_at, seq, _ = entry
+        return priority - (now - enqueued_at) / self.aging_seconds
+
+    def _record_wait(self, priority: int, waited_s: float):
+        self.wait_seconds.observe(waited_s, priority=PRIORITY_NAMES[priority])
+
+    def _release(self):
+        self.running -= 1
+        now = time.monotonic()
+        while self._waiting and self.running < self.max_workers:
+            # Small list; a scan is cheaper than keeping an aging heap consistent
+            entry = min(self._waiting, key=lambda e: (self._effective(e, now), e[2]))
+            self._waiting.remove(entry)
+            future = entry[3]
+            if future.cancelled():
+                continue
+            self.running += 1
+            future.set_result(None)
+
+    async def run(self, priority: int, call: Callable[[], Awaitable]):
+        """Waits for a slot (by severity) and runs `call()`."""
+        enqueued_at = time.monotonic()
+        if self.running < self.max_workers and not self._waiting:
+            self.running += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._waiting.append([priority, enqueued_at, next(self._seq), future])
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self._release()  # slot was handed to us just before cancellation
+                raise
+
+        self._record_wait(priority, time.monotonic() - enqueued_at)
+        try:
+            return await call()
+        finally:
+            self._release()
+
+    def stats(self) -> dict:
+        return {"running": self.running, "waiting": len(self._waiting)}
+
+
+turn_scheduler = TurnScheduler()
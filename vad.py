@@ -0,0 +1,82 @@
+# vad.py
+import numpy as np
+
+# --- CONFIGURATION ---
+FRAME_BYTES = 160           # 20 ms of 8 kHz mulaw (one Twilio media frame)
+FRAME_MS = 20
+SPEECH_MARGIN_DB = 12.0     # this far above the caller's noise floor counts as speech
+MIN_SPEECH_DBFS = -45.0     # ...and never quieter than this
+ONSET_FRAMES = 4            # 80 ms of sustained energy before we call it speech
+HANGOVER_FRAMES = 15        # 300 ms of quiet before speech is considered over
+CALIBRATION_FRAMES = 10     # first 200 ms of the call only measure the line noise
+NOISE_FLOOR_ALPHA = 0.05
+INITIAL_NOISE_FLOOR_DBFS = -60.0
+
+
+def _mulaw_table() -> np.ndarray:
+    """G.711 mu-law byte -> 16-bit linear PCM, for all 256 codes at once."""
+    u = ~np.arange(256, dtype=np.uint8)
+    sign = u & 0x80
+    exponent = (u >> 4).astype(np.int32) & 0x07
+    mantissa = u.astype(np.int32) & 0x0F
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    return np.where(sign, -magnitude, magnitude).astype(np.int16)
+
+
+MULAW_TO_LINEAR = _mulaw_table()
+
+
+def frame_energies_dbfs(mulaw: bytes) -> np.ndarray:
+    """Energy (dBFS) of every whole 20 ms frame in `mulaw`."""
+    n_frames = len(mulaw) // FRAME_BYTES
+    codes = np.frombuffer(mulaw, dtype=np.uint8, count=n_frames * FRAME_BYTES)
+    samples = MULAW_TO_LINEAR[codes].astype(np.float32).reshape(n_frames, FRAME_BYTES)
+    rms = np.sqrt(np.mean(samples * samples, axis=1))
+    return 20 * np.log10(rms / 32768.0 + 1e-9)
+
+
+class EnergyVAD:
+    """
+    Cheap per-call voice activity detector on the raw Twilio mulaw stream.
+    Tracks the caller's noise floor and reports the frame where sustained
+    speech starts, so barge-in doesn't have to wait for a Deepgram transcript.
+    """
+    def __init__(self):
+        self.noise_floor = INITIAL_NOISE_FLOOR_DBFS
+        self.in_speech = False
+        self.speech_run = 0
+        self.quiet_run = 0
+        self.frames_seen = 0
+        self._pending = b""
+
+    def threshold_dbfs(self) -> float:
+        return max(MIN_SPEECH_DBFS, self.noise_floor + SPEECH_MARGIN_DB)
+
+    def process(self, mulaw: bytes) -> bool:
+        """Feeds one Twilio payload; True when speech onset happened inside it."""
+        data = self._pending + mulaw
+        usable = len(data) - len(data) % FRAME_BYTES
+        self._pending = data[usable:]
+        if not usable:
+            return False
+
+        onset = False
+        for energy in frame_energies_dbfs(data[:usable]).tolist():
+            self.frames_seen += 1
+            if self.frames_seen <= CALIBRATION_FRAMES:
+                self.noise_floor += (energy - self.noise_floor) / self.frames_seen
+                continue
+            if energy >= self.threshold_dbfs():
+                self.speech_run += 1
+                self.quiet_run = 0
+                if not self.in_speech and self.speech_run >= ONSET_FRAMES:
+                    self.in_speech = True
+                    onset = True
+            else:
+                self.speech_run = 0
+                self.quiet_run += 1
+                # Only quiet frames move the floor, so speech never raises it
+                self.noise_floor += NOISE_FLOOR_ALPHA * (energy - self.noise_floor)
+                if self.in_speech and self.quiet_run >= HANGOVER_FRAMES:
+                    self.in_speech = False
+        return onset
@@ -0,0 +1,247 @@
+# vector_index.py
+import os
+import mmap
+import struct
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+
+from binfile import sections, write_sections
+from keyword_index import ChunkStore, CHUNK_STORE_PATH
+
+# --- CONFIGURATION ---
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone").lower()  # "pinecone" or "local"
+LOCAL_VECTOR_PATH = os.getenv("LOCAL_VECTOR_PATH", "./vector_index.bin")
+VECTOR_DTYPE = os.getenv("VECTOR_DTYPE", "float32")  # "float32" or "int8" (4x smaller, per-row scale)
+VECTOR_IVF_LISTS = int(os.getenv("VECTOR_IVF_LISTS", "0"))  # 0 = exact search unless the corpus is large
+VECTOR_IVF_NPROBE = int(os.getenv("VECTOR_IVF_NPROBE", "8"))
+IVF_MIN_VECTORS = 50000  # below this, exact search over every vector is already a few ms
+IVF_KMEANS_ITERATIONS = 15
+INT8_BLOCK_ROWS = 4096
+INDEX_NAME = "aarambh"
+EMBEDDING_MODEL = "BAAI/bge-small-en-v1.5"
+
+VECTOR_MAGIC = b"AKWVEC\0\0"
+FORMAT_VERSION = 1
+DTYPE_CODES = {"float32": 0, "int8": 1}
+# magic, version, vectors, dim, dtype code, ivf lists
+VECTOR_HEADER = struct.Struct("<8sIIIII")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _kmeans(vectors: np.ndarray, n_lists: int, iterations: int = IVF_KMEANS_ITERATIONS, seed: int = 0) -> np.ndarray:
+    """Spherical k-means; returns unit-length centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(n_lists):
+            members = vectors[assignment == c]
+            # Empty lists restart on a random vector rather than collapsing
+            centroids[c] = members.sum(axis=0) if len(members) else vectors[rng.integers(len(vectors))]
+        centroids = _normalize(centroids)
+    return centroids.astype(np.float32)
+
+
+def _vector_layout(n: int, dim: int, dtype: str, n_lists: int):
+    layout = [("vectors", "<f4" if dtype == "float32" else "i1", n * dim)]
+    if dtype == "int8":
+        layout.append(("scales", "<f4", n))
+    if n_lists:
+        layout += [("centroids", "<f4", n_lists * dim), ("list_start", "<i8", n_lists + 1), ("list_rows", "<i4", n)]
+    return sections(layout, VECTOR_HEADER.size)[0]
+
+
+def build_vector_index(vectors, path: str = LOCAL_VECTOR_PATH, dtype: str = VECTOR_DTYPE,
+                       n_lists: Optional[int] = None) -> int:
+    """
+    Writes embeddings (row i = chunk i of the chunk store) as one flat matrix,
+    L2-normalised so a dot product is the cosine score Pinecone used.
+    int8 stores each row scaled to +-127 plus its float32 scale.
+    """
+    if dtype not in DTYPE_CODES:
+        raise ValueError(f"Unknown vector dtype '{dtype}' (use float32 or int8)")
+    vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+    n, dim = vectors.shape
+    if n_lists is None:
+        n_lists = VECTOR_IVF_LISTS or (int(np.sqrt(n)) if n >= IVF_MIN_VECTORS else 0)
+    n_lists = min(n_lists, n)
+
+    arrays = {}
+    if dtype == "int8":
+        scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127
+        arrays["vectors"] = np.round(vectors / scales[:, None]).astype(np.int8)
+        arrays["scales"] = scales.astype("<f4")
+    else:
+        arrays["vectors"] = vectors.astype("<f4")
+    if n_lists:
+        centroids = _kmeans(vectors, n_lists)
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        order = np.argsort(assignment, kind="stable")
+        list_start = np.zeros(n_lists + 1, dtype="<i8")
+        list_start[1:] = np.cumsum(np.bincount(assignment, minlength=n_lists))
+        arrays.update(centroids=centroids.astype("<f4"), list_start=list_start, list_rows=order.astype("<i4"))
+
+    header = VECTOR_HEADER.pack(VECTOR_MAGIC, FORMAT_VERSION, n, dim, DTYPE_CODES[dtype], n_lists)
+    write_sections(path, header, _vector_layout(n, dim, dtype, n_lists), arrays)
+    return n
+
+
+FILTER_OPS = {
+    "$eq": lambda value, expected: value == expected,
+    "$ne": lambda value, expected: value != expected,
+    "$in": lambda value, expected: value in expected,
+    "$nin": lambda value, expected: value not in expected,
+    "$gt": lambda value, expected: value is not None and value > expected,
+    "$gte": lambda value, expected: value is not None and value >= expected,
+    "$lt": lambda value, expected: value is not None and value < expected,
+    "$lte": lambda value, expected: value is not None and value <= expected,
+}
+
+
+def patch_vector_index(keep, new_vectors, path: str = LOCAL_VECTOR_PATH) -> int:
+    """
+    Keeps the rows where `keep` is True and appends `new_vectors`, in the same
+    order patch_keyword_index applies to the chunk store. Only new chunks
+    need embedding; IVF lists are re-clustered.
+    """
+    old = LocalVectorIndex(path, chunk_path=None)
+    kept = old.vectors()[np.asarray(keep, dtype=bool)]
+    new_vectors = np.asarray(new_vectors, dtype=np.float32).reshape(-1, old.dim)
+    return build_vector_index(np.concatenate([kept, new_vectors]), path, old.dtype)
+
+
+def _matches(metadata: dict, search_filter: Dict[str, Any]) -> bool:
+    """Pinecone-style metadata filter, e.g. {"source": "x.pdf", "page": {"$gte": 10}}."""
+    for key, condition in search_filter.items():
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, expected in condition.items():
+            if op not in FILTER_OPS:
+                raise ValueError(f"Unsupported filter operator '{op}'")
+            if not FILTER_OPS[op](metadata.get(key), expected):
+                return False
+    return True
+
+
+class LocalVectorIndex:
+    """
+    Memory-mapped dense index over the chunk store. Exact top-k is a single
+    matrix-vector product; with IVF lists only the `nprobe` closest
+    partitions are scored.
+    """
+    def __init__(self, path: str = LOCAL_VECTOR_PATH, chunk_path: Optional[str] = CHUNK_STORE_PATH,
+                 nprobe: int = VECTOR_IVF_NPROBE):
+        self.path = path
+        self.nprobe = nprobe
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n, dim, dtype_code, n_lists = VECTOR_HEADER.unpack_from(self._mm)
+        if magic != VECTOR_MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a vector index file (version {FORMAT_VERSION})")
+        self.n, self.dim, self.n_lists = n, dim, n_lists
+        self.dtype = {code: name for name, code in DTYPE_CODES.items()}[dtype_code]
+        for name, (offset, np_dtype, count) in _vector_layout(n, dim, self.dtype, n_lists).items():
+            setattr(self, f"_{name}", np.frombuffer(self._mm, dtype=np_dtype, count=count, offset=offset))
+        self._vectors = self._vectors.reshape(n, dim)
+        if n_lists:
+            self._centroids = self._centroids.reshape(n_lists, dim)
+
+        self.chunks = ChunkStore(chunk_path) if chunk_path else None  # None: vectors only (patching)
+        if self.chunks is not None and len(self.chunks) != n:
+            raise ValueError(f"{chunk_path} has {len(self.chunks)} chunks but {path} holds {n} vectors")
+
+    def vectors(self) -> np.ndarray:
+        """Every row as float32 (int8 rows are rescaled)."""
+        if self.dtype == "int8":
+            return self._vectors.astype(np.float32) * self._scales[:, None]
+        return np.array(self._vectors)
+
+    def _candidates(self, query: np.ndarray) -> Optional[np.ndarray]:
+        if not self.n_lists:
+            return None
+        probes = np.argsort(self._centroids @ query)[::-1][:self.nprobe]
+        return np.concatenate([self._list_rows[self._list_start[c]:self._list_start[c + 1]] for c in probes])
+
+    def scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        vectors = self._vectors if rows is None else self._vectors[rows]
+        if self.dtype == "int8":
+            # Mixed int8/float32 matmul skips BLAS; widening a block at a time keeps it on BLAS and in cache
+            scales = self._scales if rows is None else self._scales[rows]
+            dots = np.empty(len(vectors), dtype=np.float32)
+            for start in range(0, len(vectors), INT8_BLOCK_ROWS):
+                dots[start:start + INT8_BLOCK_ROWS] = vectors[start:start + INT8_BLOCK_ROWS].astype(np.float32) @ query
+            return dots * scales
+        return vectors @ query
+
+    def search_rows(self, query_vector, k: int = 10, search_filter: Optional[dict] = None) -> List[tuple]:
+        """[(row, cosine score)] best first."""
+        query = _normalize(np.asarray(query_vector, dtype=np.float32))
+        rows = self._candidates(query)
+        scores = self.scores(query, rows)
+        if rows is None:
+            rows = np.arange(self.n)
+        if search_filter:
+            # Walk in score order, decoding chunk metadata until k pass the filter
+            order = np.argsort(scores)[::-1]
+            hits = []
+            for i in order:
+                if _matches(self.chunks.get(int(rows[i])).metadata, search_filter):
+                    hits.append((int(rows[i]), float(scores[i])))
+                    if len(hits) == k:
+                        break
+            return hits
+        top = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [(int(rows[i]), float(scores[i])) for i in top]
+
+    def search(self, query_vector, k: int = 10, search_filter: Optional[dict] = None) -> List[Document]:
+        return [self.chunks.get(row) for row, _ in self.search_rows(query_vector, k, search_filter)]
+
+
+class LocalVectorRetriever(BaseRetriever):
+    """Same role as PineconeVectorStore.as_retriever(search_kwargs={"k": 10, "filter": ...})."""
+    index: Any
+    embeddings: Any
+    k: int = 10
+    search_filter: Optional[dict] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.index.search(self.embeddings.embed_query(query), self.k, self.search_filter)
+
+
+def load_vector_retriever(embeddings, k: int = 10, search_filter: Optional[dict] = None,
+                          backend: str = VECTOR_BACKEND) -> BaseRetriever:
+    """The dense half of hybrid search, from VECTOR_BACKEND (shared by rag.py and app.py)."""
+    if backend == "local":
+        if not os.path.exists(LOCAL_VECTOR_PATH):
+            raise FileNotFoundError(LOCAL_VECTOR_PATH)
+        return LocalVectorRetriever(index=LocalVectorIndex(), embeddings=embeddings, k=k, search_filter=search_filter)
+    if backend != "pinecone":
+        raise ValueError(f"Unknown VECTOR_BACKEND '{backend}' (use pinecone or local)")
+
+    from langchain_pinecone import PineconeVectorStore
+    vectorstore = PineconeVectorStore(index_name=INDEX_NAME, embedding=embeddings)
+    search_kwargs = {"k": k}
+    if search_filter:
+        search_kwargs["filter"] = search_filter
+    return vectorstore.as_retriever(search_kwargs=search_kwargs)
+
+
+if __name__ == "__main__":
+    # python vector_index.py -> embed the existing chunk store locally (no PDF re-parse, no Pinecone)
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    store = ChunkStore()
+    texts = [store.get(i).page_content for i in range(len(store))]
+    print(f"Embedding {len(texts)} chunks with {EMBEDDING_MODEL}...")
+    vectors = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL).embed_documents(texts)
+    build_vector_index(vectors)
+    print(f"Vector index written to {LOCAL_VECTOR_PATH} ({VECTOR_DTYPE})")
@@ -0,0 +1,93 @@
+# verifier.py
+import re
+from typing import List, Tuple
+from schema import EmergencyInfo, VerificationResult
+
+# --- CONFIGURATION ---
+# Same checklist (and order) as the prompt in EmergencyAgents.verifier_node
+CHECKLIST_ORDER = ["location", "emergency_type", "immediate_dangers", "age_group", "caller_name"]
+
+EMPTY_VALUES = {"", "n/a", "na", "none", "null", "unknown", "not specified", "not provided"}
+
+# Inputs the dispatcher already rejects on their own ("Reject 'India' or 'City only'")
+BROAD_REGIONS = {
+    "india", "usa", "united states", "uk",
+    "andhra pradesh", "bihar", "delhi", "new delhi", "goa", "gujarat", "karnataka",
+    "kerala", "maharashtra", "maharastra", "punjab", "rajasthan", "tamil nadu",
+    "telangana", "uttar pradesh", "west bengal",
+    "mumbai", "bangalore", "bengaluru", "chennai", "hyderabad", "kolkata", "pune",
+    "new york",
+}
+
+# Danger values that are too vague for a fire/police dispatch
+VAGUE_DANGERS = {"yes", "no", "danger", "dangerous", "emergency", "help", "unsafe"}
+
+
+def _is_empty(value) -> bool:
+    return value is None or str(value).strip().lower() in EMPTY_VALUES
+
+
+def check_location(location) -> str:
+    """Returns 'ok', 'missing' or 'ambiguous' for a location string."""
+    if _is_empty(location):
+        return "missing"
+
+    text = re.sub(r"\s+", " ", str(location)).strip().lower()
+    parts = [p.strip() for p in text.split(",") if p.strip()]
+
+    # "Mumbai", "India", "Maharashtra, India" ... no street/landmark at all
+    if all(p in BROAD_REGIONS for p in parts):
+        return "missing"
+    if len(parts) == 1 and len(parts[0].split()) == 1:
+        return "missing"
+
+    # "Bandra, Mumbai, Maharashtra" -> landmark + city
+    if len(parts) >= 2 and parts[0] not in BROAD_REGIONS:
+        return "ok"
+
+    # "jk college road guntur" could be fine, "the parliament new delhi" is not
+    return "ambiguous"
+
+
+def check_immediate_dangers(emergency_type, immediate_dangers) -> str:
+    if emergency_type == "medical":
+        return "missing" if _is_empty(immediate_dangers) else "ok"
+    if emergency_type in ("fire", "police"):
+        if _is_empty(immediate_dangers):
+            return "missing"
+        if str(immediate_dangers).strip().lower() in VAGUE_DANGERS:
+            return "ambiguous"
+    return "ok"
+
+
+def audit(parameters: dict) -> Tuple[VerificationResult, List[str]]:
+    """
+    Deterministic version of the verifier_node checklist.
+    Returns the verdict plus the fields that need an LLM second opinion.
+    """
+    info = EmergencyInfo.model_validate(parameters or {})
+
+    verdicts = {
+        "location": check_location(info.location),
+        "emergency_type": "missing" if _is_empty(info.emergency_type) else "ok",
+        "immediate_dangers": check_immediate_dangers(info.emergency_type, info.immediate_dangers),
+        "age_group": "missing" if _is_empty(info.age_group) else "ok",
+        "caller_name": "missing" if _is_empty(info.caller_name) else "ok",
+    }
+
+    missing = [f for f in CHECKLIST_ORDER if verdicts[f] == "missing"]
+    ambiguous = [f for f in CHECKLIST_ORDER if verdicts[f] == "ambiguous"]
+
+    result = VerificationResult(
+        is_sufficient=not missing and not ambiguous,
+        missing_fields=missing
+    )
+    return result, ambiguous
+
+
+def merge_llm_verdict(rule_result: VerificationResult, ambiguous: List[str], llm_result: VerificationResult) -> VerificationResult:
+    """Keeps the rule verdicts and lets the LLM decide only the ambiguous fields."""
+    llm_missing = set(llm_result.missing_fields)
+    missing = set(rule_result.missing_fields) | {f for f in ambiguous if f in llm_missing}
+    ordered = [f for f in CHECKLIST_ORDER if f in missing]
+    return VerificationResult(is_sufficient=not ordered, missing_fields=ordered)